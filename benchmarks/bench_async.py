@@ -0,0 +1,60 @@
+# Compare a sequential loop with AsyncHPXMLBuilder on copies of the ERS-1032 test file, on a storage
+# with a simulated latency per read and write. Run from the repository root:
+#   python benchmarks/bench_async.py [houses] [latency_seconds]
+import json
+import os.path
+import shutil
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), os.path.pardir, 'src'))
+
+from hpxml_async import AsyncHPXMLBuilder  # noqa: E402
+from hpxml_builder import BuildHPXML  # noqa: E402
+
+ROOT = os.path.join(os.path.dirname(__file__), os.path.pardir)
+H2K_FILE = os.path.join(ROOT, 'exploration', 'data', 'h2k', 'ERS-1032.H2K')
+SCHEMA = os.path.join(ROOT, 'schemas', 'h2k', 'H2k Schema.xsd')
+TEMPLATE = {'run_directory': 'run', 'steps': [{'measure_dir_name': 'BuildResidentialHPXML', 'arguments': {}}]}
+
+
+class SlowStorage(AsyncHPXMLBuilder):
+    latency = 0.05
+
+    def read_file(self, h2k_file: str, staged_path: str) -> None:
+        time.sleep(self.latency)
+        super().read_file(h2k_file, staged_path)
+
+    def write_file(self, output: str, text: str) -> None:
+        time.sleep(self.latency)
+        super().write_file(output, text)
+
+
+if __name__ == '__main__':
+    n_houses = int(sys.argv[1]) if len(sys.argv) > 1 else 40
+    SlowStorage.latency = float(sys.argv[2]) if len(sys.argv) > 2 else 0.05
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        h2k_files = []
+        for index in range(n_houses):
+            h2k_files.append(os.path.join(tmp_dir, f"house-{index}.h2k"))
+            shutil.copyfile(H2K_FILE, h2k_files[-1])
+
+        start = time.perf_counter()
+        for h2k_file in h2k_files:
+            time.sleep(SlowStorage.latency)
+            builder = BuildHPXML(TEMPLATE, h2k_file, SCHEMA, backend='trusted')
+            builder.update_steps()
+            time.sleep(SlowStorage.latency)
+            builder.write_workflow(os.path.join(tmp_dir, os.path.basename(h2k_file) + '.json'))
+        sequential = time.perf_counter() - start
+
+        builder = SlowStorage(TEMPLATE, SCHEMA, os.path.join(tmp_dir, 'out'), backend='trusted')
+        start = time.perf_counter()
+        entries = builder.run(h2k_files)
+        overlapped = time.perf_counter() - start
+        failed = sum(entry['status'] != 'done' for entry in entries)
+        print(json.dumps({'houses': n_houses, 'latency': SlowStorage.latency, 'workers': builder.workers}))
+        print(f"sequential : {n_houses / sequential:7.1f} houses/s")
+        print(f"asyncio    : {n_houses / overlapped:7.1f} houses/s  speed-up {sequential / overlapped:5.2f}x"
+              f"  ({failed} failed)")
@@ -0,0 +1,44 @@
+# Compare the validating xmlschema backend of ParseH2K with the trusted iterparse backend on the
+# ASHRAE 140 test files and the ERS files of exploration/data/h2k. Run from the repository root:
+#   python benchmarks/bench_backends.py
+import glob
+import os.path
+import sys
+from time import perf_counter
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), os.path.pardir, 'src'))
+
+from h2kparser import ParseH2K  # noqa: E402
+from schema_registry import default_registry  # noqa: E402
+
+ROOT = os.path.join(os.path.dirname(__file__), os.path.pardir)
+FILE_SETS = {
+    'ASHRAE 140': (os.path.join(ROOT, 'tests', 'schema', 'H2k Schema.xsd'),
+                   sorted(glob.glob(os.path.join(ROOT, 'tests', 'ASHRAE_Standard_140', 'H2K', '*.h2k')))),
+    'ERS': (os.path.join(ROOT, 'schemas', 'h2k', 'H2k Schema.xsd'),
+            sorted(glob.glob(os.path.join(ROOT, 'exploration', 'data', 'h2k', '*.H2K')))),
+}
+
+
+def timeit(h2k_files, repeat=3, **kwargs):
+    best = float('inf')
+    for _ in range(repeat):
+        start = perf_counter()
+        for h2k_file in h2k_files:
+            ParseH2K(h2k_file, **kwargs)
+        best = min(best, perf_counter() - start)
+    return best
+
+
+if __name__ == '__main__':
+    for name, (schema_file, h2k_files) in FILE_SETS.items():
+        if not h2k_files:
+            continue
+        schema = default_registry.get(schema_file)
+        validating = timeit(h2k_files, schema_file=schema, validation='lax')
+        trusted = timeit(h2k_files, backend='trusted')
+        n_files = len(h2k_files)
+        print(f"{n_files} {name} files")
+        print(f"xmlschema : {validating / n_files * 1000:8.1f} ms/file")
+        print(f"trusted   : {trusted / n_files * 1000:8.1f} ms/file")
+        print(f"speed-up  : {validating / trusted:8.2f}x")
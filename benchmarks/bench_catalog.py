@@ -0,0 +1,43 @@
+# Time the queries of an H2KCatalog filled with synthetic rows for a 20k-house archive.
+# Run from the repository root:
+#   python benchmarks/bench_catalog.py [houses]
+import os.path
+import random
+import sys
+import tempfile
+from time import perf_counter
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), os.path.pardir, 'src'))
+
+from h2k_catalog import COLUMNS, H2KCatalog  # noqa: E402
+
+PROVINCES = ['QUEBEC', 'ONTARIO', 'ALBERTA', 'NOVA SCOTIA', 'YUKON TERRITORY', 'BRITISH COLUMBIA']
+SYSTEMS = [('Furnace', 'Oil'), ('Furnace', 'Natural gas'), ('Boiler', 'Oil'), ('Baseboards', 'Electric')]
+
+
+def synthetic_rows(n_houses: int):
+    rng = random.Random(0)
+    for i in range(n_houses):
+        system, fuel = rng.choice(SYSTEMS)
+        row = {'path': f"/archive/house-{i}.h2k", 'status': 'indexed', 'province': rng.choice(PROVINCES),
+               'house_type_code': rng.choice('1234'), 'storeys_code': rng.choice('12345'),
+               'vintage': rng.randint(1900, 2020), 'heated_area_above': rng.uniform(50, 400),
+               'heating_system': system, 'heating_fuel': fuel}
+        yield [row.get(column) for column in COLUMNS]
+
+
+if __name__ == '__main__':
+    n_houses = int(sys.argv[1]) if len(sys.argv) > 1 else 20000
+    with tempfile.TemporaryDirectory() as tmp_dir, H2KCatalog(os.path.join(tmp_dir, 'catalog.sqlite')) as catalog:
+        with catalog.connection:
+            catalog.connection.executemany(
+                f"INSERT INTO houses ({', '.join(COLUMNS)}) VALUES ({', '.join('?' * len(COLUMNS))})",
+                synthetic_rows(n_houses))
+        start = perf_counter()
+        repeat = 100
+        for _ in range(repeat):
+            # 1960s one-storey single detached houses heated by an oil furnace in Quebec
+            houses = catalog.find(province='QUEBEC', house_type_code='1', storeys_code='1', vintage=(1960, 1969),
+                                  heating_system='Furnace', heating_fuel='Oil')
+        elapsed = (perf_counter() - start) / repeat
+        print(f"{n_houses} houses, {len(houses)} matches, {elapsed * 1000:.2f} ms/query")
@@ -0,0 +1,36 @@
+# Throughput of the HPXML emitter on one core: parse copies of the ERS-1032 test file with the trusted
+# backend and stream their HPXML documents to disk. Run from the repository root:
+#   python benchmarks/bench_emitter.py [files]
+import os.path
+import shutil
+import sys
+import tempfile
+from time import perf_counter
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), os.path.pardir, 'src'))
+
+from h2kparser import ParseH2K  # noqa: E402
+from hpxml_emitter import HPXMLEmitter  # noqa: E402
+
+ROOT = os.path.join(os.path.dirname(__file__), os.path.pardir)
+H2K_FILE = os.path.join(ROOT, 'exploration', 'data', 'h2k', 'ERS-1032.H2K')
+
+
+if __name__ == '__main__':
+    n_files = int(sys.argv[1]) if len(sys.argv) > 1 else 1000
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        h2k_files = []
+        for index in range(n_files):
+            h2k_files.append(os.path.join(tmp_dir, f"house-{index:05d}.H2K"))
+            shutil.copyfile(H2K_FILE, h2k_files[-1])
+        parse_seconds = emit_seconds = 0
+        for h2k_file in h2k_files:
+            start = perf_counter()
+            parser = ParseH2K(h2k_file, backend='trusted')
+            parse_seconds += perf_counter() - start
+            start = perf_counter()
+            HPXMLEmitter(parser).write(os.path.splitext(h2k_file)[0] + '.xml')
+            emit_seconds += perf_counter() - start
+    total = parse_seconds + emit_seconds
+    print(f"{n_files} files: parse {parse_seconds / n_files * 1000:.2f} ms/file, "
+          f"emit {emit_seconds / n_files * 1000:.2f} ms/file, {n_files / total * 60:.0f} files/minute")
@@ -0,0 +1,63 @@
+# Compare the vectorized envelope aggregation of a fleet with a Python loop over the records of each
+# house, on copies of the components of the ERS-1032 test file. Run from the repository root:
+#   python benchmarks/bench_envelope.py [houses]
+import os.path
+import sys
+from time import perf_counter
+
+import numpy
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), os.path.pardir, 'src'))
+
+from h2k_envelope import envelope_summary  # noqa: E402
+from h2k_tables import house_tables  # noqa: E402
+from h2kparser import ParseH2K  # noqa: E402
+
+ROOT = os.path.join(os.path.dirname(__file__), os.path.pardir)
+H2K_FILE = os.path.join(ROOT, 'exploration', 'data', 'h2k', 'ERS-1032.H2K')
+TABLES = ['walls', 'windows', 'doors', 'headers', 'ceilings', 'floors']
+
+
+def loop_summary(parser: ParseH2K, n_houses: int) -> list:
+    # Effective R of the walls and ceilings and window area per direction, one house at a time
+    walls = parser.get_walls_spec()
+    ceilings, _ = parser.get_ceiling_spec()
+    windows = parser.get_windows_spec()
+    summaries = []
+    for _ in range(n_houses):
+        area, ua_val = 0, 0
+        for wall in walls:
+            current = float(wall['@height']) * float(wall['@perimeter'])
+            area += current
+            ua_val += current / float(wall['@rValue'])
+        walls_rsi = area / ua_val
+        area, ua_val = 0, 0
+        for ceiling in ceilings:
+            area += float(ceiling['@area'])
+            ua_val += float(ceiling['@area']) / float(ceiling['@rValue'])
+        win_area = {}
+        for window in windows:
+            code = window['facingDirectionCode']
+            win_area[code] = win_area.get(code, 0) + float(window['@height']) * float(window['@width']) / 1e6
+        summaries.append((walls_rsi, area / ua_val, win_area))
+    return summaries
+
+
+if __name__ == '__main__':
+    n_houses = int(sys.argv[1]) if len(sys.argv) > 1 else 100000
+    parser = ParseH2K(H2K_FILE, backend='trusted')
+    single = house_tables(parser, TABLES)
+    # Fleet tables as read_table() returns them: the components of every house with its house key
+    fleet = {}
+    for name, table in single.items():
+        fleet[name] = numpy.tile(table, n_houses)
+        fleet[name]['house'] = numpy.repeat(numpy.arange(n_houses), len(table))
+
+    start = perf_counter()
+    loop_summary(parser, n_houses)
+    loop = perf_counter() - start
+    start = perf_counter()
+    envelope_summary(fleet, n_houses)
+    vectorized = perf_counter() - start
+    print(f"{n_houses} houses: loop {loop:.2f} s, vectorized {vectorized:.3f} s ({loop / vectorized:.0f}x), "
+          f"the vectorized summary also covers doors, headers and floors")
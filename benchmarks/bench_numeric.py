@@ -0,0 +1,55 @@
+# Compare the numeric types of ParseH2K (Decimal, float, numpy.float64) on the ASHRAE 140 test files:
+# the time to parse the files and the time of the builder arithmetic (window areas and door UA values)
+# on the values they return. Run from the repository root:
+#   python benchmarks/bench_numeric.py
+import glob
+import os.path
+import sys
+from time import perf_counter
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), os.path.pardir, 'src'))
+
+from h2kparser import ParseH2K, numpy  # noqa: E402
+from schema_registry import default_registry  # noqa: E402
+
+ROOT = os.path.join(os.path.dirname(__file__), os.path.pardir)
+SCHEMA = os.path.join(ROOT, 'tests', 'schema', 'H2k Schema.xsd')
+H2K_FILES = sorted(glob.glob(os.path.join(ROOT, 'tests', 'ASHRAE_Standard_140', 'H2K', '*.h2k')))
+MATH_REPEAT = 2000
+
+
+def parse_all(schema, **kwargs):
+    start = perf_counter()
+    parsers = [ParseH2K(h2k_file, schema, **kwargs) for h2k_file in H2K_FILES]
+    return parsers, perf_counter() - start
+
+
+def envelope_math(parsers):
+    # Same operations as BuildHPXML.update_envelope_spec on windows and doors
+    start = perf_counter()
+    for _ in range(MATH_REPEAT):
+        for parser in parsers:
+            win_area = 0
+            for window in parser.get_windows_spec():
+                win_area += round(window['@height'] / 1000 * window['@width'] / 1000, 1)
+            ua_val, area = 0, 0
+            for door in parser.get_doors_spec()[0]:
+                current = door['@height'] * door['@width']
+                area += current
+                ua_val += current / door['@rValue']
+    return perf_counter() - start
+
+
+if __name__ == '__main__':
+    schema = default_registry.get(SCHEMA)
+    n_files = len(H2K_FILES)
+    print(f"{n_files} ASHRAE 140 files")
+    print(f"{'numeric':8} {'xmlschema':>12} {'trusted':>12} {'math':>12}")
+    for numeric in ParseH2K.NUMERIC_TYPES:
+        if numeric == 'numpy' and numpy is None:
+            continue
+        _, validating = parse_all(schema, numeric=numeric)
+        parsers, trusted = parse_all(None, numeric=numeric, backend='trusted')
+        math = envelope_math(parsers)
+        print(f"{numeric:8} {validating / n_files * 1000:9.2f} ms {trusted / n_files * 1000:9.2f} ms "
+              f"{math / MATH_REPEAT / n_files * 1e6:9.2f} us")
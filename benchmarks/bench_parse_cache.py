@@ -0,0 +1,38 @@
+# Compare a cold parse of the ASHRAE 140 test files with a parse served by a warm ParseCache.
+# Run from the repository root:
+#   python benchmarks/bench_parse_cache.py
+import glob
+import os.path
+import sys
+import tempfile
+from time import perf_counter
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), os.path.pardir, 'src'))
+
+from h2k_cache import ParseCache  # noqa: E402
+from h2kparser import ParseH2K  # noqa: E402
+from schema_registry import default_registry  # noqa: E402
+
+ROOT = os.path.join(os.path.dirname(__file__), os.path.pardir)
+SCHEMA = os.path.join(ROOT, 'tests', 'schema', 'H2k Schema.xsd')
+H2K_FILES = sorted(glob.glob(os.path.join(ROOT, 'tests', 'ASHRAE_Standard_140', 'H2K', '*.h2k')))
+
+
+def parse_all(cache):
+    start = perf_counter()
+    for h2k_file in H2K_FILES:
+        ParseH2K(h2k_file, SCHEMA, cache=cache)
+    return perf_counter() - start
+
+
+if __name__ == '__main__':
+    default_registry.get(SCHEMA)
+    n_files = len(H2K_FILES)
+    with tempfile.TemporaryDirectory() as cache_dir:
+        cache = ParseCache(cache_dir)
+        cold = parse_all(cache)
+        warm = parse_all(cache)
+        print(f"{n_files} ASHRAE 140 files, {cache.store.size() / n_files / 1024:.1f} KiB/file in the cache")
+        print(f"cold : {cold / n_files * 1000:8.2f} ms/file")
+        print(f"warm : {warm / n_files * 1000:8.2f} ms/file")
+        print(f"speed-up : {cold / warm:8.2f}x")
@@ -0,0 +1,35 @@
+# Measure the scaling of ParseH2K.parse_many with the number of worker processes on copies of the
+# ASHRAE 140 test files. Run from the repository root:
+#   python benchmarks/bench_parse_many.py [copies]
+import glob
+import os.path
+import sys
+from time import perf_counter
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), os.path.pardir, 'src'))
+
+from h2kparser import ParseH2K  # noqa: E402
+from schema_registry import default_registry  # noqa: E402
+
+ROOT = os.path.join(os.path.dirname(__file__), os.path.pardir)
+SCHEMA = os.path.join(ROOT, 'tests', 'schema', 'H2k Schema.xsd')
+H2K_FILES = sorted(glob.glob(os.path.join(ROOT, 'tests', 'ASHRAE_Standard_140', 'H2K', '*.h2k')))
+
+
+if __name__ == '__main__':
+    copies = int(sys.argv[1]) if len(sys.argv) > 1 else 4
+    paths = H2K_FILES * copies
+    n_cpus = os.cpu_count() or 1
+    workers = sorted({1, 2, 4, 8, 16, 32, n_cpus} & set(range(1, n_cpus + 1)))
+    print(f"{len(paths)} files, {n_cpus} CPUs")
+    # Compile the schema before timing, forked workers inherit it and spawned ones load H2K_SCHEMA_CACHE
+    default_registry.get(SCHEMA)
+    baseline = None
+    for n_workers in workers:
+        start = perf_counter()
+        failed = sum(result.error is not None
+                     for result in ParseH2K.parse_many(paths, SCHEMA, workers=n_workers, ordered=False))
+        elapsed = perf_counter() - start
+        baseline = baseline or elapsed
+        print(f"workers={n_workers:3} : {len(paths) / elapsed:8.1f} files/s  speed-up {baseline / elapsed:5.2f}x"
+              f"  ({failed} failed)")
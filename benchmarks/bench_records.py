@@ -0,0 +1,59 @@
+# Compare the memory held by the component records returned by the ParseH2K getters with the dicts
+# they replace, for a fleet of copies of the ASHRAE 140 and ERS test houses. Run from the repository root:
+#   python benchmarks/bench_records.py
+import glob
+import os.path
+import sys
+import tracemalloc
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), os.path.pardir, 'src'))
+
+from h2kparser import ParseH2K  # noqa: E402
+from h2k_records import Record  # noqa: E402
+
+ROOT = os.path.join(os.path.dirname(__file__), os.path.pardir)
+H2K_FILES = sorted(glob.glob(os.path.join(ROOT, 'tests', 'ASHRAE_Standard_140', 'H2K', '*.h2k'))) + \
+    sorted(glob.glob(os.path.join(ROOT, 'exploration', 'data', 'h2k', '*.H2K')))
+GETTERS = ['get_walls_spec', 'get_windows_spec', 'get_doors_spec', 'get_floor_header', 'get_ceiling_spec',
+           'get_exposed_floor', 'get_basement_spec', 'get_hrv', 'get_hotwater_spec']
+COPIES = 200
+
+
+def collect_records():
+    records = []
+    for h2k_file in H2K_FILES:
+        parser = ParseH2K(h2k_file, backend='trusted')
+        for getter in GETTERS:
+            try:
+                result = getattr(parser, getter)()
+            except (KeyError, TypeError):
+                # Some getters fail on the test houses, see the getter tests
+                continue
+            stack = [result]
+            while stack:
+                value = stack.pop()
+                if isinstance(value, Record):
+                    records.append(value)
+                elif isinstance(value, tuple):
+                    stack.extend(value)
+    return records
+
+
+def measure(build, records):
+    # Bytes allocated for the containers only, the values are shared by both layouts
+    tracemalloc.start()
+    start = tracemalloc.get_traced_memory()[0]
+    fleet = [build(record) for _ in range(COPIES) for record in records]
+    size = tracemalloc.get_traced_memory()[0] - start
+    tracemalloc.stop()
+    return size / len(fleet)
+
+
+if __name__ == '__main__':
+    records = collect_records()
+    as_dict = measure(lambda record: dict(record.items()), records)
+    as_record = measure(lambda record: type(record)(*record.values()), records)
+    print(f"{len(records)} components in {len(H2K_FILES)} houses, {COPIES} copies")
+    print(f"dict    : {as_dict:8.0f} bytes/component")
+    print(f"record  : {as_record:8.0f} bytes/component")
+    print(f"saving  : {1 - as_record / as_dict:8.1%}")
@@ -0,0 +1,33 @@
+# Export the component tables of copies of the ERS-1032 test file and report the throughput and the
+# peak memory of the writer. Run from the repository root:
+#   python benchmarks/bench_tables.py [houses] [chunk_rows]
+import os.path
+import sys
+import tempfile
+import tracemalloc
+from time import perf_counter
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), os.path.pardir, 'src'))
+
+from h2k_tables import ComponentTableWriter, extract_rows  # noqa: E402
+from h2kparser import ParseH2K  # noqa: E402
+
+ROOT = os.path.join(os.path.dirname(__file__), os.path.pardir)
+H2K_FILE = os.path.join(ROOT, 'exploration', 'data', 'h2k', 'ERS-1032.H2K')
+
+
+if __name__ == '__main__':
+    n_houses = int(sys.argv[1]) if len(sys.argv) > 1 else 20000
+    chunk_rows = int(sys.argv[2]) if len(sys.argv) > 2 else 10000
+    rows, errors = extract_rows(ParseH2K(H2K_FILE, backend='trusted'))
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        tracemalloc.start()
+        start = perf_counter()
+        with ComponentTableWriter(tmp_dir, format='numpy', chunk_rows=chunk_rows) as writer:
+            for house in range(n_houses):
+                writer.add_house(H2K_FILE, 'ERS-1032', rows, errors)
+        elapsed = perf_counter() - start
+        peak = tracemalloc.get_traced_memory()[1]
+        n_rows = sum(writer.n_rows.values())
+        print(f"{n_houses} houses, {n_rows} rows in {elapsed:.2f} s ({n_rows / elapsed:,.0f} rows/s), "
+              f"peak memory {peak / 2 ** 20:.1f} MiB with chunks of {chunk_rows} rows")
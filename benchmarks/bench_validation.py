@@ -0,0 +1,46 @@
+# Compare the former two-pass parse (is_valid + to_dict) with the single-pass validate-and-decode
+# of ParseH2K on the ASHRAE 140 test files. Run from the repository root:
+#   python benchmarks/bench_validation.py
+import glob
+import os.path
+import sys
+from time import perf_counter
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), os.path.pardir, 'src'))
+
+from h2kparser import ParseH2K  # noqa: E402
+from schema_registry import default_registry  # noqa: E402
+
+ROOT = os.path.join(os.path.dirname(__file__), os.path.pardir)
+SCHEMA = os.path.join(ROOT, 'tests', 'schema', 'H2k Schema.xsd')
+H2K_FILES = sorted(glob.glob(os.path.join(ROOT, 'tests', 'ASHRAE_Standard_140', 'H2K', '*.h2k')))
+
+
+def two_pass(h2k_file, schema):
+    assert schema.is_valid(h2k_file), "Not a valid h2k file"
+    return schema.to_dict(h2k_file)
+
+
+def single_pass(h2k_file, schema):
+    return ParseH2K(h2k_file, schema).h2k_dict
+
+
+def timeit(func, schema, repeat=3):
+    best = float('inf')
+    for _ in range(repeat):
+        start = perf_counter()
+        for h2k_file in H2K_FILES:
+            func(h2k_file, schema)
+        best = min(best, perf_counter() - start)
+    return best
+
+
+if __name__ == '__main__':
+    schema = default_registry.get(SCHEMA)
+    baseline = timeit(two_pass, schema)
+    current = timeit(single_pass, schema)
+    n_files = len(H2K_FILES)
+    print(f"{n_files} ASHRAE 140 files")
+    print(f"two-pass    : {baseline / n_files * 1000:8.1f} ms/file")
+    print(f"single-pass : {current / n_files * 1000:8.1f} ms/file")
+    print(f"speed-up    : {baseline / current:8.2f}x")
@@ -25,7 +25,8 @@ setup(
     license='GPL',
     packages=['src'],
     install_requires=[
-        'pypandoc>=1.6'
+        'pypandoc>=1.6',
+        'numpy>=1.21'
     ],
     setup_requires=['pytest-runner'],
     tests_require=['pytest'],
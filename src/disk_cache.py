@@ -0,0 +1,138 @@
+import os
+import tempfile
+
+
+class DiskLRUCache:
+    """Binary values stored as files in a directory and keyed by hex digests.
+
+    Reading a value marks it as recently used (its modification time is updated). When the total size
+    goes above max_bytes, the least recently used values are removed. Several processes can share the
+    directory: values are written atomically and a value removed by another process is a miss.
+    """
+
+    # After an eviction the cache is shrunk to this fraction of max_bytes, so that it is not scanned
+    # again at every write
+    EVICT_TO = 0.9
+
+    def __init__(self, directory: str, max_bytes: int = None) -> None:
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        # Total size of the values, computed when first needed and updated on writes
+        self._size = None
+
+    def path(self, key: str) -> str:
+        return os.path.join(self.directory, key[:2], key)
+
+    def get(self, key: str):
+        path = self.path(key)
+        try:
+            with open(path, 'rb') as value:
+                data = value.read()
+            os.utime(path)
+        except OSError:
+            self.misses += 1
+            return None
+        self.hits += 1
+        return data
+
+    def get_path(self, key: str):
+        # Path of the value for reading it in place, None on a miss. The value may still be removed by
+        # another process before it is opened.
+        path = self.path(key)
+        try:
+            os.utime(path)
+        except OSError:
+            self.misses += 1
+            return None
+        self.hits += 1
+        return path
+
+    def put(self, key: str, data: bytes) -> None:
+        fd, tmp_path = self.mkstemp(key)
+        try:
+            with os.fdopen(fd, 'wb') as tmp_file:
+                tmp_file.write(data)
+        except BaseException:
+            os.remove(tmp_path)
+            raise
+        self.put_file(key, tmp_path)
+
+    def mkstemp(self, key: str) -> tuple:
+        # Temporary file next to the value of key, to be written and then moved in place with put_file
+        os.makedirs(os.path.dirname(self.path(key)), exist_ok=True)
+        return tempfile.mkstemp(dir=os.path.dirname(self.path(key)), suffix='.tmp')
+
+    def put_file(self, key: str, file_path: str) -> None:
+        # Move a file of the cache file system (see mkstemp) to the value of key
+        path = self.path(key)
+        try:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            replaced = os.path.getsize(path) if os.path.exists(path) else 0
+            if self.max_bytes is not None:
+                # Total size before the write
+                self.size()
+            size = os.path.getsize(file_path)
+            os.replace(file_path, path)
+        except BaseException:
+            if os.path.exists(file_path):
+                os.remove(file_path)
+            raise
+        if self.max_bytes is not None:
+            self._size += size - replaced
+            if self._size > self.max_bytes:
+                self.evict()
+
+    def _entries(self) -> list:
+        # (mtime, size, path) of the values, ignoring the temporary files of writes in progress
+        entries = []
+        if not os.path.isdir(self.directory):
+            return entries
+        for shard in os.scandir(self.directory):
+            if not shard.is_dir():
+                continue
+            for entry in os.scandir(shard.path):
+                if entry.name.endswith('.tmp'):
+                    continue
+                try:
+                    stat = entry.stat()
+                except OSError:
+                    continue
+                entries.append((stat.st_mtime_ns, stat.st_size, entry.path))
+        return entries
+
+    def size(self) -> int:
+        if self._size is None:
+            self._size = sum(size for _, size, _ in self._entries())
+        return self._size
+
+    def evict(self, max_bytes: int = None) -> int:
+        # Remove the least recently used values until the cache fits in max_bytes, returns the bytes freed
+        if max_bytes is None:
+            max_bytes = int(self.max_bytes * self.EVICT_TO)
+        entries = sorted(self._entries())
+        size = sum(entry_size for _, entry_size, _ in entries)
+        freed = 0
+        for _, entry_size, path in entries:
+            if size - freed <= max_bytes:
+                break
+            try:
+                os.remove(path)
+            except OSError:
+                continue
+            freed += entry_size
+        self._size = size - freed
+        return freed
+
+    def clear(self) -> None:
+        self.evict(0)
+
+    def __contains__(self, key: str) -> bool:
+        return os.path.exists(self.path(key))
+
+    def __len__(self) -> int:
+        return len(self._entries())
+
+    def stats(self) -> dict:
+        return {'hits': self.hits, 'misses': self.misses, 'bytes': self.size()}
@@ -0,0 +1,59 @@
+import hashlib
+import os
+import pickle
+
+import xmlschema
+
+from disk_cache import DiskLRUCache
+from schema_registry import sha256_file
+
+
+class ParseCache:
+    """On-disk cache of decoded H2K models, keyed by the content of the H2K file, the schema, the parser
+    version and the parser options. The least recently used models are evicted above max_bytes.
+    """
+
+    DEFAULT_MAX_BYTES = 2 * 1024 ** 3
+
+    def __init__(self, directory: str, max_bytes: int = DEFAULT_MAX_BYTES) -> None:
+        self.directory = directory
+        self.store = DiskLRUCache(directory, max_bytes)
+
+    def key(self, h2k_file: str, schema_digest: str, parser_version, options: tuple) -> str:
+        # The xmlschema release is part of the key as it may decode some values differently
+        parts = [sha256_file(h2k_file), schema_digest, str(parser_version), xmlschema.__version__]
+        parts.extend(str(option) for option in options)
+        return hashlib.sha256('\0'.join(parts).encode()).hexdigest()
+
+    def get(self, key: str):
+        data = self.store.get(key)
+        if data is None:
+            return None
+        try:
+            return pickle.loads(data)
+        except Exception:
+            # A corrupted entry is parsed again and overwritten
+            return None
+
+    def put(self, key: str, value: dict) -> None:
+        self.store.put(key, pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL))
+
+    def stats(self) -> dict:
+        return self.store.stats()
+
+
+# One cache per directory and process, so that the size of the cache is only computed once
+_parse_caches = {}
+
+
+def resolve_parse_cache(cache):
+    # Accepts a ParseCache, a directory, False for no cache, or None for the directory set in the
+    # H2K_PARSE_CACHE environment variable (no cache when it is not set)
+    if cache is None:
+        cache = os.environ.get('H2K_PARSE_CACHE') or False
+    if cache is False or isinstance(cache, ParseCache):
+        return cache or None
+    directory = os.path.abspath(cache)
+    if directory not in _parse_caches:
+        _parse_caches[directory] = ParseCache(directory)
+    return _parse_caches[directory]
@@ -0,0 +1,232 @@
+import os
+import sqlite3
+from time import time
+
+from h2k_sniffer import iter_h2k_files
+from h2kparser import ParseH2K
+from schema_registry import sha256_file, warm_schema
+from worker_pool import imap
+
+# Columns of the catalog extracted from each house, with their SQLite types
+ATTRIBUTES = {
+    'file_id': 'TEXT',
+    'version_major': 'INTEGER',
+    'version_minor': 'INTEGER',
+    'province': 'TEXT',
+    'city': 'TEXT',
+    'house_type': 'TEXT',
+    'house_type_code': 'TEXT',
+    'storeys': 'TEXT',
+    'storeys_code': 'TEXT',
+    'vintage': 'INTEGER',
+    'heated_area_above': 'REAL',
+    'heated_area_below': 'REAL',
+    'heating_system': 'TEXT',
+    'heating_fuel': 'TEXT',
+    'heating_equipment': 'TEXT',
+    'heating_efficiency': 'REAL',
+    'heating_capacity': 'REAL',
+    'backup_heating_system': 'TEXT',
+}
+FILE_COLUMNS = {
+    'path': 'TEXT PRIMARY KEY',
+    'mtime_ns': 'INTEGER',
+    'size': 'INTEGER',
+    'sha256': 'TEXT',
+    'status': 'TEXT',
+    'error': 'TEXT',
+    'indexed_at': 'REAL',
+}
+COLUMNS = list(FILE_COLUMNS) + list(ATTRIBUTES)
+INDEXES = [('province', 'city'), ('house_type_code',), ('storeys_code',), ('vintage',), ('heated_area_above',),
+           ('heating_system',), ('heating_fuel',), ('sha256',)]
+
+
+class H2KCatalog:
+    """SQLite catalog of the H2K files of a directory tree, to select houses without parsing them again.
+
+    index() parses the new and modified files in a pool of worker processes and stores their location,
+    house type, vintage, heated area and heating system. Files whose modification time and size did not
+    change are skipped without being read, the others are hashed in the workers and files that were only
+    touched (same SHA-256) are not parsed again. Files that failed to parse are retried.
+    """
+
+    # Rows written per transaction
+    COMMIT_EVERY = 500
+
+    def __init__(self, db_path: str) -> None:
+        self.db_path = db_path
+        self.connection = sqlite3.connect(db_path)
+        self.connection.row_factory = sqlite3.Row
+        columns = ', '.join(f"{name} {sql_type}" for name, sql_type in {**FILE_COLUMNS, **ATTRIBUTES}.items())
+        with self.connection:
+            self.connection.execute(f"CREATE TABLE IF NOT EXISTS houses ({columns})")
+            for columns in INDEXES:
+                self.connection.execute(
+                    f"CREATE INDEX IF NOT EXISTS houses_{'_'.join(columns)} ON houses ({', '.join(columns)})")
+
+    def close(self) -> None:
+        self.connection.close()
+
+    def __enter__(self) -> 'H2KCatalog':
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def __len__(self) -> int:
+        return self.connection.execute("SELECT COUNT(*) FROM houses").fetchone()[0]
+
+    def index(self, root: str, schema_file=None, workers: int = None, **parse_options) -> dict:
+        # Index the H2K files under root and remove the files that were deleted, returns the number of
+        # files indexed, failed, unchanged, touched (new mtime, same content) and removed.
+        # parse_options are passed to ParseH2K, files are parsed lazily unless they are set.
+        if parse_options.get('backend', 'xmlschema') == 'xmlschema':
+            parse_options.setdefault('lazy', True)
+        prefix = os.path.join(os.path.abspath(root), '')
+        known = {row['path']: row for row in self.connection.execute(
+            "SELECT path, mtime_ns, size, sha256, status FROM houses WHERE substr(path, 1, ?) = ?",
+            (len(prefix), prefix))}
+        summary = {'indexed': 0, 'failed': 0, 'unchanged': 0, 'touched': 0, 'removed': 0}
+
+        tasks = []
+        with self.connection:
+            for h2k_file in iter_h2k_files(root):
+                path = os.path.abspath(h2k_file)
+                stat = os.stat(path)
+                row = known.pop(path, None)
+                if row is not None and row['status'] == 'failed':
+                    # Files that failed are parsed again, e.g. after a schema was registered
+                    row = None
+                if row is not None and (row['mtime_ns'], row['size']) == (stat.st_mtime_ns, stat.st_size):
+                    summary['unchanged'] += 1
+                    continue
+                # The workers hash the file and only parse it when its content changed
+                tasks.append((path, stat.st_mtime_ns, stat.st_size, row['sha256'] if row is not None else None))
+
+            self.connection.executemany("DELETE FROM houses WHERE path = ?", [(path,) for path in known])
+            summary['removed'] = len(known)
+
+        placeholders = ', '.join('?' * len(COLUMNS))
+        insert = f"INSERT OR REPLACE INTO houses ({', '.join(COLUMNS)}) VALUES ({placeholders})"
+        touch = "UPDATE houses SET mtime_ns = ?, size = ? WHERE path = ?"
+        rows = []
+        touched = []
+        for row in imap(_index_file, tasks, workers, initializer=_init_worker, initargs=(schema_file, parse_options),
+                        ordered=False):
+            summary[row['status']] += 1
+            if row['status'] == 'touched':
+                touched.append((row['mtime_ns'], row['size'], row['path']))
+            else:
+                rows.append([row.get(column) for column in COLUMNS])
+            if len(rows) + len(touched) >= self.COMMIT_EVERY:
+                with self.connection:
+                    self.connection.executemany(insert, rows)
+                    self.connection.executemany(touch, touched)
+                rows = []
+                touched = []
+        with self.connection:
+            self.connection.executemany(insert, rows)
+            self.connection.executemany(touch, touched)
+        return summary
+
+    def query(self, where: str, params=()) -> list:
+        # Houses matching a WHERE clause, e.g. query("vintage BETWEEN ? AND ?", (1960, 1969)). The values
+        # are bound from params, the clause itself cannot hold string literals.
+        if "'" in where:
+            raise ValueError("Pass the values of the WHERE clause in params, e.g. query('city = ?', ('Whitehorse',))")
+        return [dict(row) for row in self.connection.execute(f"SELECT * FROM houses WHERE {where}", params)]
+
+    def find(self, **filters) -> list:
+        # Houses matching all the filters: a value for equality, a list of values, or a (min, max) range,
+        # e.g. find(province='QUEBEC', vintage=(1960, 1969), heating_system='Furnace', heating_fuel='Oil')
+        clauses = ["status = ?"]
+        params = ['indexed']
+        for column, value in filters.items():
+            if column not in COLUMNS:
+                raise ValueError(f"Unknown catalog column {column!r}")
+            if isinstance(value, tuple):
+                clauses.append(f"{column} BETWEEN ? AND ?")
+                params.extend(value)
+            elif isinstance(value, list):
+                clauses.append(f"{column} IN ({', '.join('?' * len(value))})")
+                params.extend(value)
+            else:
+                clauses.append(f"{column} = ?")
+                params.append(value)
+        return self.query(' AND '.join(clauses), params)
+
+
+def _number(value):
+    # SQLite does not store Decimal values
+    return None if value is None else float(value)
+
+
+def extract_attributes(parser: ParseH2K) -> dict:
+    # Catalog attributes of a parsed house, attributes missing from the file are left empty
+    getters = {
+        'file_id': parser.get_file_id,
+        'version': parser.get_version,
+        'province': parser.get_climate_Prov,
+        'city': parser.get_climate_city,
+        'house_type': parser.get_house_type,
+        'storeys': parser.get_n_storey,
+        'vintage': parser.get_vintage,
+        'heated_area': parser.get_heated_area,
+        'heating': parser.get_heating_system_spec,
+    }
+    values = {}
+    for name, getter in getters.items():
+        try:
+            values[name] = getter()
+        except (KeyError, TypeError):
+            values[name] = None
+
+    attributes = {'file_id': values['file_id'], 'province': values['province'], 'city': values['city']}
+    if values['version'] is not None:
+        attributes.update(version_major=values['version']['@major'], version_minor=values['version']['@minor'])
+    if values['house_type'] is not None:
+        attributes.update(house_type=values['house_type']['English'], house_type_code=values['house_type']['@code'])
+    if values['storeys'] is not None:
+        attributes.update(storeys=values['storeys']['English'], storeys_code=values['storeys']['@code'])
+    if values['vintage'] is not None:
+        attributes['vintage'] = int(values['vintage'])
+    if values['heated_area'] is not None:
+        attributes.update(heated_area_above=_number(values['heated_area']['@aboveGrade']),
+                          heated_area_below=_number(values['heated_area']['@belowGrade']))
+    if values['heating'] is not None:
+        primary, backup = values['heating']
+        if primary is not None:
+            system_type, spec = primary
+            attributes.update(heating_system=system_type, heating_fuel=spec['fuel'],
+                              heating_equipment=spec['equipment'], heating_efficiency=_number(spec['efficiency']),
+                              heating_capacity=_number(spec['capacity']))
+        if backup is not None:
+            attributes['backup_heating_system'] = backup[0]
+    return attributes
+
+
+# Schema and parser options of the current worker process of H2KCatalog.index
+_worker_state = {}
+
+
+def _init_worker(schema_file, parse_options: dict) -> None:
+    _worker_state.update(schema_file=schema_file, parse_options=parse_options)
+    if parse_options.get('backend', 'xmlschema') == 'xmlschema':
+        warm_schema(schema_file)
+
+
+def _index_file(task: tuple) -> dict:
+    path, mtime_ns, size, known_digest = task
+    row = {'path': path, 'mtime_ns': mtime_ns, 'size': size, 'sha256': None, 'status': 'indexed',
+           'indexed_at': time()}
+    try:
+        row['sha256'] = sha256_file(path)
+        if row['sha256'] == known_digest:
+            # Touched only, the catalog row is kept with the new modification time and size
+            return dict(row, status='touched')
+        parser = ParseH2K(path, _worker_state['schema_file'], **_worker_state['parse_options'])
+        row.update(extract_attributes(parser))
+    except Exception as error:
+        row.update(status='failed', error=f"{type(error).__name__}: {error}")
+    return row
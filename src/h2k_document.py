@@ -0,0 +1,120 @@
+from collections.abc import Mapping
+
+XSI_NAMESPACE = 'http://www.w3.org/2001/XMLSchema-instance'
+
+
+class ElementDecoder:
+    """Decode single elements of an H2K document with xmlschema, collecting the validation errors."""
+
+    def __init__(self, validation: str = 'lax', on_errors=None, **decode_kwargs) -> None:
+        self.validation = validation
+        self.on_errors = on_errors
+        self.decode_kwargs = decode_kwargs
+
+    def _decode(self, xsd_component, source):
+        if self.validation == 'skip':
+            return xsd_component.decode(source, validation='skip', **self.decode_kwargs)
+        value, errors = xsd_component.decode(
+            source, validation='lax', **self.decode_kwargs)
+        if errors and self.on_errors is not None:
+            self.on_errors(errors)
+        return value
+
+    @staticmethod
+    def namespaces(xsd_element, resource) -> list:
+        # Namespace declarations that to_dict() reports on the root element: those declared anywhere in the
+        # document for a namespace of the schema or for XSI
+        xsd_namespaces = set(xsd_element.namespaces.values())
+        return [(f"@xmlns:{prefix}" if prefix else '@xmlns', uri) for prefix, uri in resource.get_namespaces().items()
+                if uri in xsd_namespaces or uri == XSI_NAMESPACE]
+
+    def attributes(self, xsd_element, element) -> list:
+        if not element.attrib and not xsd_element.attributes:
+            return []
+        return [(f"@{name}", value) for name, value in self._decode(xsd_element.attributes, element.attrib)]
+
+    def element(self, xsd_element, element):
+        if xsd_element is None:
+            # Unknown elements are kept as text, the schema validation of the parent reports them
+            return element.text
+        return self._decode(xsd_element, element)
+
+
+class LazyElement(Mapping):
+    """Read-only mapping with the same shape as xmlschema's to_dict() for one element.
+
+    The children listed in skip, or all the children when lazy is set, are only decoded when they are
+    first accessed and then memoized. Children listed in containers are wrapped in a LazyElement too.
+    namespaces are the (key, uri) declarations of the root element, from ElementDecoder.namespaces().
+
+    The element itself is not kept: only the subtrees of the pending children are, and each one is
+    dropped as soon as it is decoded, so the parsed tree shrinks as the document is read.
+    """
+
+    def __init__(self, element, xsd_element, decoder: ElementDecoder, skip=frozenset(), containers=frozenset(),
+                 lazy: bool = False, path: str = '', namespaces=()) -> None:
+        self._xsd_element = xsd_element
+        self._decoder = decoder
+        self._skip = skip
+        self._containers = containers
+        self._lazy = lazy
+        self._data = dict(namespaces)
+        self._data.update(decoder.attributes(xsd_element, element))
+        self._pending = {}
+
+        children = {}
+        for child in element:
+            children.setdefault(child.tag, []).append(child)
+
+        single_group = xsd_element.type.model_group.is_single()
+        for tag, elements in children.items():
+            child_path = f"{path}/{tag}" if path else tag
+            xsd_child = xsd_element.find(tag)
+            single = len(elements) == 1 and (
+                xsd_child is None or single_group and xsd_child.is_single())
+            container = single and xsd_child is not None and (
+                child_path in containers or any(p.startswith(child_path + '/') for p in skip))
+            entry = (xsd_child, elements, single, container, child_path)
+            if lazy or child_path in skip:
+                self._pending[tag] = entry
+                self._data[tag] = None
+            else:
+                self._data[tag] = self._decode_children(*entry)
+
+    def _decode_children(self, xsd_child, elements: list, single: bool, container: bool, path: str):
+        if container:
+            return LazyElement(elements[0], xsd_child, self._decoder, self._skip, self._containers, self._lazy, path)
+        if single:
+            return self._decoder.element(xsd_child, elements[0])
+        return [self._decoder.element(xsd_child, elem) for elem in elements]
+
+    def __getitem__(self, key):
+        pending = self._pending.get(key)
+        if pending is not None:
+            self._data[key] = self._decode_children(*pending)
+            del self._pending[key]
+        return self._data[key]
+
+    def __contains__(self, key) -> bool:
+        # Membership tests do not decode pending children
+        return key in self._data
+
+    def __iter__(self):
+        return iter(self._data)
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def __repr__(self) -> str:
+        return f"LazyElement({self._xsd_element.name!r}, pending={sorted(self._pending)})"
+
+    @property
+    def pending(self) -> list:
+        return list(self._pending)
+
+
+def materialize(value):
+    # Decode any pending section and return plain dicts and lists, as to_dict() would
+    if isinstance(value, LazyElement):
+        return {key: materialize(value[key]) for key in value}
+    return value
@@ -0,0 +1,113 @@
+import numpy
+
+from h2k_records import LIST_SEPARATOR
+
+# Unit conversions of the HPXML workflow arguments
+M2_TO_FT2 = 10.764
+MM2_TO_M2 = 1e-6
+# HOT2000 facing direction codes start from South (code = 1) and progress by 45 degrees counter-clockwise
+N_DIRECTIONS = 8
+
+
+def m2_to_ft2(area):
+    return numpy.asarray(area, dtype=float) * M2_TO_FT2
+
+
+def mm2_to_m2(area):
+    return numpy.asarray(area, dtype=float) * MM2_TO_M2
+
+
+def group_sum(values, house=None, n_houses: int = None):
+    # Sum of the values of one house, or of each house of a batch where house is the house key of each
+    # value, as an array of n_houses sums
+    values = numpy.asarray(values, dtype=float)
+    if house is None:
+        return values.sum()
+    return numpy.bincount(house, weights=values, minlength=n_houses or 0)
+
+
+def ua(area, r_value, house=None, n_houses: int = None):
+    # Sum of area / R
+    return group_sum(numpy.asarray(area, dtype=float) / numpy.asarray(r_value, dtype=float), house, n_houses)
+
+
+def effective_r(area, r_value, house=None, n_houses: int = None):
+    # Area-weighted (parallel path) R of the components, area / sum(area / R), NaN without components
+    with numpy.errstate(divide='ignore', invalid='ignore'):
+        return group_sum(area, house, n_houses) / ua(area, r_value, house, n_houses)
+
+
+def direction_areas(area, direction_code, house=None, n_houses: int = None):
+    # Area facing each direction, the column i is the direction code i + 1. One house returns an array of
+    # N_DIRECTIONS areas, a batch an array of shape (n_houses, N_DIRECTIONS).
+    direction = numpy.asarray(direction_code).astype(numpy.int64) - 1
+    if ((direction < 0) | (direction >= N_DIRECTIONS)).any():
+        raise ValueError(f"Facing direction codes must be between 1 and {N_DIRECTIONS}")
+    area = numpy.asarray(area, dtype=float)
+    if house is None:
+        return numpy.bincount(direction, weights=area, minlength=N_DIRECTIONS)
+    bins = numpy.asarray(house) * N_DIRECTIONS + direction
+    return numpy.bincount(bins, weights=area, minlength=(n_houses or 0) * N_DIRECTIONS).reshape(-1, N_DIRECTIONS)
+
+
+def composite_sections(column) -> tuple:
+    # Sections of the composite lists of a basement column, as (row of each section, values). The column
+    # holds lists (records) or strings of values separated by LIST_SEPARATOR (component tables).
+    rows, values = [], []
+    for row, sections in enumerate(column):
+        if isinstance(sections, str):
+            sections = sections.split(LIST_SEPARATOR) if sections else []
+        rows.extend([row] * len(sections))
+        values.extend(sections)
+    return numpy.asarray(rows, dtype=numpy.int64), numpy.asarray(values, dtype=float)
+
+
+def composite_rsi(rsi_column, percentage_column):
+    # Effective RSI of the composite insulation of each basement, 100 / sum(percentage / RSI) of its
+    # sections, NaN for the basements without sections
+    rows, rsi = composite_sections(rsi_column)
+    _, percentage = composite_sections(percentage_column)
+    return effective_r(percentage, rsi, rows, len(rsi_column))
+
+
+def envelope_summary(tables: dict, n_houses: int = None) -> dict:
+    # Envelope of one house or of a batch of houses from their component tables (h2k_tables.house_tables
+    # or read_table), in SI units. Returns the area (m2), UA (W/K) and effective RSI of each component type,
+    # the window area per facing direction and the composite RSI of the basement walls. With n_houses
+    # each value is an array indexed by the house key, otherwise a scalar for the single house.
+    house = (lambda table: table['house']) if n_houses is not None else (lambda table: None)
+    summary = {}
+
+    def add(component: str, area, r_value, table) -> None:
+        summary[f"{component}_area"] = group_sum(area, house(table), n_houses)
+        summary[f"{component}_ua"] = ua(area, r_value, house(table), n_houses)
+        summary[f"{component}_rsi"] = effective_r(area, r_value, house(table), n_houses)
+
+    for component in ('walls', 'headers'):
+        if component in tables:
+            table = tables[component]
+            add(component, table['height'] * table['perimeter'], table['rValue'], table)
+    for component in ('ceilings', 'floors'):
+        if component in tables:
+            table = tables[component]
+            add(component, table['area'], table['rValue'], table)
+    if 'doors' in tables:
+        table = tables['doors']
+        add('doors', table['height'] * table['width'], table['rValue'], table)
+    if 'windows' in tables:
+        table = tables['windows']
+        # HOT2000 uses millimetres for the window dimensions
+        area = mm2_to_m2(table['height'] * table['width'])
+        add('windows', area, table['rValue'], table)
+        summary['windows_area_by_direction'] = direction_areas(area, table['facingDirectionCode'], house(table),
+                                                               n_houses)
+    if 'basements' in tables:
+        table = tables['basements']
+        wall_area = table['flrPerim'] * table['wallHeight']
+        for side in ('Int', 'Ext'):
+            rsi = composite_rsi(table[f"wall{side}InsCompositeRSI"], table[f"wall{side}InsCompositePercentage"])
+            insulated = ~numpy.isnan(rsi)
+            summary[f"basement_walls_{side.lower()}_rsi"] = effective_r(
+                wall_area[insulated], rsi[insulated], None if n_houses is None else table['house'][insulated],
+                n_houses)
+    return summary
@@ -0,0 +1,93 @@
+class Component:
+    """One component of House/Components with its parent component and its children.
+
+    Components link to each other both ways, so they compare and hash by identity.
+    """
+
+    __slots__ = ('id', 'type', 'record', 'parent', 'children')
+
+    def __init__(self, id: int, type: str, record: dict, parent: 'Component', children: list) -> None:
+        self.id = id
+        self.type = type
+        self.record = record
+        self.parent = parent
+        self.children = children
+
+    def __repr__(self) -> str:
+        return f"Component(id={self.id!r}, type={self.type!r})"
+
+
+class ComponentIndex:
+    """Index of the components of House/Components, e.g. the walls and the windows, doors and floor
+    headers they hold.
+
+    Each section of House/Components (all the walls, all the basements, ...) is walked once, the first
+    time one of its components is requested, so a lazy parse only decodes the sections that are read.
+    """
+
+    def __init__(self, components) -> None:
+        self._components = components if components is not None else {}
+        # Components of each walked section keyed by (type, parent type) and by (type, None)
+        self._sections = {}
+        self._ids = {}
+
+    def _section(self, section: str) -> dict:
+        by_type = self._sections.get(section)
+        if by_type is None:
+            by_type = {}
+            records = self._components[section] if section in self._components else None
+            self._walk(section, records, None, by_type)
+            self._sections[section] = by_type
+        return by_type
+
+    def _walk(self, component_type: str, records, parent: Component, by_type: dict) -> None:
+        if not isinstance(records, list):
+            records = [records]
+        for record in records:
+            if not isinstance(record, dict):
+                continue
+            component = Component(record.get('@id'), component_type, record, parent, [])
+            if parent is not None:
+                parent.children.append(component)
+            # Component ids are unique within an H2K file
+            if component.id is not None:
+                self._ids[component.id] = component
+            by_type.setdefault((component_type, None), []).append(component)
+            if parent is not None:
+                by_type.setdefault((component_type, parent.type), []).append(component)
+
+            children = record.get('Components')
+            if isinstance(children, dict):
+                for child_type, child_records in children.items():
+                    if not child_type.startswith('@'):
+                        self._walk(child_type, child_records, component, by_type)
+
+    def _walk_all(self) -> None:
+        for section in self._components:
+            if not section.startswith('@'):
+                self._section(section)
+
+    def of_type(self, component_type: str, parent_type: str = None, section: str = None) -> list:
+        # Components of a type in document order, optionally only those held by a parent of parent_type
+        # and those of one section of House/Components, e.g. of_type('Window', 'Door', section='Basement')
+        if section is not None:
+            return self._section(section).get((component_type, parent_type), [])
+        self._walk_all()
+        return [component for by_type in self._sections.values()
+                for component in by_type.get((component_type, parent_type), [])]
+
+    def children(self, component: Component, component_type: str = None) -> list:
+        return [child for child in component.children if component_type is None or child.type == component_type]
+
+    def __getitem__(self, component_id) -> Component:
+        if component_id not in self._ids:
+            self._walk_all()
+        return self._ids[component_id]
+
+    def __contains__(self, component_id) -> bool:
+        self._walk_all()
+        return component_id in self._ids
+
+    def __len__(self) -> int:
+        self._walk_all()
+        return len(self._ids)
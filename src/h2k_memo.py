@@ -0,0 +1,59 @@
+from collections.abc import Mapping
+from functools import wraps
+from types import MappingProxyType
+
+from h2k_records import Record
+
+
+class FrozenList(tuple):
+    # Read-only list of a frozen value, thawed back to a list
+    __slots__ = ()
+
+
+def freeze(value):
+    # Read-only copy of a getter result: dicts become mapping proxies and lists become FrozenLists
+    if isinstance(value, Record):
+        return type(value)(*(freeze(val) for val in value.values()))
+    if isinstance(value, Mapping):
+        return MappingProxyType({key: freeze(val) for key, val in value.items()})
+    if isinstance(value, list):
+        return FrozenList(freeze(val) for val in value)
+    if isinstance(value, tuple):
+        return tuple(freeze(val) for val in value)
+    return value
+
+
+def thaw(value):
+    # Plain copy of a frozen value with the types of the getter result: dicts, lists, tuples and records
+    if isinstance(value, Record):
+        return type(value)(*(thaw(val) for val in value.values()))
+    if isinstance(value, Mapping):
+        return {key: thaw(val) for key, val in value.items()}
+    if isinstance(value, FrozenList):
+        return [thaw(val) for val in value]
+    if isinstance(value, tuple):
+        return tuple(thaw(val) for val in value)
+    return value
+
+
+def memoized(getter):
+    """Cache the result of a ParseH2K getter per instance until ParseH2K.invalidate() is called.
+
+    The cached result is frozen and each call returns a plain copy of it (dicts, lists and records as
+    the getter built them), so callers can modify or pickle the value without changing the cache.
+    """
+    name = getter.__name__
+
+    @wraps(getter)
+    def wrapper(self):
+        cache = self._getter_cache
+        if name in cache:
+            self.cache_hits += 1
+            return thaw(cache[name])
+        self.cache_misses += 1
+        value = getter(self)
+        cache[name] = freeze(value)
+        return value
+
+    wrapper.memoized = True
+    return wrapper
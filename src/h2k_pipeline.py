@@ -0,0 +1,205 @@
+import json
+import os
+import os.path
+import queue
+import threading
+
+from h2k_sniffer import SniffH2K, iter_h2k_files
+from h2kparser import ParseH2K
+from hpxml_builder import BuildHPXML, HouseSpec
+
+
+class PipelineItem:
+    """One house flowing through an H2KPipeline.
+
+    Each stage fills a field and the next stages drop what they no longer need, so an item only holds
+    the decoded H2K file between parse and extract, which replaces it with a compact spec. An item that
+    fails keeps its error and the name of the stage, and is passed through the remaining stages untouched.
+    """
+
+    __slots__ = ('path', 'header', 'parser', 'spec', 'workflow', 'output', 'error', 'stage')
+
+    def __init__(self, path: str) -> None:
+        self.path = path
+        self.header = None
+        self.parser = None
+        self.spec = None
+        self.workflow = None
+        self.output = None
+        self.error = None
+        self.stage = None
+
+    def __repr__(self) -> str:
+        status = 'failed' if self.error else 'ok'
+        return f"PipelineItem({self.path!r}, stage={self.stage!r}, {status})"
+
+
+def stage(func):
+    # Turn a function applied to one item into a pipeline stage, a generator over the items. Exceptions
+    # are stored in the item and the items that already failed are passed through.
+    def run(items):
+        for item in items:
+            if item.error is None:
+                try:
+                    func(item)
+                except Exception as error:
+                    item.error = f"{type(error).__name__}: {error}"
+                item.stage = func.__name__
+            yield item
+
+    run.__name__ = func.__name__
+    return run
+
+
+def discover(root: str):
+    # Source of the pipeline: the H2K files under root, one item per file
+    for path in iter_h2k_files(root):
+        yield PipelineItem(path)
+
+
+def sniff():
+    @stage
+    def sniff(item: PipelineItem) -> None:
+        header = SniffH2K(item.path)
+        item.header = {'version': header.get_version(), 'file_id': header.get_file_id()}
+
+    return sniff
+
+
+def parse(schema_file=None, **parse_options):
+    # parse_options are passed to ParseH2K
+    @stage
+    def parse(item: PipelineItem) -> None:
+        item.parser = ParseH2K(item.path, schema_file, **parse_options)
+
+    return parse
+
+
+def extract(extractor=HouseSpec.from_parser):
+    # Replace the parser by what the build stage needs, a HouseSpec by default, the decoded file is freed
+    @stage
+    def extract(item: PipelineItem) -> None:
+        item.spec = extractor(item.parser)
+        item.parser = None
+
+    return extract
+
+
+def build(path_to_hpxml_template):
+    # The template is loaded once and copied for each house
+    template_dict = path_to_hpxml_template if isinstance(path_to_hpxml_template, dict) \
+        else BuildHPXML._read_json(path_to_hpxml_template)
+
+    @stage
+    def build(item: PipelineItem) -> None:
+        builder = BuildHPXML(template_dict, item.spec)
+        item.spec = None
+        builder.update_steps()
+        item.workflow = builder.template_dict
+
+    return build
+
+
+def write(output_dir: str):
+    # One workflow JSON per house, named after the H2K file
+    os.makedirs(output_dir, exist_ok=True)
+
+    @stage
+    def write(item: PipelineItem) -> None:
+        output = os.path.join(output_dir, os.path.splitext(os.path.basename(item.path))[0] + '.json')
+        with open(output, 'w') as json_file:
+            json.dump(item.workflow, json_file, indent=2, default=BuildHPXML._json_default)
+        item.workflow = None
+        item.output = output
+
+    return write
+
+
+_END = object()
+
+
+def bounded(pipeline_stage, maxsize: int = 16):
+    # Run the upstream items and the stage in a background thread and hand the items over through a
+    # queue of maxsize items: the stage blocks when the consumer falls behind (backpressure), and the
+    # consumer overlaps its work with the stage, e.g. writing files while the next house is parsed.
+    def run(items):
+        handoff = queue.Queue(maxsize)
+        failure = []
+        stopped = threading.Event()
+
+        def produce():
+            try:
+                for item in pipeline_stage(items):
+                    while not stopped.is_set():
+                        try:
+                            handoff.put(item, timeout=0.1)
+                            break
+                        except queue.Full:
+                            continue
+                    if stopped.is_set():
+                        return
+            except BaseException as error:
+                failure.append(error)
+            finally:
+                # The consumer may have stopped reading, the end marker must not block the thread
+                while not stopped.is_set():
+                    try:
+                        handoff.put(_END, timeout=0.1)
+                        break
+                    except queue.Full:
+                        continue
+
+        thread = threading.Thread(target=produce, name=f"bounded-{pipeline_stage.__name__}", daemon=True)
+        thread.start()
+        try:
+            while True:
+                item = handoff.get()
+                if item is _END:
+                    break
+                yield item
+        finally:
+            stopped.set()
+            thread.join()
+        if failure:
+            raise failure[0]
+
+    run.__name__ = pipeline_stage.__name__
+    return run
+
+
+class H2KPipeline:
+    """Streaming pipeline of stages over the H2K files of a batch.
+
+    The source yields items and each stage is a generator over the items of the previous one, so
+    houses are pulled one at a time through discover -> sniff -> parse -> extract -> build -> write and
+    the memory used does not depend on the number of houses. Stages can be replaced, removed or added,
+    any callable taking and returning an iterable of PipelineItem is a stage. Wrap a stage in bounded()
+    to run it in a background thread with a bounded queue.
+    """
+
+    def __init__(self, source, *stages) -> None:
+        self.source = source
+        self.stages = list(stages)
+
+    @classmethod
+    def to_workflows(cls, root: str, path_to_hpxml_template, path_to_h2k_schema, output_dir: str,
+                     **parse_options) -> 'H2KPipeline':
+        # Default pipeline writing the HPXML workflow of each H2K file under root to output_dir
+        return cls(discover(root), sniff(), parse(path_to_h2k_schema, **parse_options), extract(),
+                   build(path_to_hpxml_template), write(output_dir))
+
+    def __iter__(self):
+        items = self.source
+        for pipeline_stage in self.stages:
+            items = pipeline_stage(items)
+        return iter(items)
+
+    def run(self) -> dict:
+        # Drain the pipeline, returns the number of houses done and the number failed at each stage
+        summary = {'done': 0, 'failed': {}}
+        for item in self:
+            if item.error is None:
+                summary['done'] += 1
+            else:
+                summary['failed'][item.stage] = summary['failed'].get(item.stage, 0) + 1
+        return summary
@@ -0,0 +1,112 @@
+from collections.abc import Mapping
+
+
+class Record(Mapping):
+    """Read-only component record stored in __slots__, with the same keys as the former getter dicts.
+
+    Values are read as attributes (record.frameAreaFraction) or with the dict keys
+    (record['@frameAreaFraction']). Records compare equal to dicts with the same items.
+    """
+
+    __slots__ = ()
+    # Dict keys of the record, the slots are the same names without '@' and with '.' replaced by '_'
+    KEYS = ()
+    _SLOTS = {}
+
+    def __init__(self, *values) -> None:
+        if len(values) != len(self.__slots__):
+            raise TypeError(f"{type(self).__name__} takes {len(self.__slots__)} values, not {len(values)}")
+        for slot, value in zip(self.__slots__, values):
+            object.__setattr__(self, slot, value)
+
+    @classmethod
+    def from_dict(cls, values: dict) -> 'Record':
+        return cls(*(values[key] for key in cls.KEYS))
+
+    def __setattr__(self, name: str, value) -> None:
+        raise AttributeError(f"{type(self).__name__} is read-only")
+
+    def __getitem__(self, key):
+        slot = self._SLOTS.get(key)
+        if slot is None:
+            raise KeyError(key)
+        return getattr(self, slot)
+
+    def __iter__(self):
+        return iter(self.KEYS)
+
+    def __len__(self) -> int:
+        return len(self.KEYS)
+
+    def __reduce__(self):
+        return type(self), tuple(getattr(self, slot) for slot in self.__slots__)
+
+    def __repr__(self) -> str:
+        values = ', '.join(f"{slot}={getattr(self, slot)!r}" for slot in self.__slots__)
+        return f"{type(self).__name__}({values})"
+
+    def _asdict(self) -> dict:
+        return {key: self[key] for key in self.KEYS}
+
+
+def record_type(name: str, keys) -> type:
+    # Create a Record subclass holding the given dict keys, duplicated keys are only stored once
+    keys = tuple(dict.fromkeys(keys))
+    slots = tuple(key.replace('@', '').replace('.', '_') for key in keys)
+    if len(set(slots)) != len(slots):
+        raise ValueError(f"keys of {name} map to the same attribute names")
+    return type(name, (Record,), {'__slots__': slots, 'KEYS': keys, '_SLOTS': dict(zip(keys, slots)),
+                                  '__module__': __name__})
+
+
+PARENT_KEYS = ('parent_type', 'parent_id', 'parent_label')
+# Separator of the values of composite sections flattened to strings, e.g. in the component tables
+LIST_SEPARATOR = ';'
+
+WindowRecord = record_type('WindowRecord', PARENT_KEYS + (
+    '@id', 'Label', '@number', '@er', '@shgc', '@frameHeight', '@frameAreaFraction', '@edgeOfGlassFraction',
+    '@centreOfGlassFraction', '@energyStar', '@rValue', '@idref', '@height', '@width', '@headerHeight',
+    '@overhangWidth', 'tiltValue', 'tiltCode', 'tiltText', '@curtain', '@shutterRValue', 'facingDirection',
+    'facingDirectionCode'))
+
+DoorRecord = record_type('DoorRecord', PARENT_KEYS + (
+    '@id', 'Label', '@rValue', 'energystar', 'type', '@height', '@width'))
+
+HeaderRecord = record_type('HeaderRecord', PARENT_KEYS + (
+    '@id', 'Label', '@nominalInsulation', '@rValue', '@idref', '@height', '@perimeter'))
+
+WallRecord = record_type('WallRecord', (
+    '@id', 'Label', '@adjacentEnclosedSpace', '@corners', '@intersections', '@nominalInsulation', '@rValue',
+    '@idref', '@height', '@perimeter', 'facingDirection', 'facingDirectionCode'))
+
+CeilingRecord = record_type('CeilingRecord', (
+    '@id', 'Label', 'type', '@idref', '@nominalInsulation', '@rValue', '@area', '@heelHeight', '@length',
+    'slopeCode', 'slopeValue'))
+
+FloorRecord = record_type('FloorRecord', (
+    '@id', 'Label', '@idref', '@nominalInsulation', '@rValue', '@area', '@length'))
+
+BasementRecord = record_type('BasementRecord', (
+    '@id', 'Label', '@isExposedSurface', '@exposedSurfacePerimeter', '@type', '@subtype', '@overlap',
+    'openUpStrsCode', 'openUpStrsArea', 'roomTypeCode', 'roomType', 'flrIsBelowFrost', 'flrHasIntFoot',
+    'flrHeated', 'flrAddRSI', 'flrAddNomRSI', 'flrAbvRSI', 'flrAbvNomRSI', 'flrIsRect', 'wallHasPony',
+    'wallCorners', 'wallIntInsNom', 'wallIntInsCompositeRSI', 'wallIntInsCompositePercentage', 'wallExtInsNom',
+    'wallExtInsCompositeRSI', 'wallExtInsCompositePercentage', 'wallHeight', 'wallDepth', 'wallPonyHeight',
+    'flrLength', 'flrWidth', 'flrArea', 'flrPerim', 'ponyInsNom', 'ponyInsRSI'))
+
+HRV_KEYS = (
+    '@supplyFlowrate', '@exhaustFlowrate', '@fanPower1', '@fanPower2', '@isDefaultFanpower', '@isEnergyStar',
+    '@isHomeVentilatingInstituteCertified', '@isSupplemental', '@temperatureCondition1', '@temperatureCondition2',
+    '@lowTempVentReduction', '@efficiency1', '@efficiency2', '@preheaterCapacity', '@lowTempVentReduction',
+    '@coolingEfficiency')
+HRV_DUCT_KEYS = ('@length', '@diameter', '@insulation', 'seal', 'sealcode', 'type', 'typecode')
+
+HrvRecord = record_type('HrvRecord', HRV_KEYS + tuple(
+    f"{duct}_{key}" for duct in ('supply', 'exhaust') for key in HRV_DUCT_KEYS))
+
+HotWaterRecord = record_type('HotWaterRecord', (
+    '@id', 'Label', 'systemtype', 'energysource', 'tanktype', 'tankvolume', 'energyfactor', 'tanklocation'))
+
+DrainWaterHeatRecoveryRecord = record_type('DrainWaterHeatRecoveryRecord', (
+    'parent_id', 'parent_label', 'parent_type', '@dailyShowers', '@effectivenessAt9.5', '@preheatShowerTank',
+    '@showerLength', 'Efficiency', 'ShowerTemperature', 'ShowerHead'))
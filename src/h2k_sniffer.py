@@ -0,0 +1,93 @@
+from decimal import Decimal
+import os
+from xml.parsers import expat
+
+
+class _EndOfHeader(Exception):
+    pass
+
+
+class SniffH2K:
+    """Read the header of an H2K file without the schema.
+
+    The file is parsed incrementally and only up to the end of ProgramInformation, which comes before
+    the House section. The getters return the same values and types as the ParseH2K getters.
+    """
+
+    # Elements read from the header, keyed by their path from the document root
+    HEADER_PATHS = {
+        'Application/Version': 'version',
+        'ProgramInformation/Weather': 'weather',
+        'ProgramInformation/Weather/Region/English': 'region',
+        'ProgramInformation/Weather/Location/English': 'location',
+        'ProgramInformation/File/Identification': 'file_id',
+    }
+    # The header of an H2K file usually fits in the first two chunks
+    CHUNK_SIZE = 4096
+
+    def __init__(self, h2k_file: str) -> None:
+        self.file = h2k_file
+        self.header = {}
+        self._sniff()
+
+    def __str__(self) -> str:
+        return f"H2K file is {self.file}"
+
+    def _sniff(self) -> None:
+        path = []
+        text = []
+
+        def start_element(tag, attrs):
+            path.append(tag)
+            text.clear()
+            key = self.HEADER_PATHS.get('/'.join(path[1:]))
+            if key in ('version', 'weather'):
+                self.header[key] = attrs
+
+        def end_element(tag):
+            key = self.HEADER_PATHS.get('/'.join(path[1:]))
+            if key in ('region', 'location', 'file_id'):
+                self.header[key] = ''.join(text) or None
+            if path[1:] == ['ProgramInformation']:
+                raise _EndOfHeader
+            path.pop()
+
+        parser = expat.ParserCreate()
+        parser.buffer_text = True
+        parser.StartElementHandler = start_element
+        parser.EndElementHandler = end_element
+        parser.CharacterDataHandler = text.append
+        with open(self.file, 'rb') as h2k:
+            try:
+                for chunk in iter(lambda: h2k.read(self.CHUNK_SIZE), b''):
+                    parser.Parse(chunk, False)
+            except _EndOfHeader:
+                # The rest of the file is never read
+                pass
+
+    def get_version(self) -> dict:
+        version = self.header['version']
+        return {'@major': int(version['major']), '@minor': int(version['minor'])}
+
+    def get_file_id(self) -> str:
+        return self.header['file_id']
+
+    def get_climate_Prov(self) -> str:
+        return self.header['region']
+
+    def get_climate_city(self) -> str:
+        return self.header['location']
+
+    def get_hdd_frostdepth(self) -> dict:
+        weather = self.header['weather']
+        return {'@depthOfFrost': Decimal(weather['depthOfFrost'].strip()),
+                '@heatingDegreeDay': Decimal(weather['heatingDegreeDay'].strip())}
+
+
+def iter_h2k_files(root: str):
+    # Yield the paths of the H2K files under root, the extension is not case sensitive
+    for dir_path, dir_names, file_names in os.walk(root):
+        dir_names.sort()
+        for file_name in sorted(file_names):
+            if file_name.lower().endswith('.h2k'):
+                yield os.path.join(dir_path, file_name)
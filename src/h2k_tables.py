@@ -0,0 +1,273 @@
+import os
+import os.path
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+try:
+    import pyarrow
+    import pyarrow.parquet
+except ImportError:
+    pyarrow = None
+
+from h2k_records import (LIST_SEPARATOR, BasementRecord, CeilingRecord, DoorRecord, FloorRecord, HeaderRecord,
+                         WallRecord, WindowRecord)
+from h2kparser import ParseH2K
+from schema_registry import warm_schema
+from worker_pool import imap
+
+# Component tables: record type, getter and position of the components in the getter result
+TABLES = {
+    'walls': (WallRecord, 'get_walls_spec', None),
+    'windows': (WindowRecord, 'get_windows_spec', None),
+    'doors': (DoorRecord, 'get_doors_spec', 0),
+    'headers': (HeaderRecord, 'get_floor_header', None),
+    'ceilings': (CeilingRecord, 'get_ceiling_spec', 0),
+    'floors': (FloorRecord, 'get_exposed_floor', None),
+    'basements': (BasementRecord, 'get_basement_spec', 0),
+}
+
+# Column types of the record keys, the other keys are decimals stored as float64
+INT_KEYS = {'@id', 'parent_id', '@subtype'}
+BOOL_KEYS = {'@adjacentEnclosedSpace', '@energyStar', 'energystar', '@isExposedSurface', 'flrIsBelowFrost',
+             'flrHasIntFoot', 'flrHeated', 'flrIsRect', 'wallHasPony'}
+STR_KEYS = {'Label', 'parent_type', 'parent_label', '@idref', 'type', '@type', 'facingDirection',
+            'facingDirectionCode', 'tiltCode', 'tiltText', 'slopeCode', 'openUpStrsCode', 'roomTypeCode', 'roomType',
+            '@exposedSurfacePerimeter'}
+# Lists of composite sections, stored as strings of values separated by LIST_SEPARATOR
+LIST_KEYS = {'wallIntInsCompositeRSI', 'wallIntInsCompositePercentage', 'wallExtInsCompositeRSI',
+             'wallExtInsCompositePercentage'}
+
+# Houses table, the house column of the component tables is the row number of the house in it
+HOUSE_COLUMNS = [('house', 'int'), ('path', 'str'), ('file_id', 'str'), ('error', 'str')]
+HOUSE_KEY = ('house', 'int')
+
+# Values of the missing cells
+MISSING = {'int': -1, 'bool': False, 'float': float('nan'), 'str': ''}
+FORMATS = ('numpy', 'parquet')
+
+
+def column_kind(key: str) -> str:
+    if key in INT_KEYS:
+        return 'int'
+    if key in BOOL_KEYS:
+        return 'bool'
+    if key in STR_KEYS or key in LIST_KEYS:
+        return 'str'
+    return 'float'
+
+
+def table_columns(name: str) -> list:
+    # (column, kind) of a component table, named after the record attributes
+    record_type = TABLES[name][0]
+    return [HOUSE_KEY] + [(record_type._SLOTS[key], column_kind(key)) for key in record_type.KEYS]
+
+
+def _cell(key: str, value):
+    # Plain Python value of a record value, Decimal values are sent to the writer as floats
+    if value is None:
+        return MISSING[column_kind(key)]
+    if key in LIST_KEYS:
+        return LIST_SEPARATOR.join(str(item) for item in value)
+    kind = column_kind(key)
+    if kind == 'float':
+        return float(value)
+    if kind == 'str':
+        return str(value)
+    return value
+
+
+def _row(record_type: type, record) -> tuple:
+    return tuple(_cell(key, record[key]) for key in record_type.KEYS)
+
+
+def extract_rows(parser: ParseH2K) -> tuple:
+    # Rows of each component table for one house, without the house column, and the errors of the
+    # getters that failed on this file
+    rows = {}
+    errors = []
+    for name, (record_type, getter, position) in TABLES.items():
+        try:
+            records = getattr(parser, getter)()
+        except (KeyError, TypeError) as error:
+            errors.append(f"{name}: {type(error).__name__}: {error}")
+            continue
+        if position is not None:
+            records = records[position]
+        rows[name] = [_row(record_type, record) for record in records]
+    return rows, errors
+
+
+def _numpy_dtype(columns: list, rows: list) -> list:
+    # Strings are stored with the width of the longest value of the chunk
+    dtype = []
+    for position, (column, kind) in enumerate(columns):
+        if kind == 'str':
+            width = max((len(row[position]) for row in rows), default=0)
+            dtype.append((column, f"U{max(width, 1)}"))
+        else:
+            dtype.append((column, {'int': 'i8', 'bool': '?', 'float': 'f8'}[kind]))
+    return dtype
+
+
+def _common_dtype(chunks: list) -> list:
+    # Each chunk stores its strings with its own width, the table gets the widest of each column
+    return [(column, max((chunk.dtype[column] for chunk in chunks), key=lambda field: field.itemsize))
+            for column in chunks[0].dtype.names]
+
+
+def records_array(name: str, records, house: int = 0):
+    # Structured array of the records of one house, with the columns of the component table name
+    if numpy is None:
+        raise ImportError("records_array requires numpy")
+    record_type = TABLES[name][0]
+    rows = [(house,) + _row(record_type, record) for record in records]
+    return numpy.array(rows, dtype=_numpy_dtype(table_columns(name), rows))
+
+
+def house_tables(parser: ParseH2K, names=None, house: int = 0) -> dict:
+    # Component tables of one house (all the tables or the given names), same arrays as read_table() for
+    # a fleet. The getters that fail on this file raise their error.
+    tables = {}
+    for name in names or TABLES:
+        record_type, getter, position = TABLES[name]
+        records = getattr(parser, getter)()
+        tables[name] = records_array(name, records if position is None else records[position], house)
+    return tables
+
+
+class ComponentTableWriter:
+    """Columnar tables of the components of many houses, one table per component type.
+
+    Rows are buffered and written in chunks of chunk_rows rows, so the memory used does not depend on
+    the number of houses. With the 'numpy' format each chunk is a NumPy structured array saved in
+    output_dir/<table>/part-NNNNN.npy, read back with read_table(). With the 'parquet' format (requires
+    pyarrow) each table is a Parquet file with a row group per chunk. The houses table maps the house
+    column of the component tables to the H2K files.
+    """
+
+    def __init__(self, output_dir: str, format: str = None, chunk_rows: int = 100000) -> None:
+        if numpy is None:
+            raise ImportError("ComponentTableWriter requires numpy")
+        if format is None:
+            format = 'numpy' if pyarrow is None else 'parquet'
+        if format not in FORMATS:
+            raise ValueError(f"format must be one of {FORMATS}, not {format!r}")
+        if format == 'parquet' and pyarrow is None:
+            raise ImportError("format='parquet' requires pyarrow")
+        self.output_dir = output_dir
+        self.format = format
+        self.chunk_rows = chunk_rows
+        self.columns = {name: table_columns(name) for name in TABLES}
+        self.columns['houses'] = HOUSE_COLUMNS
+        self.rows = {name: [] for name in self.columns}
+        self.n_rows = {name: 0 for name in self.columns}
+        self.n_chunks = {name: 0 for name in self.columns}
+        self._parquet_writers = {}
+        os.makedirs(output_dir, exist_ok=True)
+
+    def add_house(self, path: str, file_id: str, rows: dict, errors: list = ()) -> int:
+        # Add the component rows of a house, returns its house key
+        house = self.n_rows['houses'] + len(self.rows['houses'])
+        self._append('houses', (house, path, file_id or '', '\n'.join(errors)))
+        for name, table_rows in rows.items():
+            for row in table_rows:
+                self._append(name, (house,) + row)
+        return house
+
+    def _append(self, name: str, row: tuple) -> None:
+        self.rows[name].append(row)
+        if len(self.rows[name]) >= self.chunk_rows:
+            self.flush(name)
+
+    def flush(self, name: str) -> None:
+        rows = self.rows[name]
+        if not rows:
+            return
+        chunk = numpy.array(rows, dtype=_numpy_dtype(self.columns[name], rows))
+        if self.format == 'numpy':
+            table_dir = os.path.join(self.output_dir, name)
+            os.makedirs(table_dir, exist_ok=True)
+            numpy.save(os.path.join(table_dir, f"part-{self.n_chunks[name]:05d}.npy"), chunk)
+        else:
+            self._write_parquet(name, chunk)
+        self.n_rows[name] += len(rows)
+        self.n_chunks[name] += 1
+        self.rows[name] = []
+
+    def _write_parquet(self, name: str, chunk) -> None:
+        table = pyarrow.table({column: chunk[column] for column, _ in self.columns[name]})
+        writer = self._parquet_writers.get(name)
+        if writer is None:
+            writer = pyarrow.parquet.ParquetWriter(os.path.join(self.output_dir, f"{name}.parquet"), table.schema)
+            self._parquet_writers[name] = writer
+        writer.write_table(table.cast(writer.schema))
+
+    def close(self) -> dict:
+        # Write the last chunks, returns the number of rows of each table
+        for name in self.columns:
+            self.flush(name)
+        for writer in self._parquet_writers.values():
+            writer.close()
+        self._parquet_writers = {}
+        return dict(self.n_rows)
+
+    def __enter__(self) -> 'ComponentTableWriter':
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+
+def export_component_tables(h2k_files, output_dir: str, schema_file=None, workers: int = None, format: str = None,
+                            chunk_rows: int = 100000, **parse_options) -> dict:
+    # Parse the H2K files in a pool of worker processes and write the component tables of all the houses
+    # to output_dir, returns the number of rows of each table. A file that fails to parse is kept in the
+    # houses table with its error and no components. parse_options are passed to ParseH2K.
+    with ComponentTableWriter(output_dir, format, chunk_rows) as writer:
+        for path, file_id, rows, errors in imap(_extract_house, h2k_files, workers, initializer=_init_worker,
+                                                initargs=(schema_file, parse_options), ordered=False):
+            writer.add_house(path, file_id, rows, errors)
+    return dict(writer.n_rows)
+
+
+def read_table(output_dir: str, name: str):
+    # Component or houses table as a single structured array (numpy format) or pyarrow Table (parquet)
+    parquet_path = os.path.join(output_dir, f"{name}.parquet")
+    if os.path.exists(parquet_path):
+        if pyarrow is None:
+            raise ImportError("Reading Parquet tables requires pyarrow")
+        return pyarrow.parquet.read_table(parquet_path)
+    if numpy is None:
+        raise ImportError("Reading NumPy tables requires numpy")
+    table_dir = os.path.join(output_dir, name)
+    parts = sorted(os.listdir(table_dir)) if os.path.isdir(table_dir) else []
+    chunks = [numpy.load(os.path.join(table_dir, part)) for part in parts if part.endswith('.npy')]
+    if not chunks:
+        columns = HOUSE_COLUMNS if name == 'houses' else table_columns(name)
+        return numpy.zeros(0, dtype=_numpy_dtype(columns, []))
+    # Structured arrays with different field dtypes are not promoted by concatenate before NumPy 1.23
+    dtype = _common_dtype(chunks)
+    return numpy.concatenate([chunk.astype(dtype, copy=False) for chunk in chunks])
+
+
+# Schema and parser options of the current worker process of export_component_tables
+_worker_state = {}
+
+
+def _init_worker(schema_file, parse_options: dict) -> None:
+    _worker_state.update(schema_file=schema_file, parse_options=parse_options)
+    if parse_options.get('backend', 'xmlschema') == 'xmlschema':
+        warm_schema(schema_file)
+
+
+def _extract_house(path: str) -> tuple:
+    try:
+        parser = ParseH2K(path, _worker_state['schema_file'], **_worker_state['parse_options'])
+        file_id = parser.get_file_id()
+        rows, errors = extract_rows(parser)
+    except Exception as error:
+        return path, None, {}, [f"{type(error).__name__}: {error}"]
+    return path, file_id, rows, errors
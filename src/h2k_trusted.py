@@ -0,0 +1,190 @@
+from decimal import Decimal, InvalidOperation
+from xml.etree import ElementTree
+
+# Decoding tables of the trusted backend. They were derived from the H2K schemas of schemas/h2k and
+# tests/schema so that files are decoded to the same dict as xmlschema's to_dict(), without the XSD.
+# Attributes not listed below are decimals.
+INTEGER_ATTRIBUTES = frozenset([
+    'bathrooms', 'bedrooms', 'condensing', 'connectedUnitsDwhr', 'dwellingUnits',
+    'energySaverAirSourceHeatPump', 'energySaverHeatingSystems', 'energyStarInstantaneous',
+    'energyStarInstantaneousCondensing', 'epaCsaHeatingSystems', 'equipment', 'highEfficiency',
+    'hviHrvErvInMurb', 'id', 'identicalSystems', 'instantaneous', 'living', 'lowEfficiency',
+    'lowFlushToilets', 'major', 'minor', 'numberOfElectronicThermostats', 'numberOfEnergyStarUnits',
+    'numberOfOpenings', 'numberOfSystems', 'occupants', 'otherHabitable', 'priority', 'rank',
+    'standbyHeatLossMode', 'storeysInBuilding', 'studsPerCorner', 'studsPerInteriorWall', 'subtype',
+    'topAndBottomPlates', 'totalCount', 'units', 'unitsVisited', 'utility', 'woodAppliances'])
+
+BOOLEAN_ATTRIBUTES = frozenset([
+    'achCorrection', 'adjacentEnclosedSpace', 'basementUnit', 'calculateSavingsIndividually', 'canCsaC448',
+    'combinedFlue', 'combustionTestEfficiency', 'cooled', 'csaEpa', 'damperClosed', 'defaultRoofCavity',
+    'doubleStudsOnWindows', 'ecoEnergy', 'energyEfficientMotor', 'energyStar', 'energystar', 'epaCsa',
+    'hasCgsbConditions', 'hasDrainWaterHeatRecovery', 'hasEnergyEfficientMotor', 'hasIntegralFooting',
+    'hasPonyWall', 'heated', 'heatedFloor', 'heatingCorrection', 'includeCostCalculations',
+    'includeCrawlspaceVolume', 'installed', 'isBelowFrostline', 'isBiEnergy', 'isCalculated', 'isCgsbTest',
+    'isCop', 'isDefaultFanpower', 'isEnergyStar', 'isExposedSurface', 'isHomeVentilatingInstituteCertified',
+    'isInterior', 'isOccupied', 'isPrimary', 'isRectangular', 'isSpecified', 'isSteadyState',
+    'isSupplemental', 'isUniform', 'isUserSpecified', 'isWood', 'mixed', 'nameplateEfficiency',
+    'over18Months', 'preheatShowerTank', 'readOnly', 'selected', 'separateThermostat', 'simulateBaseHouse',
+    'simulateByCategory', 'simulateUpgradedHouse', 'solarReady', 'twoBlowerDoors', 'useDefaults',
+    'userDefinedPilot', 'withSlab'])
+
+STRING_ATTRIBUTES = frozenset([
+    'build', 'buildingType', 'class', 'code', 'evaluationDate', 'exposedSurfacePerimeter',
+    'heatingCapacityUiUnits', 'houseCode', 'idref', 'library', 'sha256', 'shadingInF280Cooling', 'type',
+    'uiUnits', 'windEnergyContribution', '{http://www.w3.org/XML/1998/namespace}lang'])
+
+MONTHS = ('january', 'february', 'march', 'april', 'may', 'june',
+          'july', 'august', 'september', 'october', 'november', 'december')
+
+# Attributes whose type depends on the element they belong to
+ELEMENT_ATTRIBUTES = {
+    ('Code', 'id'): str,
+    ('Code', 'value'): str,
+    ('Equipment', 'pilotLight'): bool,
+    ('NumberOf', 'nonResUnits'): int,
+}
+ELEMENT_ATTRIBUTES.update(((fuel, month), str) for month in MONTHS
+                          for fuel in ('Electricity', 'NaturalGas', 'Oil', 'Propane', 'Wood'))
+
+# Attributes whose type depends on the grandparent of their element, keyed by (grandparent, tag, name).
+# The corners of the walls of the house (WallConstruction) are decimals, those of foundation walls
+# (FoundationWallConstruction and CrawlspaceWallConstruction) are integers.
+NESTED_ELEMENT_ATTRIBUTES = {(foundation, 'Construction', 'corners'): int
+                             for foundation in ('Basement', 'Crawlspace', 'Walkout')}
+
+# Child elements that are always decoded to a list, keyed by the tag of their parent
+LIST_ELEMENTS = {
+    'AdditionalOpenings': ('Opening',),
+    'AllResults': ('Results',),
+    'Components': ('BaseLoads', 'Basement', 'Ceiling', 'Crawlspace', 'Door', 'Floor', 'FloorHeader',
+                   'Foundation', 'Generation', 'HeatingCooling', 'HotWater', 'NaturalAirInfiltration', 'Room',
+                   'Slab', 'Temperatures', 'Ventilation', 'Walkout', 'Wall', 'Window'),
+    'Composite': ('Section',),
+    'Data': ('DataPoint',),
+    'Electricity': ('Fuel',),
+    'EquipmentInformation': ('Equipment',),
+    'Favorite': ('Code',),
+    'FoundationAttachments': ('Attachment',),
+    'Information': ('Info',),
+    'Layers': ('ContinuousInsulation', 'ContinuousMedium', 'Lintel', 'SteelFraming', 'Strapping', 'Window',
+               'WindowLegacy', 'WoodFraming'),
+    'NaturalGas': ('Fuel',),
+    'Oil': ('Fuel',),
+    'PhotovoltaicSystems': ('System',),
+    'Propane': ('Fuel',),
+    'Standard': ('Code',),
+    'SupplementalVentilatorList': ('BaseVentilator', 'Dryer', 'Hrv'),
+    'SupplementaryHeatingSystems': ('System',),
+    'TestData': ('Test',),
+    'UserDefined': ('Code',),
+    'WholeHouseVentilatorList': ('BaseVentilator', 'Dryer', 'Hrv'),
+    'Wood': ('Fuel',),
+}
+
+# Elements whose content is skipped by the schema (xs:any with processContents="skip"), decoded to None
+SKIPPED_ELEMENTS = frozenset([('Program', 'Options'), ('Program', 'Results')])
+
+# Namespace declarations reported by xmlschema on the root element
+DECLARED_NAMESPACES = ('http://www.w3.org/2001/XMLSchema', 'http://www.w3.org/2001/XMLSchema-instance')
+
+
+def _to_bool(value: str) -> bool:
+    return value.strip() in ('true', '1')
+
+
+class TrustedDecoder:
+    """Decode an H2K file to the same dict as xmlschema's to_dict(), without loading or checking the schema.
+
+    Only use it for files that are known to be valid, e.g. files validated once before.
+    """
+
+    def __init__(self, decimal_type: type = Decimal) -> None:
+        # decimal_type converts the text of the decimal attributes, e.g. float instead of Decimal
+        self.decimal_type = decimal_type
+        self._list_elements = {(parent, child) for parent, children in LIST_ELEMENTS.items() for child in children}
+
+    def attribute(self, tag: str, name: str, value: str, grandparent: str = None):
+        value_type = ELEMENT_ATTRIBUTES.get((tag, name)) or NESTED_ELEMENT_ATTRIBUTES.get((grandparent, tag, name))
+        if value_type is None:
+            if name in STRING_ATTRIBUTES:
+                return value
+            if name in INTEGER_ATTRIBUTES:
+                value_type = int
+            elif name in BOOLEAN_ATTRIBUTES:
+                value_type = bool
+            else:
+                value_type = self.decimal_type
+        if value_type is str:
+            return value
+        if value_type is bool:
+            return _to_bool(value)
+        try:
+            return value_type(value.strip())
+        except (ValueError, InvalidOperation):
+            # Attributes missing from the tables are kept as text
+            return value
+
+    def decode(self, h2k_file) -> dict:
+        namespaces = {}
+        tags = []
+        values = []
+        root = None
+        for event, item in _iter_events(h2k_file):
+            if event == 'start-ns':
+                namespaces.setdefault(*item)
+            elif event == 'start':
+                grandparent = tags[-2] if len(tags) > 1 else None
+                value = {f"@{name}": self.attribute(item.tag, name, attr_value, grandparent)
+                         for name, attr_value in item.attrib.items()}
+                tags.append(item.tag)
+                values.append([value, False])
+            else:
+                tag = tags.pop()
+                value, has_children = values.pop()
+                text = item.text
+                if tags and (tags[-1], tag) in SKIPPED_ELEMENTS:
+                    value = None
+                elif not has_children and text is not None and text.strip():
+                    if value:
+                        value['$'] = text
+                    else:
+                        value = text
+                elif not value:
+                    value = None
+                # The decoded elements are dropped to keep the memory bounded
+                item.clear()
+
+                if not tags:
+                    # Like xmlschema, the namespaces declared anywhere in the file are reported on the root
+                    root = {f"@xmlns:{prefix}" if prefix else '@xmlns': uri
+                            for prefix, uri in namespaces.items() if uri in DECLARED_NAMESPACES}
+                    root.update(value or {})
+                    break
+                parent = values[-1]
+                parent[1] = True
+                self._add_child(parent[0], tags[-1], tag, value)
+        return root
+
+    def _add_child(self, parent: dict, parent_tag: str, tag: str, value) -> None:
+        if tag in parent:
+            existing = parent[tag]
+            if isinstance(existing, list):
+                existing.append(value)
+            else:
+                parent[tag] = [existing, value]
+        elif (parent_tag, tag) in self._list_elements:
+            parent[tag] = [value]
+        else:
+            parent[tag] = value
+
+
+def _iter_events(h2k_file, chunk_size: int = 65536):
+    # Events of ElementTree.iterparse. The file is closed as soon as the decoder stops reading, even
+    # before the end of the document, and no reference cycle is left for the garbage collector
+    parser = ElementTree.XMLPullParser(events=('start-ns', 'start', 'end'))
+    with open(h2k_file, 'rb') as source:
+        for chunk in iter(lambda: source.read(chunk_size), b''):
+            parser.feed(chunk)
+            yield from parser.read_events()
+    parser.close()
+    yield from parser.read_events()
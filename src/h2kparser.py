@@ -1,56 +1,251 @@
 from collections import defaultdict
 from decimal import Decimal
 import sys
-from time import sleep
+from time import perf_counter, sleep
+from typing import NamedTuple
 import xmlschema
 
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+from h2k_cache import resolve_parse_cache
+from h2k_document import ElementDecoder, LazyElement, materialize
+from h2k_index import ComponentIndex
+from h2k_memo import memoized
+from h2k_records import (BasementRecord, CeilingRecord, DoorRecord, DrainWaterHeatRecoveryRecord, FloorRecord,
+                         HeaderRecord, HotWaterRecord, HrvRecord, WallRecord, WindowRecord)
+from h2k_trusted import TrustedDecoder
+from schema_registry import resolve_schema, schema_digest, warm_schema
+from worker_pool import imap
+
+
+class ValidationIssue(NamedTuple):
+    # Schema error of an H2K file, picklable unlike the xmlschema errors so that parsers served from the
+    # parse cache or sent between processes report the same errors as a fresh parse
+    path: str
+    reason: str
+
+    def __str__(self) -> str:
+        return f"{self.path}: {self.reason}"
+
+
+class H2KValidationError(AssertionError):
+    # Subclass of AssertionError to keep the behaviour of the former `assert is_valid(...)` check
+    def __init__(self, h2k_file, errors: list) -> None:
+        super().__init__(f"Not a valid h2k file: {h2k_file} ({len(errors)} errors, first: {errors[0].reason})")
+        self.errors = errors
+
+
+class ParseResult(NamedTuple):
+    # Outcome of one file of ParseH2K.parse_many, parser is None and error is set when the file failed
+    path: str
+    parser: 'ParseH2K'
+    error: str
+    seconds: float
+
 
 class ParseH2K:
-    def __init__(self, h2k_file: str, schema_file: str) -> None:
+    VALIDATION_MODES = ('strict', 'lax', 'skip')
+    BACKENDS = ('xmlschema', 'trusted')
+    NUMERIC_TYPES = ('decimal', 'float', 'numpy')
+    # Version of the decoded h2k_dict, bump it when decoding changes to invalidate the parse cache
+    PARSER_VERSION = 2
+    # Sections of the H2K file that none of the getters read, they are only decoded on demand with prune=True
+    PRUNED_SECTIONS = frozenset(['Codes', 'EnergyUpgrades', 'FuelCosts', 'AllResults', 'Program',
+                                 'House/Labels', 'House/WindowTightness', 'House/Generation'])
+    # With lazy=True the children of these elements are decoded one by one on first access
+    LAZY_CONTAINERS = frozenset(['House', 'House/Components'])
+
+    def __init__(self, h2k_file: str, schema_file=None, validation: str = 'strict', prune: bool = False,
+                 lazy: bool = False, backend: str = 'xmlschema', numeric: str = 'decimal', cache=None) -> None:
+        # schema_file can be a path to the XSD, a compiled xmlschema.XMLSchema or a SchemaRegistry
+        # validation: 'strict' raises H2KValidationError on an invalid file, 'lax' keeps the decoded
+        # data and the errors in self.validation_errors, 'skip' decodes without validating
+        # backend: 'trusted' decodes files known to be valid without loading the schema at all
+        # numeric: type of the decimal values of the whole document, 'decimal' (Decimal), 'float' or
+        # 'numpy' (numpy.float64)
+        # cache: ParseCache or directory of the on-disk cache of decoded files, None uses the
+        # H2K_PARSE_CACHE environment variable and False disables it. Pruned and lazy parses are not cached.
+        if validation not in self.VALIDATION_MODES:
+            raise ValueError(f"validation must be one of {self.VALIDATION_MODES}, not {validation!r}")
+        if backend not in self.BACKENDS:
+            raise ValueError(f"backend must be one of {self.BACKENDS}, not {backend!r}")
+        if backend == 'trusted' and (prune or lazy):
+            raise ValueError("prune and lazy parsing require the 'xmlschema' backend")
+        decimal_type = self.decimal_type(numeric)
         self.file = h2k_file
         self.schema_file = schema_file
-        self.h2k_schema = xmlschema.XMLSchema(
-            schema_file)
-        assert self.h2k_schema.is_valid(self.file), "Not a valid h2k file"
-        self.h2k_dict = self.h2k_schema.to_dict(h2k_file)
+        self.backend = backend
+        self.validation = validation if backend == 'xmlschema' else 'skip'
+        self.prune = prune
+        self.lazy = lazy
+        self.numeric = numeric
+        self.validation_errors = []
+        self._components = None
+        # Results of the getters, see invalidate()
+        self._getter_cache = {}
+        self.cache_hits = 0
+        self.cache_misses = 0
+        self.h2k_schema = None if backend == 'trusted' else resolve_schema(schema_file, h2k_file)
+
+        self.parse_cache = None if prune or lazy else resolve_parse_cache(cache)
+        cache_key = None
+        if self.parse_cache is not None:
+            digest = 'trusted' if backend == 'trusted' else schema_digest(schema_file, h2k_file)
+            if digest is not None:
+                cache_key = self.parse_cache.key(h2k_file, digest, self.PARSER_VERSION,
+                                                 (backend, self.validation, numeric))
+                cached = self.parse_cache.get(cache_key)
+                if cached is not None:
+                    self.h2k_dict = cached['h2k_dict']
+                    self.validation_errors = [ValidationIssue(*issue) for issue in cached['validation_errors']]
+                    return
+
+        self._decode(decimal_type)
+        if cache_key is not None:
+            # Files that fail strict validation raise before they are cached
+            self.parse_cache.put(cache_key, {'h2k_dict': self.h2k_dict,
+                                             'validation_errors': [tuple(issue) for issue in self.validation_errors]})
+
+    def _decode(self, decimal_type: type) -> None:
+        if self.backend == 'trusted':
+            self.h2k_dict = TrustedDecoder(decimal_type).decode(self.file)
+            return
+
+        # xmlschema decodes the decimals to Decimal and converts them when decimal_type is given
+        decode_kwargs = {} if decimal_type is Decimal else {'decimal_type': decimal_type}
+        if self.prune or self.lazy:
+            # Only the sections read by the getters (prune) or the paths actually accessed (lazy) are
+            # decoded and validated, the other sections are decoded on first access through h2k_dict
+            resource = xmlschema.XMLResource(self.file)
+            xsd_root = self.h2k_schema.elements[resource.root.tag]
+            decoder = ElementDecoder(self.validation, on_errors=self._record_errors, **decode_kwargs)
+            self.h2k_dict = LazyElement(resource.root, xsd_root, decoder,
+                                        skip=self.PRUNED_SECTIONS if self.prune else frozenset(),
+                                        containers=self.LAZY_CONTAINERS if self.lazy else frozenset(),
+                                        lazy=self.lazy, namespaces=decoder.namespaces(xsd_root, resource))
+        elif self.validation == 'skip':
+            self.h2k_dict = self.h2k_schema.to_dict(self.file, validation='skip', **decode_kwargs)
+        else:
+            # The document is validated while it is decoded, in a single pass
+            self.h2k_dict, errors = self.h2k_schema.to_dict(
+                self.file, validation='lax', **decode_kwargs)
+            if errors:
+                self._record_errors(errors)
+
+    def _record_errors(self, errors: list) -> None:
+        # The xmlschema errors reference the compiled schema, only their path and reason are kept
+        self.validation_errors.extend(ValidationIssue(error.path, error.reason) for error in errors)
+        if self.validation == 'strict':
+            raise H2KValidationError(self.file, self.validation_errors)
+
+    @classmethod
+    def decimal_type(cls, numeric: str) -> type:
+        if numeric not in cls.NUMERIC_TYPES:
+            raise ValueError(f"numeric must be one of {cls.NUMERIC_TYPES}, not {numeric!r}")
+        if numeric == 'float':
+            return float
+        if numeric == 'numpy':
+            if numpy is None:
+                raise ImportError("numeric='numpy' requires numpy")
+            return numpy.float64
+        return Decimal
+
+    @property
+    def is_valid(self) -> bool:
+        return self.validation != 'skip' and not self.validation_errors
 
     def __str__(self) -> str:
         return f"H2K file is {self.file}"
 
+    def invalidate(self, *getters: str) -> None:
+        # Drop the memoized results of the given getters, or of all the getters and the component
+        # index, after h2k_dict was edited
+        if not getters:
+            self._getter_cache.clear()
+            self._components = None
+        for getter in getters:
+            self._getter_cache.pop(getter, None)
+
+    def cache_info(self) -> dict:
+        return {'hits': self.cache_hits, 'misses': self.cache_misses, 'size': len(self._getter_cache)}
+
+    def __getstate__(self) -> dict:
+        # Parsers are sent between processes without the compiled schema: pruned and lazy sections are
+        # decoded and the memoized results are recomputed
+        state = self.__dict__.copy()
+        state['h2k_schema'] = None
+        if not isinstance(self.schema_file, str):
+            state['schema_file'] = None
+        state['h2k_dict'] = materialize(self.h2k_dict)
+        state['_components'] = None
+        state['_getter_cache'] = {}
+        return state
+
+    @classmethod
+    def parse_many(cls, paths, schema_file=None, workers: int = None, ordered: bool = True, **options):
+        # Parse H2K files in a pool of worker processes and yield a ParseResult per file as soon as it
+        # is parsed, in the order of paths when ordered is set. A file that fails does not stop the
+        # batch, its error is reported in the result. Each worker compiles or loads the schema once.
+        # workers defaults to the number of CPUs, workers=1 parses in the calling process.
+        # Only a few files per worker are in flight, so results stream back with bounded memory.
+        return imap(_parse_in_worker, paths, workers, initializer=_init_worker, initargs=(schema_file, options),
+                    ordered=ordered)
+
+    @property
+    def components(self) -> ComponentIndex:
+        # Built on first use, the component getters read from it instead of walking the walls again
+        if self._components is None:
+            self._components = ComponentIndex(self.h2k_dict['House']['Components'])
+        return self._components
+
     @staticmethod
     def slice_dict_by_key(input_dict: dict, keys_to_extract: list) -> dict:
         return {key: input_dict[key] for key in keys_to_extract}
 
+    @memoized
     def get_version(self) -> dict:
         return self.slice_dict_by_key(self.h2k_dict['Application']['Version'], ['@major', '@minor'])
 
+    @memoized
     def get_file_id(self) -> str:
         return self.h2k_dict['ProgramInformation']['File']['Identification']
 
+    @memoized
     def get_climate_Prov(self) -> str:
         return self.h2k_dict['ProgramInformation']['Weather']['Region']['English']
 
+    @memoized
     def get_climate_city(self) -> str:
         return self.h2k_dict['ProgramInformation']['Weather']['Location']['English']
 
+    @memoized
     def get_hdd_frostdepth(self) -> dict:
         return self.slice_dict_by_key(self.h2k_dict['ProgramInformation']['Weather'], ['@depthOfFrost', '@heatingDegreeDay'])
 
+    @memoized
     def get_house_type(self) -> dict:
         return self.slice_dict_by_key(self.h2k_dict['House']['Specifications']['HouseType'], ['English', '@code'])
 
+    @memoized
     def get_plan_type(self) -> dict:
         return self.slice_dict_by_key(self.h2k_dict['House']['Specifications']['PlanShape'], ['English', '@code'])
 
+    @memoized
     def get_n_storey(self) -> dict:
         return self.slice_dict_by_key(self.h2k_dict['House']['Specifications']['Storeys'], ['English', '@code'])
 
+    @memoized
     def get_facing_direction(self) -> dict:
         return self.slice_dict_by_key(self.h2k_dict['House']['Specifications']['FacingDirection'], ['English', '@code'])
 
+    @memoized
     def get_thermal_mass(self) -> dict:
         return self.slice_dict_by_key(self.h2k_dict['House']['Specifications']['ThermalMass'], ['English', '@code'])
 
+    @memoized
     def get_vintage(self) -> int:
         vintage_bins = {2: 1920, 3: 1925, 4: 1935, 5: 1945,
                         6: 1955, 7: 1965, 8: 1975, 9: 1985, 10: 1995, 11: 2005}
@@ -61,89 +256,114 @@ class ParseH2K:
             vintage = self.h2k_dict['House']['Specifications']['YearBuilt']['@value']
         return vintage
 
+    @memoized
     def get_heated_area(self) -> dict:
         return self.slice_dict_by_key(self.h2k_dict['House']['Specifications']['HeatedFloorArea'], ['@aboveGrade', '@belowGrade'])
 
+    @memoized
     def get_roofcavity_spec(self) -> dict:
         return self.slice_dict_by_key(self.h2k_dict['House']['Specifications']['RoofCavity'], ['@ventilationRate', '@volume'])
 
+    @memoized
     def get_gableend_area(self) -> float:
         return float(self.h2k_dict['House']['Specifications']['RoofCavity']['GableEnds']['@area'])
 
+    @memoized
     def get_gableend_sheating(self) -> dict:
         return self.slice_dict_by_key(self.h2k_dict['House']['Specifications']['RoofCavity']['GableEnds']['SheatingMaterial'],
                                       ['@code', '@value'])
 
+    @memoized
     def get_gableend_exteriormaterial(self) -> dict:
         return self.slice_dict_by_key(self.h2k_dict['House']['Specifications']['RoofCavity']['GableEnds']['ExteriorMaterial'],
                                       ['@code', '@value'])
 
+    @memoized
     def get_maintemp_setpoint(self) -> dict:
         return self.slice_dict_by_key(self.h2k_dict['House']['Temperatures']['MainFloors'],
                                       ['@daytimeHeatingSetPoint', '@nighttimeHeatingSetPoint', '@nighttimeSetbackDuration', '@coolingSetPoint'])
 
+    @memoized
     def get_mainallowed_temp_rise(self) -> float:
         AllowedTempRise = {1: 0, 2: 2.8, 3: 5.5}
         return AllowedTempRise[int(self.h2k_dict['House']['Temperatures']['MainFloors']['AllowableRise']['@code'])]
 
+    @memoized
     def get_basement_temp_setpoint(self) -> dict:
         return self.slice_dict_by_key(self.h2k_dict['House']['Temperatures']['Basement'],
                                       ['@heated', '@cooled', '@separateThermostat', '@basementUnit', '@heatingSetPoint'])
 
+    @memoized
     def get_equipment_setpoint(self) -> dict:
         return self.slice_dict_by_key(self.h2k_dict['House']['Temperatures']['Equipment'], ['@heatingSetPoint', '@coolingSetPoint'])
 
+    @memoized
     def get_crawlspace_setpoint(self) -> dict:
         return self.slice_dict_by_key(self.h2k_dict['House']['Temperatures']['Crawlspace'], ['@heated', '@heatingSetPoint'])
 
+    @memoized
     def get_basement_fraction_internalgains(self) -> float:
         return float(self.h2k_dict['House']['BaseLoads']['@basementFractionOfInternalGains'])
 
+    @memoized
     def get_occupancy_adult(self) -> dict:
         return self.slice_dict_by_key(self.h2k_dict['House']['BaseLoads']['Occupancy']['Adults'], ['@atHome', '@occupants'])
 
+    @memoized
     def get_occupancy_children(self) -> dict:
         return self.slice_dict_by_key(self.h2k_dict['House']['BaseLoads']['Occupancy']['Children'], ['@atHome', '@occupants'])
 
+    @memoized
     def get_occupancy_infants(self) -> dict:
         return self.slice_dict_by_key(self.h2k_dict['House']['BaseLoads']['Occupancy']['Infants'], ['@atHome', '@occupants'])
 
+    @memoized
     def get_base_loads(self) -> dict:
         return self.slice_dict_by_key(self.h2k_dict['House']['BaseLoads']['Summary'],
                                       ['@electricalAppliances', '@exteriorUse', '@hotWaterLoad', '@lighting', '@otherElectric'])
 
+    @memoized
     def get_house_volume(self) -> float:
         return float(self.h2k_dict['House']['NaturalAirInfiltration']['Specifications']['House']['@volume'])
 
+    @memoized
     def get_infiltration(self) -> dict:
         return self.slice_dict_by_key(self.h2k_dict['House']['NaturalAirInfiltration']['Specifications']['BlowerTest'],
                                       ['@airChangeRate', '@leakageArea'])
 
+    @memoized
     def get_site_terrain(self) -> dict:
         return self.slice_dict_by_key(self.h2k_dict['House']['NaturalAirInfiltration']['Specifications']['BuildingSite']['Terrain'],
                                       ['@code', 'English'])
 
+    @memoized
     def get_walls_shielding(self) -> dict:
         return self.slice_dict_by_key(self.h2k_dict['House']['NaturalAirInfiltration']['Specifications']['LocalShielding']['Walls'],
                                       ['@code', 'English'])
 
+    @memoized
     def get_flue_shielding(self) -> dict:
         return self.slice_dict_by_key(self.h2k_dict['House']['NaturalAirInfiltration']['Specifications']['LocalShielding']['Flue'],
                                       ['@code', 'English'])
 
+    @memoized
     def get_n_rooms(self) -> dict:
         return self.slice_dict_by_key(self.h2k_dict['House']['Ventilation']['Rooms'],
                                       ['@bathrooms', '@bedrooms', '@living', '@otherHabitable', '@utility'])
 
+    @memoized
     def get_vent_distribution_type(self) -> dict:
         return self.slice_dict_by_key(self.h2k_dict['House']['Ventilation']['WholeHouse']['AirDistributionType'], ['@code', 'English'])
 
+    @memoized
     def get_vent_distribution_fan(self) -> dict:
         return self.slice_dict_by_key(self.h2k_dict['House']['Ventilation']['WholeHouse']['AirDistributionFanPower'], ['@code', 'English'])
 
+    @memoized
     def get_vent_distribution_operation(self) -> dict:
         return self.slice_dict_by_key(self.h2k_dict['House']['Ventilation']['WholeHouse']['OperationSchedule'], ['@code', '@value'])
 
+    @memoized
     def get_hrv(self):
         hrv_list = self.h2k_dict['House']['Ventilation']['WholeHouseVentilatorList']['Hrv']
         hrv_spec = []
@@ -170,10 +390,11 @@ class ParseH2K:
             exh_duct = {f"exhaust_{key}": val for key, val in exh_duct.items()}
             hrv_eqipment.update(exh_duct)
 
-            hrv_spec.append(hrv_eqipment)
+            hrv_spec.append(HrvRecord.from_dict(hrv_eqipment))
 
         return hrv_spec
 
+    @memoized
     def get_supplement_ventilation(self):
         vents = self.h2k_dict['House']['Ventilation']['SupplementalVentilatorList']
         vent_sepc = []
@@ -207,7 +428,7 @@ class ParseH2K:
         window_def.update({'facingDirection': window['FacingDirection']['English'],
                            'facingDirectionCode': window['FacingDirection']['@code']})
 
-        return window_def
+        return WindowRecord.from_dict(window_def)
 
     def extract_this_door(self, door, parent_id, parent_label, parent_type):
         door_def = {
@@ -219,7 +440,7 @@ class ParseH2K:
         door_def.update(self.slice_dict_by_key(
             door['Measurements'], ['@height', '@width']))
 
-        return door_def
+        return DoorRecord.from_dict(door_def)
 
     def extract_this_header(self, header, parent_id, parent_label, parent_type):
         header_def = {
@@ -231,7 +452,7 @@ class ParseH2K:
         header_def.update(self.slice_dict_by_key(
             header['Measurements'], ['@height', '@perimeter']))
 
-        return header_def
+        return HeaderRecord.from_dict(header_def)
 
     def extract_this_basement(self, bsmt):
         bsmt_def = self.slice_dict_by_key(
@@ -310,13 +531,13 @@ class ParseH2K:
             bsmt_def['ponyInsNom'] = 0
             bsmt_def['ponyInsRSI'] = 0
 
-        return bsmt_def
+        return BasementRecord.from_dict(bsmt_def)
 
+    @memoized
     def get_walls_spec(self):
-        walls = self.h2k_dict['House']['Components']['Wall']
         walls_spec = []
 
-        for wall in walls:
+        for wall in (component.record for component in self.components.of_type('Wall', section='Wall')):
             wall_def = self.slice_dict_by_key(
                 wall, ['@id', 'Label', '@adjacentEnclosedSpace'])
             wall_def.update(self.slice_dict_by_key(
@@ -328,81 +549,63 @@ class ParseH2K:
             wall_def.update({'facingDirection': wall['FacingDirection']['English'],
                             'facingDirectionCode': wall['FacingDirection']['@code']})
 
-            walls_spec.append(wall_def)
+            walls_spec.append(WallRecord.from_dict(wall_def))
 
         return walls_spec
 
+    @memoized
     def get_windows_spec(self):
-        walls = self.h2k_dict['House']['Components']['Wall']
         windows_spec = []
 
-        for wall in walls:
-            if 'Window' in wall['Components']:
-                windows = wall['Components']['Window']
-
-                for window in windows:
-                    window_def = self.extract_this_window(
-                        window, wall['@id'], wall['Label'], 'wall')
+        for window in self.components.of_type('Window', 'Wall', section='Wall'):
+            wall = window.parent.record
+            window_def = self.extract_this_window(
+                window.record, wall['@id'], wall['Label'], 'wall')
 
-                    windows_spec.append(window_def)
-            else:
-                continue
+            windows_spec.append(window_def)
 
         return windows_spec
 
+    @memoized
     def get_doors_spec(self):
-        walls = self.h2k_dict['House']['Components']['Wall']
         doors_spec = []
         door_windows_spec = []
 
-        for wall in walls:
-            if 'Door' in wall['Components']:
-                doors = wall['Components']['Door']
+        for door in self.components.of_type('Door', 'Wall', section='Wall'):
+            wall = door.parent.record
+            door_def = self.extract_this_door(
+                door.record, wall['@id'], wall['Label'], 'wall')
 
-                for door in doors:
-                    door_def = self.extract_this_door(
-                        door, wall['@id'], wall['Label'], 'wall')
+            doors_spec.append(door_def)
 
-                    doors_spec.append(door_def)
+            for window in self.components.children(door, 'Window'):
+                win_door_def = self.extract_this_window(
+                    window.record, door.record['@id'], door.record['Label'], 'door')
 
-                    if 'Components' in door:
-                        door_windows = door['Components']['Window']
-
-                        for window in door_windows:
-                            win_door_def = self.extract_this_window(
-                                window, door['@id'], door['Label'], 'door')
-
-                            door_windows_spec.append(win_door_def)
-                    else:
-                        continue
-            else:
-                continue
+                door_windows_spec.append(win_door_def)
 
         return doors_spec, door_windows_spec
 
+    @memoized
     def get_floor_header(self):
-        walls = self.h2k_dict['House']['Components']['Wall']
         headers_spec = []
 
-        for wall in walls:
-            if 'FloorHeader' in wall['Components']:
-                headers = wall['Components']['FloorHeader']
-                for header in headers:
-                    header_def = self.extract_this_header(
-                        header, wall['@id'], wall['Label'], 'wall')
+        for header in self.components.of_type('FloorHeader', 'Wall', section='Wall'):
+            wall = header.parent.record
+            header_def = self.extract_this_header(
+                header.record, wall['@id'], wall['Label'], 'wall')
 
-                    headers_spec.append(header_def)
-            else:
-                continue
+            headers_spec.append(header_def)
 
         return headers_spec
 
+    @memoized
     def get_ceiling_spec(self):
-        ceilings = self.h2k_dict['House']['Components']['Ceiling']
         ceiling_spec = []
         skylight_spec = []
 
-        for ceiling in ceilings:
+        for component in self.components.of_type('Ceiling', section='Ceiling'):
+            ceiling = component.record
             ceiling_def = self.slice_dict_by_key(ceiling, ['@id', 'Label'])
             ceiling_def.update(
                 {'type': ceiling['Construction']['Type']['English']})
@@ -413,92 +616,77 @@ class ParseH2K:
             ceiling_def.update({'slopeCode': ceiling['Measurements']['Slope']['@code'],
                                 'slopeValue': ceiling['Measurements']['Slope']['@value']})
 
-            ceiling_spec.append(ceiling_def)
-
-            if 'Components' in ceiling:
-                skylights = ceiling['Components']['Window']
+            ceiling_spec.append(CeilingRecord.from_dict(ceiling_def))
 
-                for window in skylights:
-                    skylight_def = self.extract_this_window(
-                        window, ceiling['@id'], ceiling['Label'], 'ceiling')
+            for window in self.components.children(component, 'Window'):
+                skylight_def = self.extract_this_window(
+                    window.record, ceiling['@id'], ceiling['Label'], 'ceiling')
 
-                    skylight_spec.append(skylight_def)
-            else:
-                continue
+                skylight_spec.append(skylight_def)
 
         return ceiling_spec, skylight_spec
 
+    @memoized
     def get_exposed_floor(self):
-        floors = self.h2k_dict['House']['Components']['Floor']
         floors_sepc = []
 
-        for floor in floors:
+        for floor in (component.record for component in self.components.of_type('Floor', section='Floor')):
             floor_def = self.slice_dict_by_key(floor, ['@id', 'Label'])
             floor_def.update(self.slice_dict_by_key(floor['Construction']['Type'], [
                              '@idref', '@nominalInsulation', '@rValue']))
             floor_def.update(self.slice_dict_by_key(
                 floor['Measurements'], ['@area', '@length']))
 
-            floors_sepc.append(floor_def)
+            floors_sepc.append(FloorRecord.from_dict(floor_def))
 
         return floors_sepc
 
+    @memoized
     def get_basement_spec(self):
-        basement = self.h2k_dict['House']['Components']['Basement']
         basement_spec = []
         bsmt_windows_spec = []
         bsmt_headers_spec = []
         bsmt_doors_spec = []
         bsmt_door_windows_spec = []
 
-        for bsmt in basement:
+        for component in self.components.of_type('Basement', section='Basement'):
+            bsmt = component.record
             bsmt_def = self.extract_this_basement(bsmt)
             basement_spec.append(bsmt_def)
 
-            if 'Window' in bsmt['Components']:
-                windows = bsmt['Components']['Window']
-
-                for window in windows:
-                    window_def = self.extract_this_window(
-                        window, bsmt['@id'], bsmt['Label'], 'basement')
-
-                    bsmt_windows_spec.append(window_def)
-
-            if 'FloorHeader' in bsmt['Components']:
-                headers = bsmt['Components']['FloorHeader']
-                for header in headers:
-                    header_def = self.extract_this_header(
-                        header, bsmt['@id'], bsmt['Label'], 'basement')
+            for window in self.components.children(component, 'Window'):
+                window_def = self.extract_this_window(
+                    window.record, bsmt['@id'], bsmt['Label'], 'basement')
 
-                    bsmt_headers_spec.append(header_def)
+                bsmt_windows_spec.append(window_def)
 
-            if 'Door' in bsmt['Components']:
-                doors = bsmt['Components']['Door']
+            for header in self.components.children(component, 'FloorHeader'):
+                header_def = self.extract_this_header(
+                    header.record, bsmt['@id'], bsmt['Label'], 'basement')
 
-                for door in doors:
-                    door_def = self.extract_this_door(
-                        door, bsmt['@id'], bsmt['Label'], 'basement')
+                bsmt_headers_spec.append(header_def)
 
-                    bsmt_doors_spec.append(door_def)
+            for door in self.components.children(component, 'Door'):
+                door_def = self.extract_this_door(
+                    door.record, bsmt['@id'], bsmt['Label'], 'basement')
 
-                    if 'Components' in door:
-                        door_windows = door['Components']['Window']
+                bsmt_doors_spec.append(door_def)
 
-                        for window in door_windows:
-                            win_door_def = self.extract_this_window(
-                                window, door['@id'], door['Label'], 'door')
+                for window in self.components.children(door, 'Window'):
+                    win_door_def = self.extract_this_window(
+                        window.record, door.record['@id'], door.record['Label'], 'door')
 
-                            bsmt_door_windows_spec.append(win_door_def)
+                    bsmt_door_windows_spec.append(win_door_def)
 
         return basement_spec, bsmt_windows_spec, bsmt_headers_spec, bsmt_doors_spec, bsmt_door_windows_spec
 
+    @memoized
     def get_hotwater_spec(self):
-        hotwater = self.h2k_dict['House']['Components']['HotWater']
         dhw_order = ['Primary', 'Secondary']
         dhw_spec = []
         dwhr_spec = []
 
-        for dhw in hotwater:
+        for dhw in (component.record for component in self.components.of_type('HotWater', section='HotWater')):
             for order in dhw_order:
                 dhw_def = self.slice_dict_by_key(dhw, ['@id', 'Label'])
                 if order in dhw:
@@ -508,7 +696,7 @@ class ParseH2K:
                                     'tankvolume': dhw[order]['TankVolume']['@value'],
                                     'energyfactor': dhw[order]['EnergyFactor']['@value'],
                                     'tanklocation': dhw[order]['TankLocation']['English']})
-                    dhw_spec.append(dhw_def)
+                    dhw_spec.append(HotWaterRecord.from_dict(dhw_def))
 
                     if 'DrainWaterHeatRecovery' in dhw[order]:
                         dwhr_def = {
@@ -518,10 +706,11 @@ class ParseH2K:
                         dwhr_def.update({'ShowerTemperature': dhw[order]['DrainWaterHeatRecovery']['ShowerTemperature']['English'],
                                          'ShowerHead': dhw[order]['DrainWaterHeatRecovery']['ShowerHead']['English']})
 
-                        dwhr_spec.append(dwhr_def)
+                        dwhr_spec.append(DrainWaterHeatRecoveryRecord.from_dict(dwhr_def))
 
         return dhw_spec, dwhr_spec
 
+    @memoized
     def get_coolingsystem_spec(self):
         systems = self.h2k_dict['House']['HeatingCooling']
         cooling_spec = []
@@ -545,6 +734,7 @@ class ParseH2K:
                                 )
         return cooling_spec
 
+    @memoized
     def get_heating_system_spec(self):
         systems = self.h2k_dict['House']['HeatingCooling']
         system_type1 = self.get_heating_system_type1(systems['Type1'])
@@ -573,7 +763,7 @@ class ParseH2K:
         for system_type in system_types:
             if system_type in systems:
                 heating_system_type1[system_type]['efficiency'] = systems[
-                    system_type]['Specifications']['@efficiency'] / Decimal(100)
+                    system_type]['Specifications']['@efficiency'] / 100
                 heating_system_type1[system_type]['capacity'] = systems[system_type]['Specifications']['OutputCapacity']['@value']
                 heating_system_type1[system_type]['fuel'] = systems[system_type]['Equipment'][
                     'EnergySource']['English'] if system_type != 'Baseboards' else 'Electric'
@@ -596,3 +786,29 @@ class ParseH2K:
                 heating_system_type2[system_type]['equipment'] = systems[system_type]['Equipment']['Type']['English']
 
         return heating_system_type2
+
+
+# Schema and options of the current worker process of ParseH2K.parse_many
+_worker_schema = None
+_worker_options = {}
+
+
+def _init_worker(schema_file, options: dict) -> None:
+    global _worker_schema, _worker_options
+    _worker_schema = schema_file
+    _worker_options = options
+    if options.get('backend', 'xmlschema') == 'xmlschema':
+        # Warm the schema of the worker, paths are compiled once in the default registry
+        warm_schema(schema_file)
+
+
+def _parse_in_worker(path: str) -> ParseResult:
+    start = perf_counter()
+    try:
+        parser = ParseH2K(path, _worker_schema, **_worker_options)
+        # Pruned and lazy sections are decoded here rather than when the parser is pickled, so that
+        # their validation errors are reported in the result of the file
+        parser.h2k_dict = materialize(parser.h2k_dict)
+    except Exception as error:
+        return ParseResult(path, None, f"{type(error).__name__}: {error}", perf_counter() - start)
+    return ParseResult(path, parser, None, perf_counter() - start)
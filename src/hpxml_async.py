@@ -0,0 +1,173 @@
+import asyncio
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+import json
+import os
+import os.path
+import shutil
+import tempfile
+from time import perf_counter
+
+from hpxml_builder import BuildHPXML
+from schema_registry import warm_schema
+
+
+class AsyncHPXMLBuilder:
+    """Build the HPXML workflow JSON of many H2K files with asyncio, overlapping file I/O and parsing.
+
+    Each house goes through three stages with their own concurrency limit: read copies the H2K file
+    to a local staging directory in a thread pool, build parses it and updates the template in a pool
+    of worker processes, and write hands the workflow to a bounded queue drained by writer tasks. On
+    slow or network storage the workers never wait for the files, and reads and writes of other houses
+    proceed while they parse.
+    """
+
+    def __init__(self, path_to_hpxml_template, path_to_h2k_schema, output_dir: str, workers: int = None,
+                 read_concurrency: int = 8, build_concurrency: int = None, write_concurrency: int = 4,
+                 write_queue_size: int = 16, staging_dir: str = None, **parse_options) -> None:
+        # workers: number of worker processes (one per CPU by default), workers=1 builds in a thread of
+        # the calling process. build_concurrency defaults to workers.
+        # staging_dir: local directory for the copies of the H2K files, a temporary directory by default
+        # parse_options are passed to ParseH2K, e.g. backend='trusted'
+        self.template_dict = path_to_hpxml_template if isinstance(path_to_hpxml_template, dict) \
+            else BuildHPXML._read_json(path_to_hpxml_template)
+        self.schema = path_to_h2k_schema
+        self.output_dir = output_dir
+        self.workers = workers or os.cpu_count() or 1
+        self.read_concurrency = read_concurrency
+        self.build_concurrency = build_concurrency or self.workers
+        self.write_concurrency = write_concurrency
+        self.write_queue_size = write_queue_size
+        self.staging_dir = staging_dir
+        self.parse_options = parse_options
+
+    def output_path(self, h2k_file: str) -> str:
+        return os.path.join(self.output_dir, os.path.splitext(os.path.basename(h2k_file))[0] + '.json')
+
+    # File I/O, run in the I/O thread pool. Subclasses can override them, e.g. for another storage.
+    def read_file(self, h2k_file: str, staged_path: str) -> None:
+        shutil.copyfile(h2k_file, staged_path)
+
+    def write_file(self, output: str, text: str) -> None:
+        tmp_path = f"{output}.tmp"
+        with open(tmp_path, 'w') as json_file:
+            json_file.write(text)
+        os.replace(tmp_path, output)
+
+    def _executor(self):
+        if self.workers == 1:
+            _init_worker(self.template_dict, self.schema, self.parse_options)
+            return ThreadPoolExecutor(1)
+        return ProcessPoolExecutor(self.workers, initializer=_init_worker,
+                                   initargs=(self.template_dict, self.schema, self.parse_options))
+
+    async def convert(self, h2k_files):
+        # Async generator of one entry per house in completion order: H2K file, output path, 'done' or
+        # 'failed' status, error and the seconds spent in each stage
+        os.makedirs(self.output_dir, exist_ok=True)
+        loop = asyncio.get_running_loop()
+        read_limit = asyncio.Semaphore(self.read_concurrency)
+        build_limit = asyncio.Semaphore(self.build_concurrency)
+        # Houses between read and write, so that the reads do not run ahead of the workers
+        in_flight = asyncio.Semaphore(self.read_concurrency + self.build_concurrency + self.write_queue_size)
+        write_queue = asyncio.Queue(self.write_queue_size)
+        results = asyncio.Queue()
+        done = object()
+
+        with tempfile.TemporaryDirectory(dir=self.staging_dir) as staging, \
+                ThreadPoolExecutor(self.read_concurrency + self.write_concurrency) as io_pool, \
+                self._executor() as cpu_pool:
+
+            async def convert_house(index: int, h2k_file: str, output: str) -> None:
+                entry = {'h2k_file': h2k_file, 'output': output, 'status': 'done', 'error': None,
+                         'seconds': {}}
+                staged_path = os.path.join(staging, f"{index:08d}-{os.path.basename(h2k_file)}")
+                try:
+                    start = perf_counter()
+                    async with read_limit:
+                        await loop.run_in_executor(io_pool, self.read_file, h2k_file, staged_path)
+                    entry['seconds']['read'] = perf_counter() - start
+                    start = perf_counter()
+                    async with build_limit:
+                        text = await loop.run_in_executor(cpu_pool, _build_workflow, staged_path)
+                    entry['seconds']['build'] = perf_counter() - start
+                except Exception as error:
+                    entry.update(status='failed', error=f"{type(error).__name__}: {error}")
+                    in_flight.release()
+                    await results.put(entry)
+                    return
+                finally:
+                    if os.path.exists(staged_path):
+                        os.remove(staged_path)
+                # Blocks when the writers fall behind
+                await write_queue.put((entry, text))
+
+            async def writer() -> None:
+                while True:
+                    entry, text = await write_queue.get()
+                    start = perf_counter()
+                    try:
+                        await loop.run_in_executor(io_pool, self.write_file, entry['output'], text)
+                    except Exception as error:
+                        entry.update(status='failed', error=f"{type(error).__name__}: {error}")
+                    entry['seconds']['write'] = perf_counter() - start
+                    in_flight.release()
+                    await results.put(entry)
+                    write_queue.task_done()
+
+            async def feed() -> None:
+                # Running house tasks, dropped as they finish so that long runs do not hold every task
+                tasks = set()
+                outputs = {}
+                for index, h2k_file in enumerate(h2k_files):
+                    output = self.output_path(h2k_file)
+                    if outputs.setdefault(output, h2k_file) != h2k_file:
+                        await results.put({'h2k_file': h2k_file, 'output': output, 'status': 'failed',
+                                           'error': f"{outputs[output]} is also written to {output}",
+                                           'seconds': {}})
+                        continue
+                    await in_flight.acquire()
+                    task = asyncio.create_task(convert_house(index, h2k_file, output))
+                    tasks.add(task)
+                    task.add_done_callback(tasks.discard)
+                await asyncio.gather(*tasks)
+                await write_queue.join()
+                await results.put(done)
+
+            writers = [asyncio.create_task(writer()) for _ in range(self.write_concurrency)]
+            feeder = asyncio.create_task(feed())
+            try:
+                while True:
+                    entry = await results.get()
+                    if entry is done:
+                        break
+                    yield entry
+                await feeder
+            finally:
+                for task in writers + [feeder]:
+                    task.cancel()
+                await asyncio.gather(*writers, feeder, return_exceptions=True)
+
+    def run(self, h2k_files) -> list:
+        # Convert the files from synchronous code, returns the entries
+        async def collect():
+            return [entry async for entry in self.convert(h2k_files)]
+
+        return asyncio.run(collect())
+
+
+# Template, schema and parser options of the current worker process of AsyncHPXMLBuilder.convert
+_worker_state = {}
+
+
+def _init_worker(template_dict: dict, schema, parse_options: dict) -> None:
+    _worker_state.update(template_dict=template_dict, schema=schema, parse_options=parse_options)
+    if parse_options.get('backend', 'xmlschema') == 'xmlschema':
+        warm_schema(schema)
+
+
+def _build_workflow(h2k_file: str) -> str:
+    # The workflow is returned as JSON text, cheaper to send back than the dict
+    builder = BuildHPXML(_worker_state['template_dict'], h2k_file, _worker_state['schema'],
+                         **_worker_state['parse_options'])
+    builder.update_steps()
+    return json.dumps(builder.template_dict, indent=2, default=BuildHPXML._json_default)
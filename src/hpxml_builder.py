@@ -1,19 +1,124 @@
+import copy
+from decimal import Decimal
 from inspect import Parameter
 import json
 
+from h2k_memo import freeze, thaw
 from h2kparser import ParseH2K
 
+# Getters of ParseH2K read by BuildHPXML.update_steps
+H2K_GETTERS = ('get_infiltration', 'get_n_rooms', 'get_n_storey', 'get_heated_area', 'get_ceiling_spec',
+               'get_doors_spec', 'get_facing_direction', 'get_windows_spec', 'get_maintemp_setpoint',
+               'get_coolingsystem_spec', 'get_hotwater_spec', 'get_heating_system_spec')
+
+# keys are the codes used in H2K for the number of storeys (starts from 1 and incrementing by 0.5 storey)
+# code 6 and 7 refer to split levels
+H2K_STOREYS_TO_HPXML = {'1': 1, '2': 1, '3': 2, '4': 2, '5': 3, '6': 1, '7': 1}
+# keys are the codes for cooling systems in HOT2000
+H2K_COOLING_SYSTEM_TYPES_TO_HPXML = {'1': 'central air conditioner',
+                                     '2': 'packaged terminal air conditioner',
+                                     '3': 'mini-split'}
+H2K_FUELS_TO_HPXML = {
+    'Electricity': 'electricity',
+    'Electric': 'electricity',
+    'Natural gas': 'natural gas',
+    'Oil': 'fuel oil',
+    'Propane': 'propane',
+    'Mixed Wood': 'wood',
+    'Hardwood': 'wood',
+    'Softwood': 'wood',
+    'Wood Pellets': 'wood'
+}
+# keys are the hpxml water heater type
+# values are the h2k water heater type
+# Currently only include H2K electric water heating system types
+# Expand the lists for other fuel types
+HPXML_WATER_HEATER_TYPES_TO_H2K = {
+    'storage water heater': ['Conventional tank', 'Conserver tank'],
+    'instantaneous water heater': ['Instantenous'],
+    'heat pump water heater': ['Tankless heat pump', 'Heat pump', 'Integrated heat pump'],
+    'space-heating boiler with storage tank': [],
+    'space-heating boiler with tankless coil': []
+}
+
+
+class HouseSpec:
+    """Results of the H2K_GETTERS of one house, without the decoded H2K file.
+
+    It has the same getters as ParseH2K for the values read by BuildHPXML, so a builder can use it in
+    place of the parser. The values are stored frozen and returned as copies like the memoized getter
+    results, and the spec is small to pickle, e.g. to send it from a worker process.
+    """
+
+    __slots__ = ('file', '_values')
+
+    def __init__(self, h2k_file: str, values: dict) -> None:
+        self.file = h2k_file
+        self._values = {getter: freeze(values[getter]) for getter in H2K_GETTERS}
+
+    @classmethod
+    def from_parser(cls, parser: ParseH2K) -> 'HouseSpec':
+        return cls(parser.file, {getter: getattr(parser, getter)() for getter in H2K_GETTERS})
+
+    def __reduce__(self):
+        # Mapping proxies can not be pickled, the values are sent as dicts and frozen again
+        return type(self), (self.file, {getter: thaw(value) for getter, value in self._values.items()})
+
+    def __str__(self) -> str:
+        return f"H2K file is {self.file}"
+
+
+def _spec_getter(name: str):
+    def getter(self):
+        return thaw(self._values[name])
+
+    getter.__name__ = name
+    return getter
+
+
+for _getter in H2K_GETTERS:
+    setattr(HouseSpec, _getter, _spec_getter(_getter))
+
 
 class BuildHPXML:
-    def __init__(self, path_to_hpxml_template: str, path_to_h2k: str, path_to_h2k_schema: str) -> None:
-        self.template_dict = self._read_json(path_to_hpxml_template)
-        self.h2k_parameters = ParseH2K(path_to_h2k, path_to_h2k_schema)
+    H2K_GETTERS = H2K_GETTERS
 
-    def _read_json(self, path: str) -> dict:
+    def __init__(self, path_to_hpxml_template: str, path_to_h2k: str, path_to_h2k_schema=None,
+                 release: bool = False, **parse_options) -> None:
+        # path_to_h2k_schema can also be a compiled schema or a SchemaRegistry shared between houses
+        # parse_options are passed to ParseH2K, e.g. numeric='float' or backend='trusted'
+        # path_to_hpxml_template can also be a template dict loaded once for many houses, it is copied
+        # path_to_h2k can also be a ParseH2K already parsed or a HouseSpec
+        # release: keep a HouseSpec of the house instead of the parser, the decoded H2K file is freed as
+        # soon as the builder is created
+        if isinstance(path_to_hpxml_template, dict):
+            self.template_dict = copy.deepcopy(path_to_hpxml_template)
+        else:
+            self.template_dict = self._read_json(path_to_hpxml_template)
+        if isinstance(path_to_h2k, (ParseH2K, HouseSpec)):
+            self.h2k_parameters = path_to_h2k
+        else:
+            self.h2k_parameters = ParseH2K(path_to_h2k, path_to_h2k_schema, **parse_options)
+        if release and isinstance(self.h2k_parameters, ParseH2K):
+            self.h2k_parameters = HouseSpec.from_parser(self.h2k_parameters)
+
+    @staticmethod
+    def _read_json(path: str) -> dict:
         with open(path, 'r') as json_file:
             json_dict = json.loads(json_file.read())
         return json_dict
 
+    @staticmethod
+    def _json_default(value):
+        # Decimal values of the H2K file are written as JSON numbers
+        if isinstance(value, Decimal):
+            return float(value)
+        raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+    def write_workflow(self, path: str) -> None:
+        with open(path, 'w') as json_file:
+            json.dump(self.template_dict, json_file, indent=2, default=self._json_default)
+
     def update_run_directory(self, path_to_run_directory: str) -> None:
         self.template_dict['run_directory'] = path_to_run_directory
 
@@ -48,11 +153,7 @@ class BuildHPXML:
 
         # Storeys
         storeys = self.h2k_parameters.get_n_storey()
-        # keys are the codes used in H2K for the number of storeys (starts from 1 and incrementing by 0.5 storey)
-        # code 6 and 7 refer to split levels
-        map_h2k_storeys_to_hpxml = {'1': 1, '2': 1,
-                                    '3': 2, '4': 2, '5': 3, '6': 1, '7': 1}
-        arguments['geometry_unit_num_floors_above_grade'] = map_h2k_storeys_to_hpxml[storeys['@code']]
+        arguments['geometry_unit_num_floors_above_grade'] = H2K_STOREYS_TO_HPXML[storeys['@code']]
 
         # Conditioned Floor Area
         heated_area = self.h2k_parameters.get_heated_area()
@@ -105,10 +206,13 @@ class BuildHPXML:
         # Windows
         windows = self.h2k_parameters.get_windows_spec()
         win_area = {front_code: 0, right_code: 0, left_code: 0, back_code: 0}
+        unmapped = sorted({window['facingDirectionCode'] for window in windows} - set(win_area))
+        if unmapped:
+            raise ValueError(f"Windows facing the directions {unmapped} are not supported")
         for window in windows:
+            # HOT2000 uses milimeter for window dimension, the area of each window is rounded to 0.1 m2
             win_area[window['facingDirectionCode']
                      ] += round(window['@height']/1000 * window['@width']/1000, 1)
-            # HOT2000 uses milimeter for window dimension
         arguments['window_area_back'] = win_area[back_code]
         arguments['window_area_front'] = win_area[front_code]
         arguments['window_area_left'] = win_area[left_code]
@@ -132,10 +236,6 @@ class BuildHPXML:
 
         # Cooling System
         cooling_systems = self.h2k_parameters.get_coolingsystem_spec()
-        # keys are the codes for cooling systems in HOT2000
-        map_h2k_to_hpxml_cooling_system_types = {'1': 'central air conditioner',
-                                                 '2': 'packaged terminal air conditioner',
-                                                 '3': 'mini-split'}
 
         def kw_to_btu_hr(capacity): return round(float(capacity) * 3412.142, 1)
 
@@ -145,33 +245,11 @@ class BuildHPXML:
             arguments['cooling_system_cooling_efficiency'] = cooling_system['efficiency']
             # Check the efficiency types and update if necessary
             arguments['cooling_system_cooling_efficiency_type'] = 'SEER' if not cooling_system['isCop'] else 'EER'
-            arguments['cooling_system_type'] = map_h2k_to_hpxml_cooling_system_types[cooling_system['code']]
+            arguments['cooling_system_type'] = H2K_COOLING_SYSTEM_TYPES_TO_HPXML[cooling_system['code']]
 
         # Hot Water Tank
         hot_water_systems = self.h2k_parameters.get_hotwater_spec()
         water_heaters = hot_water_systems[0]
-        map_h2k_fuels_to_hpxml = {
-            'Electricity': 'electricity',
-            'Electric': 'electricity',
-            'Natural gas': 'natural gas',
-            'Oil': 'fuel oil',
-            'Propane': 'propane',
-            'Mixed Wood': 'wood',
-            'Hardwood': 'wood',
-            'Softwood': 'wood',
-            'Wood Pellets': 'wood'
-        }
-        # keys are the hpxml water heater type
-        # values are the h2k water heater type
-        # Currently only include H2K electric water heating system types
-        # Expand the lists for other fuel types
-        map_hpxml_water_heater_type_to_h2k = {
-            'storage water heater': ['Conventional tank', 'Conserver tank'],
-            'instantaneous water heater': ['Instantenous'],
-            'heat pump water heater': ['Tankless heat pump', 'Heat pump', 'Integrated heat pump'],
-            'space-heating boiler with storage tank': [],
-            'space-heating boiler with tankless coil': []
-        }
 
         def litre_to_gal(volume): return round(float(volume) * 0.26413, 0)
 
@@ -180,10 +258,10 @@ class BuildHPXML:
             if water['systemtype'] == 'Primary':
                 arguments['water_heater_efficiency'] = water['energyfactor']
                 arguments['water_heater_efficiency_type'] = 'EnergyFactor'
-                arguments['water_heater_fuel_type'] = map_h2k_fuels_to_hpxml[water['energysource']]
+                arguments['water_heater_fuel_type'] = H2K_FUELS_TO_HPXML[water['energysource']]
                 arguments['water_heater_tank_volume'] = litre_to_gal(
                     water['tankvolume'])
-                for hpxml_type, h2k_type in map_hpxml_water_heater_type_to_h2k.items():
+                for hpxml_type, h2k_type in HPXML_WATER_HEATER_TYPES_TO_H2K.items():
                     if water['tanktype'] in h2k_type:
                         arguments['water_heater_type'] = hpxml_type
                         break
@@ -192,7 +270,7 @@ class BuildHPXML:
         primary_heating_system, backup_heating_system = self.h2k_parameters.get_heating_system_spec()
         if not backup_heating_system:
             # No heat pump system
-            arguments['heating_system_fuel'] = map_h2k_fuels_to_hpxml[primary_heating_system[1]['fuel']]
+            arguments['heating_system_fuel'] = H2K_FUELS_TO_HPXML[primary_heating_system[1]['fuel']]
             arguments['heating_system_heating_capacity'] = kw_to_btu_hr(
                 primary_heating_system[1]['capacity'])
             arguments['heating_system_heating_efficiency'] = primary_heating_system[1]['efficiency']
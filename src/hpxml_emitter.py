@@ -0,0 +1,418 @@
+from contextlib import contextmanager
+from datetime import datetime
+from decimal import Decimal
+import math
+import os
+import warnings
+from xml.sax.saxutils import XMLGenerator
+
+from h2kparser import ParseH2K
+from hpxml_builder import (H2K_COOLING_SYSTEM_TYPES_TO_HPXML, H2K_FUELS_TO_HPXML, H2K_STOREYS_TO_HPXML,
+                           HPXML_WATER_HEATER_TYPES_TO_H2K)
+
+# Unit conversions from the SI units of HOT2000
+M2_TO_FT2 = 10.764
+M3_TO_FT3 = 35.3147
+RSI_TO_R = 5.678263
+KW_TO_BTU_HR = 3412.142
+L_TO_GAL = 0.26413
+# Assembly R-value of an uninsulated roof deck over a vented attic, as in the OpenStudio-HPXML test files
+UNINSULATED_ROOF_R = 2.3
+# keys are the HOT2000 house types (English text), in lower case
+H2K_HOUSE_TYPES_TO_HPXML = (('single detached', 'single-family detached'),
+                            ('double', 'single-family attached'),
+                            ('duplex', 'single-family attached'),
+                            ('triplex', 'single-family attached'),
+                            ('row house', 'single-family attached'),
+                            ('apartment', 'apartment unit'),
+                            ('mobile', 'manufactured home'))
+# Sections of House/Components that HPXMLEmitter does not write yet
+H2K_FOUNDATION_TYPES = ('Basement', 'Crawlspace', 'Slab', 'Walkout')
+# Heating systems of HOT2000 Type 1 and the HPXML HeatingSystemType and efficiency units
+H2K_HEATING_SYSTEMS_TO_HPXML = {'Baseboards': ('ElectricResistance', 'Percent'),
+                                'Furnace': ('Furnace', 'AFUE'),
+                                'Boiler': ('Boiler', 'AFUE')}
+
+
+def celsius_to_fahrenheit(t) -> float:
+    return round(9 / 5 * float(t) + 32, 1)
+
+
+def azimuth(direction_code) -> int:
+    # HOT2000 direction codes start from South (code = 1) and progress by 45 degrees counter-clockwise,
+    # HPXML azimuths are clockwise from North
+    return (180 - (int(direction_code) - 1) * 45) % 360
+
+
+def facility_type(house_type: str) -> str:
+    for prefix, hpxml_type in H2K_HOUSE_TYPES_TO_HPXML:
+        if house_type.lower().startswith(prefix):
+            return hpxml_type
+    raise ValueError(f"House type {house_type!r} is not supported")
+
+
+class UnsupportedComponentsWarning(UserWarning):
+    # Components of the H2K file that are left out of the HPXML document
+    pass
+
+
+class XMLStreamWriter:
+    """Indented XML written element by element with xml.sax.saxutils.XMLGenerator.
+
+    Nothing is kept in memory but the names of the open elements, so a document of any size is
+    written with constant memory. Leaf values are converted to text: booleans as true/false, floats
+    and Decimals as numbers.
+    """
+
+    def __init__(self, out, encoding: str = 'UTF-8', indent: str = '  ') -> None:
+        # out: binary or text stream
+        self._generator = XMLGenerator(out, encoding, short_empty_elements=True)
+        self.indent = indent
+        self._open = []
+        # Whether the innermost open element has child elements, for the indentation of its end tag
+        self._has_children = False
+
+    @staticmethod
+    def text(value) -> str:
+        if isinstance(value, bool):
+            return 'true' if value else 'false'
+        if isinstance(value, Decimal):
+            value = float(value)
+        return str(value)
+
+    def start_document(self) -> None:
+        self._generator.startDocument()
+
+    def end_document(self) -> None:
+        self._generator.ignorableWhitespace('\n')
+        self._generator.endDocument()
+
+    def start(self, name: str, attrs: dict = None) -> None:
+        if self._open:
+            self._generator.ignorableWhitespace('\n' + self.indent * len(self._open))
+        self._generator.startElement(name, attrs or {})
+        self._open.append(name)
+        self._has_children = False
+
+    def end(self) -> None:
+        name = self._open.pop()
+        if self._has_children:
+            self._generator.ignorableWhitespace('\n' + self.indent * len(self._open))
+        self._generator.endElement(name)
+        self._has_children = True
+
+    def element(self, name: str, value=None, attrs: dict = None) -> None:
+        # Leaf element, empty when value is None
+        self.start(name, attrs)
+        if value is not None:
+            self._generator.characters(self.text(value))
+        self._open.pop()
+        self._generator.endElement(name)
+        self._has_children = True
+
+    @contextmanager
+    def tag(self, name: str, attrs: dict = None):
+        self.start(name, attrs)
+        yield self
+        self.end()
+
+
+class HPXMLEmitter:
+    """Write the HPXML 4.0 document of a house from its H2K data, without the BuildResidentialHPXML measure.
+
+    The document has the shape of the ASHRAE Standard 140 test files in tests/ASHRAE_Standard_140/HPXML:
+    building summary, weather station, air infiltration, attic, roofs, rim joists (floor headers), walls,
+    frame floors (attic and exposed floors), windows, doors, HVAC plant and controls and water heaters.
+    It is streamed to the output with an XMLStreamWriter, no DOM is built. Ids are the H2K component ids,
+    e.g. Wall1 for the wall with id 1. Foundations (basements, crawlspaces, slabs and walkouts, with their
+    windows, doors and floor headers) and heat pumps are not written yet: write() issues an
+    UnsupportedComponentsWarning for the foundations of the house, turn it into an error with
+    warnings.simplefilter('error', UnsupportedComponentsWarning).
+    """
+
+    NAMESPACE = 'http://hpxmlonline.com/2019/10'
+    SCHEMA_VERSION = '4.0'
+    GENERATED_BY = 'h2k_to_hpxml'
+
+    def __init__(self, path_to_h2k, path_to_h2k_schema=None, created: str = None, **parse_options) -> None:
+        # path_to_h2k can also be a ParseH2K already parsed
+        # created: CreatedDateAndTime of the documents, the time of the call to write by default
+        # parse_options are passed to ParseH2K, e.g. backend='trusted'
+        if isinstance(path_to_h2k, ParseH2K):
+            self.h2k_parameters = path_to_h2k
+        else:
+            self.h2k_parameters = ParseH2K(path_to_h2k, path_to_h2k_schema, **parse_options)
+        self.created = created
+
+    def write(self, output) -> None:
+        # output: path or binary stream
+        self._warn_unsupported()
+        if not isinstance(output, (str, os.PathLike)):
+            self._write(output)
+            return
+        # The document is written next to the output and renamed, no partial file is left on errors
+        tmp_path = f"{os.fspath(output)}.tmp"
+        try:
+            with open(tmp_path, 'wb') as xml_file:
+                self._write(xml_file)
+            os.replace(tmp_path, output)
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+
+    def _write(self, output) -> None:
+        writer = XMLStreamWriter(output)
+        writer.start_document()
+        with writer.tag('HPXML', {'xmlns': self.NAMESPACE,
+                                  'xmlns:xsi': 'http://www.w3.org/2001/XMLSchema-instance',
+                                  'xsi:schemaLocation': self.NAMESPACE,
+                                  'schemaVersion': self.SCHEMA_VERSION}):
+            self._header(writer)
+            with writer.tag('Building'):
+                writer.element('BuildingID', attrs={'id': 'MyBuilding'})
+                with writer.tag('ProjectStatus'):
+                    writer.element('EventType', 'proposed workscope')
+                with writer.tag('BuildingDetails'):
+                    self._building_summary(writer)
+                    self._climate(writer)
+                    self._enclosure(writer)
+                    self._systems(writer)
+        writer.end_document()
+
+    def _warn_unsupported(self) -> None:
+        components = self.h2k_parameters.components
+        dropped = []
+        for foundation_type in H2K_FOUNDATION_TYPES:
+            for foundation in components.of_type(foundation_type, section=foundation_type):
+                children = [child.type for child in components.children(foundation)]
+                held = ', '.join(f"{children.count(child_type)} {child_type}"
+                                 for child_type in sorted(set(children)))
+                dropped.append(f"{foundation_type} {foundation.id}" + (f" ({held})" if held else ''))
+        if dropped:
+            warnings.warn(f"{self.h2k_parameters.file}: foundations are not written to the HPXML document: "
+                          f"{'; '.join(dropped)}", UnsupportedComponentsWarning, stacklevel=3)
+
+    def _header(self, writer: XMLStreamWriter) -> None:
+        created = self.created or datetime.now().astimezone().isoformat(timespec='seconds')
+        with writer.tag('XMLTransactionHeaderInformation'):
+            writer.element('XMLType', 'HPXML')
+            writer.element('XMLGeneratedBy', self.GENERATED_BY)
+            writer.element('CreatedDateAndTime', created)
+            writer.element('Transaction', 'create')
+        with writer.tag('SoftwareInfo'):
+            writer.element('SoftwareProgramUsed', 'HOT2000')
+            version = self.h2k_parameters.get_version()
+            writer.element('SoftwareProgramVersion', f"{version['@major']}.{version['@minor']}")
+
+    def _building_summary(self, writer: XMLStreamWriter) -> None:
+        h2k = self.h2k_parameters
+        rooms = h2k.get_n_rooms()
+        heated_area = h2k.get_heated_area()
+        floors_above_grade = H2K_STOREYS_TO_HPXML[h2k.get_n_storey()['@code']]
+        residents = sum(occupancy['@occupants'] for occupancy in (
+            h2k.get_occupancy_adult(), h2k.get_occupancy_children(), h2k.get_occupancy_infants()))
+        with writer.tag('BuildingSummary'):
+            with writer.tag('BuildingOccupancy'):
+                writer.element('NumberofResidents', float(residents))
+            with writer.tag('BuildingConstruction'):
+                writer.element('ResidentialFacilityType', facility_type(h2k.get_house_type()['English']))
+                writer.element('NumberofConditionedFloors',
+                               float(floors_above_grade + (1 if heated_area['@belowGrade'] > 0 else 0)))
+                writer.element('NumberofConditionedFloorsAboveGrade', float(floors_above_grade))
+                writer.element('NumberofBedrooms', rooms['@bedrooms'])
+                writer.element('NumberofBathrooms', rooms['@bathrooms'])
+                writer.element('ConditionedFloorArea',
+                               round(float(heated_area['@aboveGrade'] + heated_area['@belowGrade']) * M2_TO_FT2, 1))
+                writer.element('ConditionedBuildingVolume', round(h2k.get_house_volume() * M3_TO_FT3, 1))
+
+    def _climate(self, writer: XMLStreamWriter) -> None:
+        with writer.tag('ClimateandRiskZones'):
+            with writer.tag('WeatherStation'):
+                writer.element('SystemIdentifier', attrs={'id': 'WeatherStation'})
+                writer.element('Name', f"{self.h2k_parameters.get_climate_city()}, "
+                                       f"{self.h2k_parameters.get_climate_Prov()}")
+
+    def _enclosure(self, writer: XMLStreamWriter) -> None:
+        h2k = self.h2k_parameters
+        ceilings, _ = h2k.get_ceiling_spec()
+        attic_ceilings = [ceiling for ceiling in ceilings if ceiling.type.startswith(('Attic', 'Scissor'))]
+        with writer.tag('Enclosure'):
+            volume = round(h2k.get_house_volume() * M3_TO_FT3, 1)
+            with writer.tag('AirInfiltration'):
+                with writer.tag('AirInfiltrationMeasurement'):
+                    writer.element('SystemIdentifier', attrs={'id': 'AirInfiltrationMeasurement1'})
+                    writer.element('HousePressure', 50.0)
+                    with writer.tag('BuildingAirLeakage'):
+                        writer.element('UnitofMeasure', 'ACH')
+                        writer.element('AirLeakage', round(float(h2k.get_infiltration()['@airChangeRate']), 2))
+                    writer.element('InfiltrationVolume', volume)
+
+            if attic_ceilings:
+                with writer.tag('Attics'):
+                    with writer.tag('Attic'):
+                        writer.element('SystemIdentifier', attrs={'id': 'Attic1'})
+                        with writer.tag('AtticType'):
+                            with writer.tag('Attic'):
+                                writer.element('Vented', True)
+                        with writer.tag('VentilationRate'):
+                            writer.element('UnitofMeasure', 'ACHnatural')
+                            writer.element('Value', float(h2k.get_roofcavity_spec()['@ventilationRate']))
+                        for ceiling in attic_ceilings:
+                            writer.element('AttachedToRoof', attrs={'idref': f"Roof{ceiling.id}"})
+                        for ceiling in attic_ceilings:
+                            writer.element('AttachedToFrameFloor', attrs={'idref': f"FrameFloor{ceiling.id}"})
+
+            if ceilings:
+                with writer.tag('Roofs'):
+                    for ceiling in ceilings:
+                        in_attic = ceiling in attic_ceilings
+                        slope = float(ceiling.slopeValue)
+                        with writer.tag('Roof'):
+                            writer.element('SystemIdentifier', attrs={'id': f"Roof{ceiling.id}"})
+                            writer.element('InteriorAdjacentTo', 'attic - vented' if in_attic else 'living space')
+                            writer.element('Area', round(float(ceiling.area) * math.sqrt(1 + slope ** 2) * M2_TO_FT2,
+                                                         1))
+                            writer.element('Pitch', round(slope * 12, 1))
+                            writer.element('RadiantBarrier', False)
+                            if in_attic:
+                                self._insulation(writer, f"Roof{ceiling.id}", r_value=UNINSULATED_ROOF_R)
+                            else:
+                                self._insulation(writer, f"Roof{ceiling.id}", rsi=ceiling.rValue)
+
+            headers = h2k.get_floor_header()
+            if headers:
+                with writer.tag('RimJoists'):
+                    for header in headers:
+                        with writer.tag('RimJoist'):
+                            writer.element('SystemIdentifier', attrs={'id': f"RimJoist{header.id}"})
+                            writer.element('ExteriorAdjacentTo', 'outside')
+                            writer.element('InteriorAdjacentTo', 'living space')
+                            writer.element('Area', round(float(header.height * header.perimeter) * M2_TO_FT2, 1))
+                            self._insulation(writer, f"RimJoist{header.id}", rsi=header.rValue)
+
+            walls = h2k.get_walls_spec()
+            if walls:
+                with writer.tag('Walls'):
+                    for wall in walls:
+                        with writer.tag('Wall'):
+                            writer.element('SystemIdentifier', attrs={'id': f"Wall{wall.id}"})
+                            writer.element('ExteriorAdjacentTo', 'outside')
+                            writer.element('InteriorAdjacentTo', 'living space')
+                            with writer.tag('WallType'):
+                                writer.element('WoodStud')
+                            writer.element('Area', round(float(wall.height * wall.perimeter) * M2_TO_FT2, 1))
+                            self._insulation(writer, f"Wall{wall.id}", rsi=wall.rValue)
+
+            floors = h2k.get_exposed_floor()
+            if attic_ceilings or floors:
+                with writer.tag('FrameFloors'):
+                    for component, exterior in [(ceiling, 'attic - vented') for ceiling in attic_ceilings] + \
+                            [(floor, 'outside') for floor in floors]:
+                        with writer.tag('FrameFloor'):
+                            writer.element('SystemIdentifier', attrs={'id': f"FrameFloor{component.id}"})
+                            writer.element('ExteriorAdjacentTo', exterior)
+                            writer.element('InteriorAdjacentTo', 'living space')
+                            writer.element('Area', round(float(component.area) * M2_TO_FT2, 1))
+                            self._insulation(writer, f"FrameFloor{component.id}", rsi=component.rValue)
+
+            doors, door_windows = h2k.get_doors_spec()
+            # Windows of doors are attached to the wall of their door
+            door_walls = {door.id: door.parent_id for door in doors}
+            windows = [(window, window.parent_id) for window in h2k.get_windows_spec()] + \
+                [(window, door_walls[window.parent_id]) for window in door_windows]
+            if windows:
+                with writer.tag('Windows'):
+                    for window, wall_id in windows:
+                        # HOT2000 uses millimetres for the window dimensions
+                        area = float(window.height * window.width * window.number) * 1e-6
+                        with writer.tag('Window'):
+                            writer.element('SystemIdentifier', attrs={'id': f"Window{window.id}"})
+                            writer.element('Area', round(area * M2_TO_FT2, 1))
+                            writer.element('Azimuth', azimuth(window.facingDirectionCode))
+                            writer.element('UFactor', round(1 / (float(window.rValue) * RSI_TO_R), 3))
+                            writer.element('SHGC', round(float(window.shgc), 3))
+                            writer.element('AttachedToWall', attrs={'idref': f"Wall{wall_id}"})
+
+            if doors:
+                with writer.tag('Doors'):
+                    for door in doors:
+                        with writer.tag('Door'):
+                            writer.element('SystemIdentifier', attrs={'id': f"Door{door.id}"})
+                            writer.element('AttachedToWall', attrs={'idref': f"Wall{door.parent_id}"})
+                            writer.element('Area', round(float(door.height * door.width) * M2_TO_FT2, 1))
+                            writer.element('RValue', round(float(door.rValue) * RSI_TO_R, 2))
+
+    @staticmethod
+    def _insulation(writer: XMLStreamWriter, parent_id: str, rsi=None, r_value: float = None) -> None:
+        # Insulation of a component given either the RSI of the H2K file or an R-value
+        if rsi is not None:
+            r_value = float(rsi) * RSI_TO_R
+        with writer.tag('Insulation'):
+            writer.element('SystemIdentifier', attrs={'id': f"{parent_id}Insulation"})
+            writer.element('AssemblyEffectiveRValue', round(r_value, 2))
+
+    def _systems(self, writer: XMLStreamWriter) -> None:
+        h2k = self.h2k_parameters
+        heating_systems = [system for system in h2k.get_heating_system_spec()
+                           if system is not None and system[0] in H2K_HEATING_SYSTEMS_TO_HPXML]
+        cooling_systems = h2k.get_coolingsystem_spec()
+        setpoints = h2k.get_maintemp_setpoint()
+        water_heaters = [water for water in h2k.get_hotwater_spec()[0] if water.systemtype == 'Primary']
+        with writer.tag('Systems'):
+            with writer.tag('HVAC'):
+                if heating_systems or cooling_systems:
+                    with writer.tag('HVACPlant'):
+                        for index, (system_type, spec) in enumerate(heating_systems, 1):
+                            hpxml_type, efficiency_units = H2K_HEATING_SYSTEMS_TO_HPXML[system_type]
+                            with writer.tag('HeatingSystem'):
+                                writer.element('SystemIdentifier', attrs={'id': f"HeatingSystem{index}"})
+                                with writer.tag('HeatingSystemType'):
+                                    writer.element(hpxml_type)
+                                writer.element('HeatingSystemFuel', H2K_FUELS_TO_HPXML[spec['fuel']])
+                                writer.element('HeatingCapacity', round(float(spec['capacity']) * KW_TO_BTU_HR, 1))
+                                with writer.tag('AnnualHeatingEfficiency'):
+                                    writer.element('Units', efficiency_units)
+                                    writer.element('Value', round(float(spec['efficiency']), 3))
+                                # The backup system of a house with two systems serves no load by default
+                                writer.element('FractionHeatLoadServed', 1.0 if index == 1 else 0.0)
+                        for index, cooling_system in enumerate(cooling_systems, 1):
+                            with writer.tag('CoolingSystem'):
+                                writer.element('SystemIdentifier', attrs={'id': f"CoolingSystem{index}"})
+                                writer.element('CoolingSystemType',
+                                               H2K_COOLING_SYSTEM_TYPES_TO_HPXML[cooling_system['code']])
+                                writer.element('CoolingSystemFuel', 'electricity')
+                                writer.element('CoolingCapacity',
+                                               round(float(cooling_system['capacity']) * KW_TO_BTU_HR, 1))
+                                writer.element('FractionCoolLoadServed', 1.0 if index == 1 else 0.0)
+                                with writer.tag('AnnualCoolingEfficiency'):
+                                    writer.element('Units', 'EER' if cooling_system['isCop'] else 'SEER')
+                                    writer.element('Value', float(cooling_system['efficiency']))
+                with writer.tag('HVACControl'):
+                    writer.element('SystemIdentifier', attrs={'id': 'HVACControl1'})
+                    writer.element('SetpointTempHeatingSeason',
+                                   celsius_to_fahrenheit(setpoints['@daytimeHeatingSetPoint']))
+                    writer.element('SetbackTempHeatingSeason',
+                                   celsius_to_fahrenheit(setpoints['@nighttimeHeatingSetPoint']))
+                    writer.element('TotalSetbackHoursperWeekHeating',
+                                   float(setpoints['@nighttimeSetbackDuration']) * 7)
+                    writer.element('SetpointTempCoolingSeason', celsius_to_fahrenheit(setpoints['@coolingSetPoint']))
+
+            if water_heaters:
+                with writer.tag('WaterHeating'):
+                    for index, water in enumerate(water_heaters, 1):
+                        with writer.tag('WaterHeatingSystem'):
+                            writer.element('SystemIdentifier', attrs={'id': f"WaterHeatingSystem{index}"})
+                            writer.element('FuelType', H2K_FUELS_TO_HPXML[water.energysource])
+                            for hpxml_type, h2k_types in HPXML_WATER_HEATER_TYPES_TO_H2K.items():
+                                if water.tanktype in h2k_types:
+                                    writer.element('WaterHeaterType', hpxml_type)
+                                    break
+                            writer.element('TankVolume', round(float(water.tankvolume) * L_TO_GAL, 0))
+                            writer.element('FractionDHWLoadServed', 1.0 if index == 1 else 0.0)
+                            writer.element('EnergyFactor', float(water.energyfactor))
+
+
+def write_hpxml(path_to_h2k, output, path_to_h2k_schema=None, **parse_options) -> None:
+    # Write the HPXML document of an H2K file to output, a path or a binary stream
+    HPXMLEmitter(path_to_h2k, path_to_h2k_schema, **parse_options).write(output)
@@ -0,0 +1,129 @@
+import hashlib
+import json
+import os
+from time import perf_counter, time
+
+from hpxml_builder import BuildHPXML
+from schema_registry import schema_digest, sha256_file, warm_schema
+from worker_pool import imap
+
+
+class BuildHPXMLFleet:
+    """Build the HPXML workflow JSON of many H2K files from one template, in a pool of worker processes.
+
+    The progress is appended to a JSON lines manifest in output_dir, one entry per house with the hash of
+    the H2K file, the hash of its schema, the parse options, the output path, the status and the build
+    time. A new run with the same template, schema and options skips the houses that were already built
+    from an unchanged file, so an interrupted run can be resumed.
+    """
+
+    MANIFEST = 'manifest.jsonl'
+
+    def __init__(self, path_to_hpxml_template: str, path_to_h2k_schema, output_dir: str, workers: int = None,
+                 **parse_options) -> None:
+        # parse_options are passed to ParseH2K, e.g. backend='trusted'
+        self.template_dict = BuildHPXML._read_json(path_to_hpxml_template)
+        self.template_hash = hashlib.sha256(
+            json.dumps(self.template_dict, sort_keys=True).encode()).hexdigest()
+        self.schema = path_to_h2k_schema
+        self.output_dir = output_dir
+        self.workers = workers
+        self.parse_options = parse_options
+        # Options of ParseH2K that change the decoded values, recorded in the manifest
+        backend = parse_options.get('backend', 'xmlschema')
+        self.options = {'backend': backend,
+                        'validation': parse_options.get('validation', 'strict') if backend == 'xmlschema' else 'skip',
+                        'numeric': parse_options.get('numeric', 'decimal')}
+        self.manifest_path = os.path.join(output_dir, self.MANIFEST)
+
+    def output_path(self, h2k_file: str) -> str:
+        return os.path.join(self.output_dir, os.path.splitext(os.path.basename(h2k_file))[0] + '.json')
+
+    def read_manifest(self) -> dict:
+        # Latest entry of each house, keyed by the absolute path of its H2K file
+        entries = {}
+        if not os.path.exists(self.manifest_path):
+            return entries
+        with open(self.manifest_path) as manifest:
+            for line in manifest:
+                try:
+                    entry = json.loads(line)
+                except ValueError:
+                    # Last line of an interrupted run
+                    continue
+                entries[os.path.abspath(entry['h2k_file'])] = entry
+        return entries
+
+    def schema_hash(self, h2k_file: str) -> str:
+        # Hash of the XSD file the house is parsed with, None if it is unknown
+        if self.options['backend'] == 'trusted':
+            return 'trusted'
+        try:
+            return schema_digest(self.schema, h2k_file)
+        except Exception:
+            # e.g. a file whose version cannot be read, its build fails and reports the error
+            return None
+
+    def is_done(self, entry: dict, input_hash: str, schema_hash: str) -> bool:
+        # Entries written before the schema hash and the options were recorded are built again
+        return (entry is not None and entry['status'] == 'done' and entry['sha256'] == input_hash
+                and entry['template_sha256'] == self.template_hash
+                and entry.get('schema_sha256') == schema_hash and entry.get('options') == self.options
+                and os.path.exists(entry['output']))
+
+    def run(self, h2k_files):
+        # Build the houses and yield their manifest entries as they are built, in completion order.
+        # Houses that are already done are yielded first with the status 'skipped'.
+        os.makedirs(self.output_dir, exist_ok=True)
+        finished = self.read_manifest()
+        outputs = {}
+        tasks = []
+        for h2k_file in h2k_files:
+            output = self.output_path(h2k_file)
+            if outputs.setdefault(output, h2k_file) != h2k_file:
+                raise ValueError(f"{h2k_file} and {outputs[output]} would both be written to {output}")
+            input_hash = sha256_file(h2k_file)
+            schema_hash = self.schema_hash(h2k_file)
+            entry = finished.get(os.path.abspath(h2k_file))
+            if self.is_done(entry, input_hash, schema_hash):
+                yield dict(entry, status='skipped')
+            else:
+                tasks.append((h2k_file, input_hash, schema_hash, output))
+
+        with open(self.manifest_path, 'a') as manifest:
+            for entry in imap(_build_house, tasks, self.workers, initializer=_init_worker,
+                              initargs=(self.template_dict, self.template_hash, self.schema, self.parse_options,
+                                        self.options),
+                              ordered=False):
+                manifest.write(json.dumps(entry) + '\n')
+                # Flushed per house so that an interrupted run loses at most the houses in progress
+                manifest.flush()
+                yield entry
+
+
+# Template, schema and parser options of the current worker process of BuildHPXMLFleet.run
+_worker_state = {}
+
+
+def _init_worker(template_dict: dict, template_hash: str, schema, parse_options: dict, options: dict) -> None:
+    _worker_state.update(template_dict=template_dict, template_hash=template_hash, schema=schema,
+                         parse_options=parse_options, options=options)
+    if parse_options.get('backend', 'xmlschema') == 'xmlschema':
+        warm_schema(schema)
+
+
+def _build_house(task: tuple) -> dict:
+    h2k_file, input_hash, schema_hash, output = task
+    entry = {'h2k_file': h2k_file, 'sha256': input_hash, 'template_sha256': _worker_state['template_hash'],
+             'schema_sha256': schema_hash, 'options': _worker_state['options'], 'output': output,
+             'status': 'done', 'error': None}
+    start = perf_counter()
+    try:
+        builder = BuildHPXML(_worker_state['template_dict'], h2k_file, _worker_state['schema'],
+                             **_worker_state['parse_options'])
+        builder.update_steps()
+        builder.write_workflow(output)
+    except Exception as error:
+        entry.update(status='failed', error=f"{type(error).__name__}: {error}")
+    entry.update(seconds=round(perf_counter() - start, 4), finished=time())
+    return entry
@@ -0,0 +1,135 @@
+from itertools import islice
+import os.path
+from time import perf_counter
+from typing import NamedTuple
+import xml.etree.ElementTree as ET
+
+from schema_registry import resolve_schema, warm_schema
+from worker_pool import imap
+
+# HPXML schema shipped with the repository, HPXML 2.3
+HPXML_SCHEMA = os.path.join(os.path.dirname(os.path.abspath(__file__)), os.path.pardir, 'schemas', 'hpxml',
+                            'HPXML.xsd')
+HPXML_2_NAMESPACE = 'http://hpxmlonline.com/2014/6'
+# Namespace of the HPXML 4.0 documents written by HPXMLEmitter and read by OpenStudio-HPXML
+HPXML_4_NAMESPACE = 'http://hpxmlonline.com/2019/10'
+
+
+def default_schemas() -> dict:
+    # XSD file of each HPXML namespace: the shipped HPXML 2.3 schema and, when the HPXML_4_SCHEMA
+    # environment variable is set, the HPXML 4.0 schema it points to, e.g. the
+    # HPXMLtoOpenStudio/resources/hpxml_schema/HPXML.xsd file of an OpenStudio-HPXML checkout
+    schemas = {HPXML_2_NAMESPACE: HPXML_SCHEMA}
+    if os.environ.get('HPXML_4_SCHEMA'):
+        schemas[HPXML_4_NAMESPACE] = os.environ['HPXML_4_SCHEMA']
+    return schemas
+
+
+class ValidationIssue(NamedTuple):
+    # Schema error of an HPXML document, path is the XPath of the element (None for a file that can not be read)
+    path: str
+    reason: str
+
+
+class ValidationReport(NamedTuple):
+    # Outcome of one file of HPXMLValidator.validate, status is 'valid', 'invalid', 'failed', 'unsupported'
+    # (no schema for the namespace of the document) or 'skipped'
+    hpxml_file: str
+    status: str
+    issues: tuple
+    seconds: float
+
+
+class HPXMLValidator:
+    """Validate HPXML documents against XSD schemas in a pool of worker processes.
+
+    Each document is validated against the schema of its root namespace, from default_schemas() unless
+    schema is given. The schemas are compiled once per worker through the schema registry (set
+    H2K_SCHEMA_CACHE to load them from disk in new workers). Each file gets a ValidationReport with its
+    schema errors, at most max_errors per file, or the status unsupported when there is no schema for its
+    namespace. With sample_every=N only every Nth file is validated and the others are reported as
+    skipped, for large production runs where validating every file is too slow.
+    """
+
+    def __init__(self, schema=None, workers: int = None, sample_every: int = 1, max_errors: int = 100) -> None:
+        # schema: mapping of namespaces to XSD files or compiled schemas, or a single XSD file or compiled
+        # schema used for the documents of its target namespace
+        if sample_every < 1:
+            raise ValueError("sample_every must be at least 1")
+        self.schema = default_schemas() if schema is None else schema
+        self.workers = workers
+        self.sample_every = sample_every
+        self.max_errors = max_errors
+
+    def validate(self, hpxml_files, ordered: bool = False):
+        # Yield a ValidationReport per file as they complete, or in the order of the files when ordered.
+        # The files are read lazily, so the input can be a generator of any length.
+        tasks = ((hpxml_file, index % self.sample_every == 0) for index, hpxml_file in enumerate(hpxml_files))
+        return imap(_validate_task, tasks, self.workers, initializer=_init_worker,
+                    initargs=(self.schema, self.max_errors), ordered=ordered)
+
+    def validate_one(self, hpxml_file: str) -> ValidationReport:
+        return validate_file(hpxml_file, self.schema, self.max_errors)
+
+
+def summarize(reports) -> dict:
+    # Number of files per status and the issues of the files that are not valid
+    summary = {'files': 0, 'valid': 0, 'invalid': 0, 'failed': 0, 'unsupported': 0, 'skipped': 0, 'issues': {}}
+    for report in reports:
+        summary['files'] += 1
+        summary[report.status] += 1
+        if report.issues:
+            summary['issues'][report.hpxml_file] = [issue._asdict() for issue in report.issues]
+    return summary
+
+
+def root_namespace(hpxml_file: str) -> str:
+    # Namespace of the root element, read without parsing the rest of the document
+    with open(hpxml_file, 'rb') as xml_file:
+        for _, element in ET.iterparse(xml_file, events=('start',)):
+            return element.tag[1:].split('}')[0] if element.tag.startswith('{') else ''
+
+
+def schema_for_namespace(schema, namespace: str):
+    # Compiled schema of a namespace from the schema argument of HPXMLValidator, None if there is none
+    if isinstance(schema, dict):
+        schema = schema.get(namespace)
+        return None if schema is None else resolve_schema(schema)
+    schema = resolve_schema(schema)
+    return schema if schema.target_namespace == namespace else None
+
+
+def validate_file(hpxml_file: str, schema, max_errors: int = 100) -> ValidationReport:
+    # schema: as the schema argument of HPXMLValidator
+    start = perf_counter()
+    try:
+        namespace = root_namespace(hpxml_file)
+        xsd = schema_for_namespace(schema, namespace)
+        if xsd is None:
+            # e.g. an HPXML 4.0 document (http://hpxmlonline.com/2019/10) without an HPXML 4.0 schema
+            return ValidationReport(hpxml_file, 'unsupported',
+                                    (ValidationIssue('/', f"No schema for the namespace {namespace!r}"),),
+                                    perf_counter() - start)
+        issues = tuple(ValidationIssue(error.path, error.reason)
+                       for error in islice(xsd.iter_errors(hpxml_file), max_errors))
+    except Exception as error:
+        return ValidationReport(hpxml_file, 'failed', (ValidationIssue(None, f"{type(error).__name__}: {error}"),),
+                                perf_counter() - start)
+    return ValidationReport(hpxml_file, 'invalid' if issues else 'valid', issues, perf_counter() - start)
+
+
+# Schema and options of the current worker process of HPXMLValidator.validate
+_worker_state = {}
+
+
+def _init_worker(schema, max_errors: int) -> None:
+    _worker_state.update(schema=schema, max_errors=max_errors)
+    for xsd in (schema.values() if isinstance(schema, dict) else [schema]):
+        warm_schema(xsd)
+
+
+def _validate_task(task: tuple) -> ValidationReport:
+    hpxml_file, sampled = task
+    if not sampled:
+        return ValidationReport(hpxml_file, 'skipped', (), 0.0)
+    return validate_file(hpxml_file, _worker_state['schema'], _worker_state['max_errors'])
@@ -0,0 +1,192 @@
+import hashlib
+import os
+import pickle
+import tempfile
+import threading
+from urllib.parse import urlsplit
+from urllib.request import url2pathname
+
+import xmlschema
+
+from h2k_sniffer import SniffH2K
+
+# Schemas shipped in schemas/h2k, by the HOT2000 (major, minor) version of the files they describe
+SCHEMAS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), os.path.pardir, 'schemas', 'h2k')
+DEFAULT_VERSIONS = {(11, 4): os.path.join(SCHEMAS_DIR, 'H2k Schema.xsd')}
+
+
+def sha256_file(path: str, chunk_size: int = 1 << 20) -> str:
+    digest = hashlib.sha256()
+    with open(path, 'rb') as content:
+        for chunk in iter(lambda: content.read(chunk_size), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class SchemaRegistry:
+    """Compile each H2K schema once per process, keyed by the content hash of the XSD file.
+
+    With versions, a mapping of HOT2000 (major, minor) versions to XSD files, schema_for() reads the
+    Application/Version of an H2K file from its header and returns the schema of that version. Files of
+    other versions use default_schema. versions defaults to DEFAULT_VERSIONS, the bundled schemas, and
+    versions={} disables the selection.
+    """
+
+    def __init__(self, default_schema: str = None, cache_dir: str = None, versions: dict = None) -> None:
+        self.default_schema = default_schema
+        # Compiled schemas are pickled to cache_dir so that new worker processes start warm
+        self.cache_dir = cache_dir if cache_dir is not None else os.environ.get('H2K_SCHEMA_CACHE')
+        self.versions = {}
+        for (major, minor), schema_file in (DEFAULT_VERSIONS if versions is None else versions).items():
+            self.register(major, minor, schema_file)
+        self._schemas = {}
+        self._file_hashes = {}
+        self._file_versions = {}
+        self._lock = threading.Lock()
+
+    def __getstate__(self) -> dict:
+        # Only the configuration travels to other processes, the compiled schemas are reloaded there
+        return {'default_schema': self.default_schema, 'cache_dir': self.cache_dir, 'versions': self.versions}
+
+    def __setstate__(self, state: dict) -> None:
+        self.__init__(**state)
+
+    def __contains__(self, schema_file: str) -> bool:
+        return self.file_hash(schema_file) in self._schemas
+
+    def __len__(self) -> int:
+        return len(self._schemas)
+
+    def file_hash(self, schema_file: str) -> str:
+        stat = os.stat(schema_file)
+        stamp = (os.path.abspath(schema_file), stat.st_mtime_ns, stat.st_size)
+        digest = self._file_hashes.get(stamp)
+        if digest is None:
+            digest = self._file_hashes[stamp] = sha256_file(schema_file)
+        return digest
+
+    def get(self, schema_file: str = None) -> xmlschema.XMLSchema:
+        if schema_file is None:
+            schema_file = self.default_schema
+        if schema_file is None:
+            raise ValueError("No schema file given and the registry has no default schema")
+
+        digest = self.file_hash(schema_file)
+        schema = self._schemas.get(digest)
+        if schema is None:
+            with self._lock:
+                schema = self._schemas.get(digest)
+                if schema is None:
+                    schema = self._load(digest)
+                    if schema is None:
+                        schema = xmlschema.XMLSchema(schema_file)
+                        self._dump(digest, schema)
+                    self._schemas[digest] = schema
+        return schema
+
+    def register(self, major: int, minor: int, schema_file: str) -> None:
+        self.versions[(int(major), int(minor))] = schema_file
+
+    def file_version(self, h2k_file: str) -> tuple:
+        # HOT2000 (major, minor) version of an H2K file, sniffed from its header
+        stat = os.stat(h2k_file)
+        stamp = (os.path.abspath(h2k_file), stat.st_mtime_ns, stat.st_size)
+        version = self._file_versions.get(stamp)
+        if version is None:
+            sniffed = SniffH2K(h2k_file).get_version()
+            version = self._file_versions[stamp] = (sniffed['@major'], sniffed['@minor'])
+        return version
+
+    def schema_file_for(self, h2k_file: str) -> str:
+        schema_file = None
+        if self.versions and h2k_file is not None:
+            version = self.file_version(h2k_file)
+            schema_file = self.versions.get(version)
+            if schema_file is None and self.default_schema is None:
+                raise ValueError(f"No schema registered for HOT2000 {version[0]}.{version[1]} ({h2k_file})")
+        if schema_file is None:
+            schema_file = self.default_schema
+        if schema_file is None:
+            raise ValueError("The registry has no default schema")
+        return schema_file
+
+    def schema_for(self, h2k_file: str) -> xmlschema.XMLSchema:
+        return self.get(self.schema_file_for(h2k_file))
+
+    def warm(self) -> None:
+        # Compile or load all the schemas of the registry, e.g. when a worker process starts
+        for schema_file in [self.default_schema, *self.versions.values()]:
+            if schema_file is not None:
+                self.get(schema_file)
+
+    def digest_for(self, h2k_file: str) -> str:
+        # Content hash of the XSD file that schema_for returns
+        return self.file_hash(self.schema_file_for(h2k_file))
+
+    def clear(self) -> None:
+        self._schemas.clear()
+        self._file_hashes.clear()
+
+    def _cache_path(self, digest: str) -> str:
+        # The xmlschema version is part of the name as pickles are not portable across releases
+        return os.path.join(self.cache_dir, f"{digest}-xmlschema-{xmlschema.__version__}.pickle")
+
+    def _load(self, digest: str):
+        if not self.cache_dir:
+            return None
+        try:
+            with open(self._cache_path(digest), 'rb') as cached:
+                return pickle.load(cached)
+        except Exception:
+            # A missing, truncated or stale pickle is recompiled and overwritten
+            return None
+
+    def _dump(self, digest: str, schema: xmlschema.XMLSchema) -> None:
+        if not self.cache_dir:
+            return
+        os.makedirs(self.cache_dir, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=self.cache_dir, suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'wb') as tmp_file:
+                pickle.dump(schema, tmp_file, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(tmp_path, self._cache_path(digest))
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+
+
+default_registry = SchemaRegistry()
+
+
+def resolve_schema(schema, h2k_file: str = None) -> xmlschema.XMLSchema:
+    # Accepts a path to an XSD file, an already compiled schema or a registry handle. Without a schema,
+    # the bundled schema of the version of h2k_file is used.
+    if isinstance(schema, xmlschema.XMLSchemaBase):
+        return schema
+    if isinstance(schema, SchemaRegistry):
+        return schema.schema_for(h2k_file)
+    if schema is None and h2k_file is not None:
+        return default_registry.schema_for(h2k_file)
+    return default_registry.get(schema)
+
+
+def schema_digest(schema, h2k_file: str = None) -> str:
+    # Content hash of the XSD file behind any schema accepted by resolve_schema, None if it is unknown
+    if isinstance(schema, SchemaRegistry):
+        return schema.digest_for(h2k_file)
+    if schema is None and h2k_file is not None:
+        return default_registry.digest_for(h2k_file)
+    if isinstance(schema, xmlschema.XMLSchemaBase):
+        if not schema.url or not schema.url.startswith('file:'):
+            return None
+        schema = url2pathname(urlsplit(schema.url).path)
+    return default_registry.file_hash(schema)
+
+
+def warm_schema(schema) -> None:
+    # Compile or load any schema accepted by resolve_schema ahead of the first parse
+    if isinstance(schema, SchemaRegistry):
+        schema.warm()
+    elif schema is not None:
+        resolve_schema(schema)
@@ -0,0 +1,92 @@
+import hashlib
+import json
+import os
+import os.path
+import threading
+import zipfile
+
+from disk_cache import DiskLRUCache
+from schema_registry import sha256_file
+
+
+class SimulationCache:
+    """On-disk cache of simulation outputs, keyed by what determines them: the steps of the workflow
+    with their arguments, the rest of the workflow (measure paths, ...), the simulation command and the
+    content of the weather file. The outputs of a run are stored as one zip archive and the least
+    recently used runs are evicted above max_bytes.
+    """
+
+    DEFAULT_MAX_BYTES = 10 * 1024 ** 3
+    # Argument of BuildResidentialHPXML with the path of the EPW weather file
+    WEATHER_ARGUMENT = 'weather_station_epw_filepath'
+    # Keys of the workflow that do not change the outputs
+    IGNORED_KEYS = ('run_directory',)
+
+    def __init__(self, directory: str, max_bytes: int = DEFAULT_MAX_BYTES) -> None:
+        self.directory = directory
+        self.store = DiskLRUCache(directory, max_bytes)
+        # The cache is shared by the threads of SimulationRunner
+        self._lock = threading.Lock()
+
+    def weather_file(self, workflow_dict: dict, workflow_dir: str) -> str:
+        # Path of the weather file of the workflow, looked up like OpenStudio does: as is, then next to
+        # the workflow and in its file_paths. None when there is no weather argument or file.
+        for step in workflow_dict.get('steps', []):
+            name = step.get('arguments', {}).get(self.WEATHER_ARGUMENT)
+            if name is None:
+                continue
+            candidates = [name, os.path.join(workflow_dir, name)]
+            candidates.extend(os.path.join(workflow_dir, path, name) for path in workflow_dict.get('file_paths', []))
+            for candidate in candidates:
+                if os.path.isfile(candidate):
+                    return candidate
+        return None
+
+    def key(self, workflow_dict: dict, workflow_dir: str, command=()) -> str:
+        # workflow_dir: directory the relative paths of the workflow are resolved from
+        workflow = {key: value for key, value in workflow_dict.items() if key not in self.IGNORED_KEYS}
+        weather_file = self.weather_file(workflow_dict, workflow_dir)
+        parts = [json.dumps(workflow, sort_keys=True, default=str), json.dumps(list(command)),
+                 '' if weather_file is None else sha256_file(weather_file)]
+        return hashlib.sha256('\0'.join(parts).encode()).hexdigest()
+
+    def restore(self, key: str, output_dir: str) -> tuple:
+        # Extract the cached outputs to output_dir, returns their paths relative to output_dir or None on
+        # a miss. The archive is read from the cache file, not loaded in memory.
+        with self._lock:
+            path = self.store.get_path(key)
+        if path is None:
+            return None
+        try:
+            with zipfile.ZipFile(path) as archive:
+                archive.extractall(output_dir)
+                return tuple(archive.namelist())
+        except (zipfile.BadZipFile, OSError):
+            # A corrupted or evicted entry is simulated again and overwritten
+            return None
+
+    def put(self, key: str, output_dir: str, outputs) -> None:
+        # Store the outputs, paths relative to output_dir. The archive is written to a temporary file of
+        # the cache directory and moved in place, so large outputs (eplusout.sql, ...) stay on disk.
+        fd, tmp_path = self.store.mkstemp(key)
+        os.close(fd)
+        try:
+            with zipfile.ZipFile(tmp_path, 'w', zipfile.ZIP_DEFLATED) as archive:
+                for output in outputs:
+                    archive.write(os.path.join(output_dir, output), output)
+        except BaseException:
+            os.remove(tmp_path)
+            raise
+        with self._lock:
+            self.store.put_file(key, tmp_path)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return self.store.stats()
+
+
+def resolve_simulation_cache(cache):
+    # SimulationCache, directory of a cache or None
+    if cache is None or isinstance(cache, SimulationCache):
+        return cache
+    return SimulationCache(os.fspath(cache))
@@ -0,0 +1,162 @@
+import json
+import os
+import os.path
+import shlex
+import shutil
+import signal
+import subprocess
+from time import perf_counter
+from typing import NamedTuple
+
+from simulation_cache import resolve_simulation_cache
+from worker_pool import imap
+
+
+class SimulationResult(NamedTuple):
+    # Outcome of one workflow of SimulationRunner.run, status is 'success', 'failed' or 'timeout'.
+    # cached is set when the outputs were restored from the cache, attempts is then 0.
+    workflow: str
+    run_dir: str
+    status: str
+    returncode: int
+    attempts: int
+    seconds: float
+    outputs: tuple
+    error: str
+    cached: bool = False
+
+
+def available_cpus() -> int:
+    # CPUs this process may run on, which can be fewer than os.cpu_count() in containers or batch jobs
+    if hasattr(os, 'sched_getaffinity'):
+        return len(os.sched_getaffinity(0))
+    return os.cpu_count() or 1
+
+
+class SimulationRunner:
+    """Run OpenStudio-HPXML workflows through a command in a pool of subprocesses.
+
+    Each workflow is copied to its own directory under run_root, with its run_directory set inside it
+    and its measure and file paths made absolute, so simulations never share files. The command is a
+    template where {workflow} is the path of the copied workflow and {run_dir} its directory. A job
+    that fails or runs longer than timeout seconds is run again up to retries times. One simulation
+    runs per available CPU by default, as EnergyPlus uses a single thread. With a cache, a workflow
+    that was already simulated is not run again, its outputs are restored in its directory.
+    """
+
+    DEFAULT_COMMAND = ('openstudio', 'run', '--workflow', '{workflow}')
+    # Files written by the OpenStudio CLI in the run directory at the end of a job
+    FAILED_JOB = 'failed.job'
+    LOG_FILE = 'simulation.log'
+
+    def __init__(self, run_root: str, command=DEFAULT_COMMAND, workers: int = None, timeout: float = 600,
+                 retries: int = 1, env: dict = None, cache=None) -> None:
+        # command: list of arguments or a string split like a shell command line
+        # env: variables added to the environment of the command
+        # cache: SimulationCache or directory of the cache of simulation outputs, None disables it
+        self.run_root = run_root
+        self.command = shlex.split(command) if isinstance(command, str) else list(command)
+        self.workers = workers or available_cpus()
+        self.timeout = timeout
+        self.retries = retries
+        self.env = env
+        self.cache = resolve_simulation_cache(cache)
+
+    def job_dir(self, workflow: str) -> str:
+        return os.path.join(self.run_root, os.path.splitext(os.path.basename(workflow))[0])
+
+    def job_workflow(self, workflow: str, job_dir: str) -> dict:
+        # Workflow run in job_dir, with absolute measure and file paths
+        with open(workflow) as json_file:
+            workflow_dict = json.load(json_file)
+        workflow_dir = os.path.dirname(os.path.abspath(workflow))
+        for key in ('measure_paths', 'file_paths'):
+            if key in workflow_dict:
+                workflow_dict[key] = [os.path.normpath(os.path.join(workflow_dir, path))
+                                      for path in workflow_dict[key]]
+        workflow_dict['run_directory'] = os.path.join(os.path.abspath(job_dir), 'run')
+        return workflow_dict
+
+    def prepare(self, workflow: str, job_dir: str, workflow_dict: dict) -> str:
+        # Write the workflow to a clean job_dir, returns the path of the copy
+        shutil.rmtree(job_dir, ignore_errors=True)
+        os.makedirs(job_dir)
+        job_workflow = os.path.join(job_dir, os.path.basename(workflow))
+        with open(job_workflow, 'w') as json_file:
+            json.dump(workflow_dict, json_file, indent=2)
+        return job_workflow
+
+    def _execute(self, job_workflow: str, job_dir: str) -> tuple:
+        # Run the command once, returns the status, return code and error message
+        arguments = [argument.format(workflow=job_workflow, run_dir=job_dir) for argument in self.command]
+        env = None if self.env is None else {**os.environ, **self.env}
+        with open(os.path.join(job_dir, self.LOG_FILE), 'ab') as log:
+            try:
+                # In a new session so that a timeout also kills the processes started by the command
+                process = subprocess.Popen(arguments, cwd=job_dir, stdout=log, stderr=subprocess.STDOUT, env=env,
+                                           start_new_session=True)
+            except OSError as error:
+                return 'failed', None, f"{type(error).__name__}: {error}"
+            try:
+                returncode = process.wait(self.timeout)
+            except subprocess.TimeoutExpired:
+                try:
+                    if hasattr(os, 'killpg'):
+                        os.killpg(process.pid, signal.SIGKILL)
+                    else:
+                        process.kill()
+                except ProcessLookupError:
+                    # The job exited between the timeout and the kill
+                    pass
+                process.wait()
+                return 'timeout', process.returncode, f"Timed out after {self.timeout} s"
+        if returncode != 0:
+            return 'failed', returncode, f"{arguments[0]} exited with code {returncode}"
+        if os.path.exists(os.path.join(job_dir, 'run', self.FAILED_JOB)):
+            return 'failed', returncode, f"The workflow failed, see {os.path.join(job_dir, 'run')}"
+        return 'success', returncode, None
+
+    def run_one(self, workflow: str) -> SimulationResult:
+        job_dir = self.job_dir(workflow)
+        start = perf_counter()
+        try:
+            workflow_dict = self.job_workflow(workflow, job_dir)
+            cache_key = None
+            if self.cache is not None:
+                cache_key = self.cache.key(workflow_dict, os.path.dirname(os.path.abspath(workflow)), self.command)
+                self.prepare(workflow, job_dir, workflow_dict)
+                outputs = self.cache.restore(cache_key, job_dir)
+                if outputs is not None:
+                    return SimulationResult(workflow, job_dir, 'success', 0, 0, perf_counter() - start,
+                                            tuple(sorted(outputs)), None, cached=True)
+        except (OSError, ValueError) as error:
+            return SimulationResult(workflow, job_dir, 'failed', None, 0, perf_counter() - start, (),
+                                    f"{type(error).__name__}: {error}")
+
+        attempts = 0
+        while True:
+            attempts += 1
+            # Each attempt starts from a clean directory
+            job_workflow = self.prepare(workflow, job_dir, workflow_dict)
+            status, returncode, error = self._execute(job_workflow, job_dir)
+            if status == 'success' or attempts > self.retries:
+                break
+        outputs = []
+        for dir_path, _, file_names in os.walk(os.path.join(job_dir, 'run')):
+            outputs.extend(os.path.relpath(os.path.join(dir_path, name), job_dir) for name in file_names)
+        outputs = tuple(sorted(outputs))
+        if cache_key is not None and status == 'success':
+            self.cache.put(cache_key, job_dir, outputs)
+        return SimulationResult(workflow, job_dir, status, returncode, attempts, perf_counter() - start, outputs,
+                                error)
+
+    def run(self, workflows, ordered: bool = False):
+        # Run the workflows and yield a SimulationResult per workflow, in completion order unless ordered
+        workflows = list(workflows)
+        job_dirs = {}
+        for workflow in workflows:
+            job_dir = self.job_dir(workflow)
+            if job_dirs.setdefault(job_dir, workflow) != workflow:
+                raise ValueError(f"{workflow} and {job_dirs[job_dir]} would both run in {job_dir}")
+        os.makedirs(self.run_root, exist_ok=True)
+        return imap(self.run_one, workflows, self.workers, ordered=ordered, threads=True)
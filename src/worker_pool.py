@@ -0,0 +1,43 @@
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, ThreadPoolExecutor, wait
+import os
+
+
+def imap(func, items, workers: int = None, initializer=None, initargs: tuple = (), ordered: bool = True,
+         max_pending: int = None, threads: bool = False):
+    """Apply func to each item in a pool of worker processes and yield the results as they complete.
+
+    Only max_pending items (4 per worker by default) are submitted at a time, so the items are consumed
+    lazily and the results stream back with bounded memory. The results are yielded in the order of items
+    when ordered is set. workers defaults to the number of CPUs, workers=1 runs in the calling process.
+    With threads set, func runs in a pool of threads, e.g. to wait for subprocesses.
+    """
+    workers = workers or os.cpu_count() or 1
+    if workers == 1:
+        if initializer is not None:
+            initializer(*initargs)
+        for item in items:
+            yield func(item)
+        return
+
+    max_pending = max_pending or workers * 4
+    items = iter(items)
+    executor_type = ThreadPoolExecutor if threads else ProcessPoolExecutor
+    with executor_type(workers, initializer=initializer, initargs=initargs) as executor:
+        pending = deque()
+        for item in items:
+            pending.append(executor.submit(func, item))
+            if len(pending) >= max_pending:
+                break
+        while pending:
+            if ordered:
+                done = [pending.popleft()]
+            else:
+                done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    pending.remove(future)
+            for future in done:
+                yield future.result()
+                for item in items:
+                    pending.append(executor.submit(func, item))
+                    break
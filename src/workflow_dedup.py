@@ -0,0 +1,126 @@
+import json
+from typing import NamedTuple
+
+import numpy
+
+
+class WorkflowGroup(NamedTuple):
+    # Workflows simulated once: the representative is run and its results stand for all the members
+    representative: str
+    members: tuple
+
+
+def flatten(value, path: tuple = ()):
+    # (path, value) of the leaves of a workflow, the path is the tuple of keys and list indices
+    if isinstance(value, dict):
+        for key, item in value.items():
+            yield from flatten(item, path + (key,))
+    elif isinstance(value, list):
+        for index, item in enumerate(value):
+            yield from flatten(item, path + (index,))
+    else:
+        yield path, value
+
+
+def as_number(value):
+    # Float value of a numeric leaf, including the numbers written as strings by BuildHPXML, else None
+    if isinstance(value, bool):
+        return None
+    if isinstance(value, (int, float)):
+        return float(value)
+    if isinstance(value, str):
+        try:
+            return float(value)
+        except ValueError:
+            return None
+    return None
+
+
+class WorkflowDeduplicator:
+    """Group the workflows of a batch that would give the same simulation results.
+
+    Two workflows are in the same group when all their non-numeric values (measures, string arguments,
+    paths, ...) are equal and each numeric value is within tolerance of the representative of the
+    group, like math.isclose(value, representative, rel_tol, abs_tol). The default tolerances only
+    group identical workflows. A workflow joins the first group it matches, so every member is within
+    tolerance of its representative, the first workflow of the group.
+    """
+
+    # Keys of the workflow that do not change the results
+    IGNORED_KEYS = ('run_directory',)
+
+    def __init__(self, abs_tol: float = 0.0, rel_tol: float = 0.0) -> None:
+        self.abs_tol = abs_tol
+        self.rel_tol = rel_tol
+
+    def signature(self, workflow_dict: dict) -> tuple:
+        # (exact part, numeric values) of a workflow, the exact part includes the paths of the numbers
+        exact, numbers = [], []
+        for path, value in flatten({key: value for key, value in workflow_dict.items()
+                                    if key not in self.IGNORED_KEYS}):
+            number = as_number(value)
+            if number is None:
+                exact.append((path, value))
+            else:
+                exact.append((path,))
+                numbers.append(number)
+        return tuple(exact), numpy.asarray(numbers, dtype=float)
+
+    def _within(self, values, numbers) -> int:
+        # Index of the first representative (column of values) within tolerance of numbers, or None.
+        # The candidates are narrowed one value at a time, most are ruled out by the first ones.
+        candidates = numpy.arange(values.shape[1])
+        for column, number in zip(values, numbers):
+            if not len(candidates):
+                return None
+            row = column[candidates]
+            tolerance = numpy.maximum(self.abs_tol, self.rel_tol * numpy.maximum(abs(row), abs(number)))
+            candidates = candidates[abs(row - number) <= tolerance]
+        return candidates[0] if len(candidates) else None
+
+    def group(self, workflows) -> list:
+        # Groups of the workflow files, in the order of their representatives
+        groups = []
+        # Identical workflows are found by their signature without comparing the values
+        identical = {}
+        # Exact part -> (indices in groups, numeric values of their representatives, one column each)
+        buckets = {}
+        for workflow in workflows:
+            with open(workflow) as json_file:
+                exact, numbers = self.signature(json.load(json_file))
+            match = identical.get((exact, numbers.tobytes()))
+            indices, values = buckets.get(exact, ([], None))
+            if match is None and values is not None:
+                index = self._within(values[:, :len(indices)], numbers)
+                match = None if index is None else indices[index]
+            if match is not None:
+                groups[match][1].append(workflow)
+                continue
+            # New group, the array of representatives grows by doubling
+            if values is None:
+                values = numpy.empty((len(numbers), 4))
+            elif len(indices) == values.shape[1]:
+                values = numpy.concatenate([values, numpy.empty_like(values)], axis=1)
+            values[:, len(indices)] = numbers
+            identical[exact, numbers.tobytes()] = len(groups)
+            indices.append(len(groups))
+            buckets[exact] = (indices, values)
+            groups.append((workflow, [workflow]))
+        return [WorkflowGroup(representative, tuple(members)) for representative, members in groups]
+
+
+def collapse_report(groups) -> dict:
+    # Number of workflows, of simulations and collapse ratio (workflows per simulation) of the groups
+    n_workflows = sum(len(group.members) for group in groups)
+    return {'workflows': n_workflows, 'simulations': len(groups),
+            'collapse_ratio': n_workflows / len(groups) if groups else 1.0,
+            'largest_group': max((len(group.members) for group in groups), default=0)}
+
+
+def run_groups(runner, groups, ordered: bool = False):
+    # Run the representatives of the groups with a SimulationRunner and yield a SimulationResult per
+    # member, whose run_dir is the directory of its representative
+    members = {group.representative: group.members for group in groups}
+    for result in runner.run(list(members), ordered=ordered):
+        for member in members[result.workflow]:
+            yield result._replace(workflow=member)
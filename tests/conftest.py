@@ -0,0 +1,6 @@
+import os.path
+import sys
+
+# The modules in src import each other by name, as when they are run from the src directory
+sys.path.insert(0, os.path.abspath(os.path.join(
+    os.path.dirname(__file__), os.path.pardir, 'src')))
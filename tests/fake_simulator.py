@@ -0,0 +1,51 @@
+# Stand-in for `openstudio run --workflow <workflow>` used by the simulation runner tests. It writes
+# the files of an OpenStudio-HPXML run in the run_directory of the workflow. The optional
+# "fake_simulator" entry of the workflow sets its behaviour:
+#   sleep: seconds to run, fail_times: number of runs that fail before one succeeds, counted in the
+#   counter file, exit_code: exit code of the failed runs
+import argparse
+import json
+import os.path
+import sys
+import time
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--workflow', required=True)
+    args = parser.parse_args()
+    with open(args.workflow) as json_file:
+        workflow = json.load(json_file)
+    options = workflow.get('fake_simulator', {})
+    run_dir = workflow['run_directory']
+    os.makedirs(run_dir, exist_ok=True)
+    open(os.path.join(run_dir, 'started.job'), 'w').close()
+    print(f"Running {args.workflow}")
+    time.sleep(options.get('sleep', 0))
+
+    runs = 0
+    if 'counter' in options:
+        if os.path.exists(options['counter']):
+            with open(options['counter']) as counter:
+                runs = int(counter.read())
+        with open(options['counter'], 'w') as counter:
+            counter.write(str(runs + 1))
+    if runs < options.get('fail_times', 0):
+        open(os.path.join(run_dir, 'failed.job'), 'w').close()
+        print("Simulation failed", file=sys.stderr)
+        return options.get('exit_code', 1)
+
+    arguments = {}
+    for step in workflow['steps']:
+        if step['measure_dir_name'] == 'BuildResidentialHPXML':
+            arguments = step['arguments']
+    with open(os.path.join(run_dir, 'in.xml'), 'w') as hpxml:
+        hpxml.write('<HPXML xmlns="http://hpxmlonline.com/2019/10" schemaVersion="4.0"/>\n')
+    with open(os.path.join(run_dir, 'results_annual.csv'), 'w') as results:
+        results.write(f"Energy Use: Total (MBtu),{arguments.get('geometry_unit_cfa', 0) * 0.05:.1f}\n")
+    open(os.path.join(run_dir, 'finished.job'), 'w').close()
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
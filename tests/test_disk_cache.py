@@ -0,0 +1,51 @@
+import os
+
+from disk_cache import DiskLRUCache
+
+
+def test_get_and_put(tmp_path):
+    cache = DiskLRUCache(str(tmp_path))
+    assert cache.get("ab01") is None
+    cache.put("ab01", b"value")
+    assert cache.get("ab01") == b"value"
+    assert "ab01" in cache and len(cache) == 1
+    assert cache.stats() == {'hits': 1, 'misses': 1, 'bytes': 5}
+
+
+def test_least_recently_used_are_evicted(tmp_path):
+    cache = DiskLRUCache(str(tmp_path), max_bytes=300)
+    for i, key in enumerate(["aa", "bb", "cc"]):
+        cache.put(key, bytes(100))
+        os.utime(cache.path(key), ns=(i * 10 ** 9, i * 10 ** 9))
+    # Reading "aa" makes it the most recently used value
+    assert cache.get("aa") is not None
+    cache.put("dd", bytes(100))
+    assert "bb" not in cache and "cc" not in cache
+    assert "aa" in cache and "dd" in cache
+    assert cache.size() == 200
+
+
+def test_size_is_shared_between_instances(tmp_path):
+    DiskLRUCache(str(tmp_path)).put("aa", bytes(100))
+    cache = DiskLRUCache(str(tmp_path), max_bytes=150)
+    cache.put("aa", bytes(100))
+    assert cache.size() == 100
+    cache.put("bb", bytes(100))
+    assert len(cache) == 1
+
+
+def test_put_file(tmp_path):
+    cache = DiskLRUCache(str(tmp_path), max_bytes=2500)
+    keys = ["aa", "bb", "cc"]
+    for i, key in enumerate(keys):
+        fd, tmp_file = cache.mkstemp(key)
+        with os.fdopen(fd, 'wb') as value:
+            value.write(b'x' * 1000)
+        cache.put_file(key, tmp_file)
+        os.utime(cache.path(key), ns=(i * 10 ** 9, i * 10 ** 9))
+    # The values were moved in place and the oldest one evicted
+    assert cache.get_path(keys[0]) is None
+    with open(cache.get_path(keys[2]), 'rb') as value:
+        assert value.read() == b'x' * 1000
+    assert cache.stats() == {'hits': 1, 'misses': 1, 'bytes': 2000}
+    assert not [name for _, _, names in os.walk(tmp_path) for name in names if name.endswith('.tmp')]
@@ -0,0 +1,76 @@
+import os
+import os.path
+import shutil
+
+import pytest
+
+import h2k_catalog
+from h2k_catalog import H2KCatalog
+from schema_registry import SchemaRegistry
+
+TESTS_DIR = os.path.dirname(__file__)
+ASHRAE_H2K = os.path.join(TESTS_DIR, "ASHRAE_Standard_140/H2K/Standard140-Class2 L100 Cooling.h2k")
+ERS_H2K = os.path.join(TESTS_DIR, os.path.pardir, "exploration/data/h2k/ERS-1032.H2K")
+REGISTRY = SchemaRegistry(versions={(11, 3): os.path.join(TESTS_DIR, "schema/H2k Schema.xsd"),
+                                    (11, 4): os.path.join(TESTS_DIR, os.path.pardir, "schemas/h2k/H2k Schema.xsd")})
+
+
+@pytest.fixture
+def archive(tmp_path):
+    root = tmp_path / "archive"
+    (root / "yukon").mkdir(parents=True)
+    shutil.copy(ERS_H2K, root / "yukon" / "ERS-1032.H2K")
+    shutil.copy(ASHRAE_H2K, root / "L100.h2k")
+    (root / "broken.h2k").write_text("<HouseFile>")
+    return root
+
+
+@pytest.fixture
+def catalog(tmp_path):
+    with H2KCatalog(str(tmp_path / "catalog.sqlite")) as catalog:
+        yield catalog
+
+
+@pytest.mark.parametrize("workers", [1, 2])
+def test_index_and_find(archive, catalog, workers):
+    summary = catalog.index(str(archive), REGISTRY, workers=workers)
+    assert summary['indexed'] == 2 and summary['failed'] == 1
+    assert len(catalog) == 3
+
+    yukon, = catalog.find(province='YUKON TERRITORY', vintage=(2010, 2019), heating_system='Baseboards')
+    assert yukon['file_id'] == 'ERS-1032'
+    assert yukon['heated_area_above'] == pytest.approx(185.2)
+    assert yukon['version_minor'] == 4
+    detached, = catalog.find(house_type_code='1', storeys_code=['1', '2'])
+    assert detached['heating_equipment'] == 'Electric furnace'
+    assert detached['heated_area_above'] is None
+    with pytest.raises(ValueError):
+        catalog.find(colour='red')
+
+
+def test_reindex_only_changed_files(archive, catalog, monkeypatch):
+    catalog.index(str(archive), REGISTRY, workers=1)
+    hashed = []
+    sha256_file = h2k_catalog.sha256_file
+    monkeypatch.setattr(h2k_catalog, 'sha256_file', lambda path: hashed.append(path) or sha256_file(path))
+    os.utime(archive / "L100.h2k")
+    with open(archive / "yukon" / "ERS-1032.H2K", "a") as h2k:
+        h2k.write("\n")
+    (archive / "broken.h2k").unlink()
+
+    summary = catalog.index(str(archive), REGISTRY, workers=1)
+    assert summary == {'indexed': 1, 'failed': 0, 'unchanged': 0, 'touched': 1, 'removed': 1}
+    assert catalog.find(file_id='ERS-1032')[0]['sha256'] == sha256_file(str(archive / "yukon" / "ERS-1032.H2K"))
+    assert len(hashed) == 2
+    # Files with the same modification time and size are not read
+    assert catalog.index(str(archive), REGISTRY, workers=1)['unchanged'] == 2
+    assert len(hashed) == 2
+
+
+def test_query_binds_values(archive, catalog):
+    catalog.index(str(archive), REGISTRY, workers=1)
+    yukon, = catalog.query("province = ? AND vintage >= ?", ('YUKON TERRITORY', 2000))
+    assert yukon['file_id'] == 'ERS-1032'
+    assert catalog.query("city = ?", ("x' OR '1' = '1",)) == []
+    with pytest.raises(ValueError):
+        catalog.query("city = 'Whitehorse'")
@@ -0,0 +1,78 @@
+import os.path
+
+import numpy
+import pytest
+
+from h2k_envelope import composite_rsi, direction_areas, effective_r, envelope_summary, ua
+from h2k_tables import ComponentTableWriter, extract_rows, house_tables, read_table
+from h2kparser import ParseH2K
+
+TESTS_DIR = os.path.dirname(__file__)
+ERS_H2K = os.path.join(TESTS_DIR, os.path.pardir, "exploration/data/h2k/ERS-1032.H2K")
+ERS_SCHEMA = os.path.join(TESTS_DIR, os.path.pardir, "schemas/h2k/H2k Schema.xsd")
+# get_basement_spec fails on ERS-1032
+ERS_TABLES = ['walls', 'windows', 'doors', 'headers', 'ceilings', 'floors']
+
+
+@pytest.fixture(scope="module")
+def ers_obj():
+    return ParseH2K(ERS_H2K, ERS_SCHEMA)
+
+
+def test_single_house_matches_loops(ers_obj):
+    summary = envelope_summary(house_tables(ers_obj, ERS_TABLES))
+
+    walls = ers_obj.get_walls_spec()
+    area = sum(float(wall['@height'] * wall['@perimeter']) for wall in walls)
+    ua_val = sum(float(wall['@height'] * wall['@perimeter'] / wall['@rValue']) for wall in walls)
+    assert summary['walls_area'] == pytest.approx(area)
+    assert summary['walls_ua'] == pytest.approx(ua_val)
+    assert summary['walls_rsi'] == pytest.approx(area / ua_val)
+
+    ceilings, _ = ers_obj.get_ceiling_spec()
+    assert summary['ceilings_rsi'] == pytest.approx(float(ceilings[0]['@rValue']))
+    assert summary['doors_rsi'] == pytest.approx(1.14)
+
+    windows = ers_obj.get_windows_spec()
+    by_direction = summary['windows_area_by_direction']
+    for code in {window['facingDirectionCode'] for window in windows}:
+        assert by_direction[int(code) - 1] == pytest.approx(sum(
+            float(window['@height'] * window['@width']) / 1e6
+            for window in windows if window['facingDirectionCode'] == code))
+    assert by_direction.sum() == pytest.approx(summary['windows_area'])
+
+
+def test_batch_matches_single_houses(ers_obj, tmp_path):
+    rows, _ = extract_rows(ers_obj)
+    n_houses = 3
+    with ComponentTableWriter(str(tmp_path), format='numpy', chunk_rows=4) as writer:
+        for _ in range(n_houses):
+            writer.add_house(ERS_H2K, 'ERS-1032', rows)
+    tables = {name: read_table(str(tmp_path), name) for name in ERS_TABLES}
+    batch = envelope_summary(tables, n_houses)
+    single = envelope_summary(house_tables(ers_obj, ERS_TABLES))
+    assert batch['walls_ua'].shape == (n_houses,)
+    assert batch['windows_area_by_direction'].shape == (n_houses, 8)
+    for key, value in single.items():
+        assert numpy.allclose(batch[key], value), key
+
+
+def test_grouped_aggregation():
+    area = numpy.array([10.0, 20.0, 5.0])
+    r_value = numpy.array([2.0, 4.0, 1.0])
+    house = numpy.array([0, 0, 2])
+    assert ua(area, r_value, house, 3) == pytest.approx([10.0, 0.0, 5.0])
+    r = effective_r(area, r_value, house, 3)
+    assert r[0] == pytest.approx(3.0) and numpy.isnan(r[1]) and r[2] == pytest.approx(1.0)
+    assert direction_areas(area, ['1', '5', '5'], house, 3)[2, 4] == pytest.approx(5.0)
+    with pytest.raises(ValueError):
+        direction_areas(area, ['1', '9', '5'])
+
+
+def test_composite_rsi():
+    # Records hold lists of sections, the component tables strings
+    lists = composite_rsi([[1.0, 3.0], [], [2.0]], [[50, 50], [], [100]])
+    strings = composite_rsi(['1.0;3.0', '', '2.0'], ['50;50', '', '100'])
+    assert lists[0] == pytest.approx(100 / (50 / 1.0 + 50 / 3.0))
+    assert numpy.isnan(lists[1]) and lists[2] == pytest.approx(2.0)
+    assert numpy.allclose(lists, strings, equal_nan=True)
@@ -0,0 +1,58 @@
+import os.path
+
+import pytest
+
+from h2k_index import ComponentIndex
+from h2kparser import ParseH2K
+
+TESTS_DIR = os.path.dirname(__file__)
+ERS_H2K = os.path.join(TESTS_DIR, os.path.pardir, "exploration/data/h2k/ERS-1032.H2K")
+
+
+@pytest.fixture
+def ers_obj():
+    return ParseH2K(ERS_H2K, backend="trusted")
+
+
+def test_index_parents_and_children(ers_obj):
+    index = ers_obj.components
+    door = index[3]
+    assert door.type == 'Door'
+    assert door.parent is index[1]
+    assert [child.id for child in index.children(door)] == [16]
+    assert [child.type for child in index[1].children] == ['Door', 'Window', 'FloorHeader']
+    assert 3 in index and 999 not in index
+
+
+def test_index_per_type_lists(ers_obj):
+    index = ers_obj.components
+    assert [wall.id for wall in index.of_type('Wall', section='Wall')] == [15, 1, 14]
+    assert [window.id for window in index.of_type('Window', 'Wall', section='Wall')] == [19, 22, 20]
+    assert [window.id for window in index.of_type('Window')] == [16, 19, 22, 20]
+    assert [header.id for header in index.of_type('FloorHeader')] == [23, 25]
+    assert index.of_type('Crawlspace', section='Crawlspace') == []
+
+
+def test_getters_read_from_index(ers_obj):
+    windows = ers_obj.get_windows_spec()
+    assert [(window['@id'], window['parent_id']) for window in windows] == [(19, 1), (22, 14), (20, 14)]
+    doors, door_windows = ers_obj.get_doors_spec()
+    assert [door['@id'] for door in doors] == [17, 3]
+    assert [(window['@id'], window['parent_type']) for window in door_windows] == [(16, 'door')]
+    assert ers_obj.get_floor_header()[0]['parent_id'] == 1
+
+
+def test_index_walks_requested_sections_only():
+    components = {'Wall': [{'@id': 1, 'Components': {'Window': {'@id': 2}}}], 'Ceiling': None}
+    index = ComponentIndex(components)
+    assert index.of_type('Window', 'Wall', section='Wall')[0].parent.id == 1
+    assert list(index._sections) == ['Wall']
+    assert len(index) == 2
+
+
+def test_components_compare_by_identity(ers_obj):
+    index = ers_obj.components
+    door = index[3]
+    assert door == index[3] and door != index[1]
+    assert len({door, index[1], index[3]}) == 2
+    assert repr(door) == "Component(id=3, type='Door')"
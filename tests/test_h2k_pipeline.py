@@ -0,0 +1,106 @@
+import json
+import os.path
+import shutil
+import tracemalloc
+
+import pytest
+
+from h2k_pipeline import H2KPipeline, bounded, discover, extract, parse, sniff, stage, write
+from schema_registry import SchemaRegistry
+
+TESTS_DIR = os.path.dirname(__file__)
+ASHRAE_H2K = os.path.join(TESTS_DIR, "ASHRAE_Standard_140/H2K/Standard140-Class2 L100 Cooling.h2k")
+ERS_H2K = os.path.join(TESTS_DIR, os.path.pardir, "exploration/data/h2k/ERS-1032.H2K")
+REGISTRY = SchemaRegistry(versions={(11, 3): os.path.join(TESTS_DIR, "schema/H2k Schema.xsd"),
+                                    (11, 4): os.path.join(TESTS_DIR, os.path.pardir, "schemas/h2k/H2k Schema.xsd")})
+TEMPLATE = {'run_directory': 'run', 'steps': [{'measure_dir_name': 'BuildResidentialHPXML', 'arguments': {}}]}
+# Synthetic H2K file with a header for the sniffer and a padded House section for the parser
+SYNTHETIC_H2K = (
+    "<HouseFile><Application><Version major='11' minor='4'/></Application>"
+    "<ProgramInformation><File><Identification>S-{index}</Identification></File></ProgramInformation>"
+    "<House><Specifications><HeatedFloorArea aboveGrade='{index}.5' belowGrade='20'/></Specifications>"
+    "<Components>{padding}</Components></House></HouseFile>")
+PADDING = "<Wall id='{id}'><Label>Wall {id}</Label></Wall>"
+
+
+@pytest.mark.parametrize("bounded_write", [False, True])
+def test_workflow_pipeline(tmp_path, bounded_write):
+    root = tmp_path / "archive"
+    root.mkdir()
+    shutil.copy(ERS_H2K, root / "ERS-1032.H2K")
+    shutil.copy(ASHRAE_H2K, root / "L100.h2k")
+    (root / "broken.h2k").write_text("<HouseFile>")
+
+    pipeline = H2KPipeline.to_workflows(str(root), TEMPLATE, REGISTRY, str(tmp_path / "out"))
+    if bounded_write:
+        pipeline.stages[-1] = bounded(pipeline.stages[-1], maxsize=1)
+    items = {os.path.basename(item.path): item for item in pipeline}
+
+    ers = items['ERS-1032.H2K']
+    assert ers.error is None and ers.stage == 'write'
+    assert ers.header == {'version': {'@major': 11, '@minor': 4}, 'file_id': 'ERS-1032'}
+    # Nothing but the output path is kept once the house is written
+    assert ers.parser is None and ers.spec is None and ers.workflow is None
+    with open(ers.output) as json_file:
+        assert json_file and json.load(json_file)['steps'][0]['arguments']['ceiling_assembly_r'] == 10.6
+    # get_heated_area fails on the ASHRAE test files, the sniffer on a file without a version
+    assert items['L100.h2k'].stage == 'extract' and 'KeyError' in items['L100.h2k'].error
+    assert items['broken.h2k'].stage == 'sniff' and items['L100.h2k'].output is None
+
+
+def test_run_summary(tmp_path):
+    (tmp_path / "a.h2k").write_text(SYNTHETIC_H2K.format(index=1, padding=''))
+    (tmp_path / "b.h2k").write_text("<HouseFile>")
+    summary = H2KPipeline(discover(str(tmp_path)), sniff(), parse(backend='trusted'), extract()).run()
+    assert summary == {'done': 0, 'failed': {'sniff': 1, 'extract': 1}}
+
+
+def test_bounded_stage_applies_backpressure():
+    pulled = []
+
+    def source():
+        for index in range(100):
+            pulled.append(index)
+            yield index
+
+    def identity(items):
+        return items
+
+    items = bounded(identity, maxsize=2)(source())
+    assert next(items) == 0
+    # The stage thread stops when the queue is full instead of draining the source
+    assert len(pulled) <= 5
+    assert list(items) == list(range(1, 100))
+    with pytest.raises(ZeroDivisionError):
+        list(bounded(lambda items: (1 / 0 for item in items))(source()))
+
+
+def test_memory_stays_flat(tmp_path):
+    # 10k synthetic files through sniff -> parse -> extract -> build -> write, the peak traced memory of
+    # the last 9k houses must not grow over the peak of the first 1k
+    n_files, warm_up = 10000, 1000
+    padding = ''.join(PADDING.format(id=id) for id in range(20))
+    root = tmp_path / "archive"
+    root.mkdir()
+    for index in range(n_files):
+        (root / f"house-{index:05d}.h2k").write_text(SYNTHETIC_H2K.format(index=index, padding=padding))
+
+    @stage
+    def build(item):
+        item.workflow = {'file_id': item.header['file_id'], 'cfa': float(item.spec['@aboveGrade'])}
+        item.spec = None
+
+    pipeline = H2KPipeline(discover(str(root)), sniff(), parse(backend='trusted'),
+                           extract(lambda parser: parser.get_heated_area()), build, write(str(tmp_path / "out")))
+    tracemalloc.start()
+    try:
+        for count, item in enumerate(pipeline, 1):
+            assert item.error is None
+            if count == warm_up:
+                warm_up_peak = tracemalloc.get_traced_memory()[1]
+                tracemalloc.reset_peak()
+        peak = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+    assert count == n_files
+    assert peak < warm_up_peak * 1.1 + 64 * 1024
@@ -0,0 +1,46 @@
+import os.path
+import pickle
+
+import pytest
+
+from h2k_records import WindowRecord, record_type
+from h2kparser import ParseH2K
+
+TESTS_DIR = os.path.dirname(__file__)
+H2K = os.path.join(
+    TESTS_DIR, "ASHRAE_Standard_140/H2K/Standard140-Class2 L100 Cooling.h2k")
+
+
+@pytest.fixture
+def window():
+    return ParseH2K(H2K, backend="trusted").get_windows_spec()[0]
+
+
+def test_record_is_dict_compatible(window):
+    assert isinstance(window, WindowRecord)
+    assert window['@frameAreaFraction'] == window.frameAreaFraction
+    assert window['parent_type'] == 'wall'
+    assert window == window._asdict()
+    assert list(window) == list(WindowRecord.KEYS)
+    assert window.get('@missing') is None
+    with pytest.raises(KeyError):
+        window['@missing']
+
+
+def test_record_is_compact_and_read_only(window):
+    assert not hasattr(window, '__dict__')
+    with pytest.raises(AttributeError):
+        window.width = 0
+    with pytest.raises(TypeError):
+        window['@width'] = 0
+
+
+def test_record_pickles(window):
+    assert pickle.loads(pickle.dumps(window)) == window
+
+
+def test_record_type_attribute_names():
+    Record = record_type('Record', ['@effectivenessAt9.5', 'Label', 'Label'])
+    assert Record.__slots__ == ('effectivenessAt9_5', 'Label')
+    with pytest.raises(ValueError):
+        record_type('Record', ['@id', 'id'])
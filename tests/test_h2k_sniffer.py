@@ -0,0 +1,37 @@
+import os.path
+
+import pytest
+
+from h2k_sniffer import SniffH2K, iter_h2k_files
+from h2kparser import ParseH2K
+
+TESTS_DIR = os.path.dirname(__file__)
+H2K = os.path.join(
+    TESTS_DIR, "ASHRAE_Standard_140/H2K/Standard140-Class2 L100 Cooling.h2k")
+SCHEMA = os.path.join(TESTS_DIR, "schema/H2k Schema.xsd")
+
+
+@pytest.mark.parametrize("getter", ["get_version", "get_file_id", "get_climate_Prov",
+                                    "get_climate_city", "get_hdd_frostdepth"])
+def test_sniffer_matches_parser(getter):
+    expected = getattr(ParseH2K(H2K, SCHEMA, lazy=True), getter)()
+    sniffed = getattr(SniffH2K(H2K), getter)()
+    assert sniffed == expected
+    if isinstance(sniffed, dict):
+        # The parser getters return read-only mappings, their values have the same types
+        assert {key: type(value) for key, value in sniffed.items()} == \
+            {key: type(value) for key, value in expected.items()}
+    else:
+        assert type(sniffed) is type(expected)
+
+
+def test_sniffer_stops_after_header(tmp_path):
+    # Everything after ProgramInformation is left unread, even a corrupted House section
+    with open(H2K, 'rb') as h2k:
+        content = h2k.read()
+    header_end = content.index(b"</ProgramInformation>") + len(b"</ProgramInformation>")
+    truncated = tmp_path / "truncated.H2K"
+    truncated.write_bytes(content[:header_end] + b"<House><<<not xml")
+
+    assert SniffH2K(str(truncated)).get_climate_city() == "Lasvega"
+    assert list(iter_h2k_files(str(tmp_path))) == [str(truncated)]
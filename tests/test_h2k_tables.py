@@ -0,0 +1,87 @@
+import os
+import os.path
+
+import pytest
+
+numpy = pytest.importorskip('numpy')
+
+from h2k_tables import ComponentTableWriter, export_component_tables, read_table, table_columns  # noqa: E402
+from schema_registry import SchemaRegistry  # noqa: E402
+
+TESTS_DIR = os.path.dirname(__file__)
+ASHRAE_H2K = os.path.join(TESTS_DIR, "ASHRAE_Standard_140/H2K/Standard140-Class2 L100 Cooling.h2k")
+ERS_H2K = os.path.join(TESTS_DIR, os.path.pardir, "exploration/data/h2k/ERS-1032.H2K")
+REGISTRY = SchemaRegistry(versions={(11, 3): os.path.join(TESTS_DIR, "schema/H2k Schema.xsd"),
+                                    (11, 4): os.path.join(TESTS_DIR, os.path.pardir, "schemas/h2k/H2k Schema.xsd")})
+
+
+@pytest.mark.parametrize("workers", [1, 2])
+def test_export_numpy_tables(tmp_path, workers):
+    n_rows = export_component_tables([ERS_H2K, ASHRAE_H2K, str(tmp_path / "missing.h2k")], str(tmp_path / "out"),
+                                     REGISTRY, workers=workers, format='numpy', chunk_rows=2)
+    assert n_rows == {'walls': 3, 'windows': 7, 'doors': 4, 'headers': 1, 'ceilings': 1, 'floors': 1, 'basements': 0,
+                      'houses': 3}
+    # Chunks of 2 rows
+    assert len(os.listdir(tmp_path / "out" / "windows")) == 4
+
+    houses = read_table(str(tmp_path / "out"), 'houses')
+    assert sorted(houses['house']) == [0, 1, 2]
+    ers, = houses[houses['file_id'] == 'ERS-1032']
+    assert 'basements: KeyError' in ers['error']
+    ashrae, = houses[houses['path'] == ASHRAE_H2K]
+    assert 'walls: KeyError' in ashrae['error']
+    missing, = houses[houses['path'] == str(tmp_path / "missing.h2k")]
+    assert missing['error'].startswith('FileNotFoundError')
+
+    windows = read_table(str(tmp_path / "out"), 'windows')
+    assert windows.dtype.names == tuple(column for column, _ in table_columns('windows'))
+    assert windows.dtype['rValue'] == numpy.float64 and windows.dtype['energyStar'] == numpy.bool_
+    assert (windows['house'] == ers['house']).sum() == 3
+    ers_window = windows[(windows['house'] == ers['house']) & (windows['id'] == 19)][0]
+    assert ers_window['parent_label'] == 'Wall -main'
+    assert ers_window['rValue'] == pytest.approx(0.8648)
+
+    walls = read_table(str(tmp_path / "out"), 'walls')
+    assert set(walls['house']) == {ers['house']}
+    assert len(read_table(str(tmp_path / "out"), 'basements')) == 0
+
+
+def test_writer_flushes_chunks(tmp_path):
+    with ComponentTableWriter(str(tmp_path), format='numpy', chunk_rows=3) as writer:
+        for i in range(7):
+            writer.add_house(f"house-{i}.h2k", f"H{i}", {})
+        assert writer.n_rows['houses'] == 6 and len(writer.rows['houses']) == 1
+    houses = read_table(str(tmp_path), 'houses')
+    assert list(houses['house']) == list(range(7))
+    assert houses['file_id'][6] == 'H6'
+    with pytest.raises(ValueError):
+        ComponentTableWriter(str(tmp_path), format='csv')
+
+
+def test_chunks_with_different_string_widths(tmp_path, monkeypatch):
+    with ComponentTableWriter(str(tmp_path), format='numpy', chunk_rows=2) as writer:
+        for file_id in ['H1', 'H2', 'house-3', 'H4', 'a-much-longer-house-5']:
+            writer.add_house(f"{file_id}.h2k", file_id, {})
+    widths = {numpy.load(tmp_path / "houses" / part).dtype['file_id'] for part in os.listdir(tmp_path / "houses")}
+    assert len(widths) == 3
+
+    # NumPy before 1.23 only concatenates structured arrays with the same dtype
+    concatenate = numpy.concatenate
+
+    def strict_concatenate(arrays):
+        assert len({array.dtype for array in arrays}) == 1
+        return concatenate(arrays)
+
+    monkeypatch.setattr(numpy, 'concatenate', strict_concatenate)
+    houses = read_table(str(tmp_path), 'houses')
+    assert list(houses['file_id']) == ['H1', 'H2', 'house-3', 'H4', 'a-much-longer-house-5']
+    assert houses.dtype['file_id'] == numpy.dtype('U21')
+
+
+def test_export_parquet_tables(tmp_path):
+    pytest.importorskip('pyarrow')
+    n_rows = export_component_tables([ERS_H2K], str(tmp_path), REGISTRY, workers=1, format='parquet',
+                                     chunk_rows=2)
+    windows = read_table(str(tmp_path), 'windows')
+    assert windows.num_rows == n_rows['windows'] == 3
+    assert windows.column('rValue').to_pylist()[0] == pytest.approx(0.8648)
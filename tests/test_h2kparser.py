@@ -1,4 +1,14 @@
+from decimal import Decimal
+import glob
+import json
+from h2k_cache import ParseCache
+from h2k_document import materialize
+from h2k_memo import freeze, thaw
 from src.h2kparser import ParseH2K
+import gc
+import pickle
+import weakref
+import xmlschema
 import pytest
 import sys
 import os.path
@@ -7,15 +17,22 @@ sys.path.append(
 
 
 @pytest.fixture
-def validation_obj():
+def validating_obj():
     validation_h2k = os.path.join(os.path.dirname(
         __file__), "ASHRAE_Standard_140/H2K/Standard140-Class2 L100 Cooling.h2k")
     validation_schema = os.path.join(os.path.dirname(
-        __file__), "schema/H2K Schema.xsd")
+        __file__), "schema/H2k Schema.xsd")
 
     return ParseH2K(validation_h2k, validation_schema)
 
 
+@pytest.fixture(params=["xmlschema", "trusted"])
+def validation_obj(request, validating_obj):
+    if request.param == "trusted":
+        return ParseH2K(validating_obj.file, backend="trusted")
+    return validating_obj
+
+
 def test_get_version(validation_obj):
     version = validation_obj.get_version()
     assert version['@major'] == 11
@@ -25,3 +42,212 @@ def test_get_version(validation_obj):
 def test_get_climate_Prov(validation_obj):
     province = validation_obj.get_climate_Prov()
     assert province == "BEST TEST"
+
+
+@pytest.fixture
+def invalid_h2k():
+    # ERS-1032 was saved by a newer HOT2000 release than the test schema
+    return os.path.join(os.path.dirname(__file__), os.path.pardir, "exploration/data/h2k/ERS-1032.H2K")
+
+
+def test_lax_validation_reports_errors(validating_obj, invalid_h2k):
+    assert validating_obj.is_valid
+    assert validating_obj.validation_errors == []
+
+    parser = ParseH2K(invalid_h2k, validating_obj.h2k_schema, validation='lax')
+    assert not parser.is_valid
+    assert len(parser.validation_errors) > 0
+    assert parser.get_file_id() == "ERS-1032"
+
+
+def test_strict_validation_raises(validating_obj, invalid_h2k):
+    with pytest.raises(AssertionError) as error:
+        ParseH2K(invalid_h2k, validating_obj.h2k_schema)
+    assert error.value.errors
+
+
+def test_pruned_parse(validating_obj):
+    pruned = ParseH2K(validating_obj.file, validating_obj.h2k_schema, prune=True)
+    assert 'AllResults' in pruned.h2k_dict.pending
+    assert pruned.get_version() == validating_obj.get_version()
+    assert pruned.get_windows_spec() == validating_obj.get_windows_spec()
+    # Pruned sections are still decoded on demand
+    assert pruned.h2k_dict['AllResults'] == validating_obj.h2k_dict['AllResults']
+    assert 'AllResults' not in pruned.h2k_dict.pending
+
+
+def test_lazy_parse(validating_obj):
+    lazy = ParseH2K(validating_obj.file, validating_obj.h2k_schema, lazy=True)
+    assert lazy.get_version() == validating_obj.get_version()
+    assert lazy.get_climate_city() == validating_obj.get_climate_city()
+    assert 'House' in lazy.h2k_dict.pending
+
+    assert lazy.get_windows_spec() == validating_obj.get_windows_spec()
+    components = lazy.h2k_dict['House']['Components']
+    assert 'Wall' not in components.pending
+    assert 'Ceiling' in components.pending
+    assert 'Ventilation' in lazy.h2k_dict['House'].pending
+
+
+def test_lazy_parse_releases_decoded_elements(validating_obj, monkeypatch):
+    # Weak references to the elements of the parsed tree, to see which ones the lazy document keeps
+    elements = []
+
+    class TrackedResource(xmlschema.XMLResource):
+        def __init__(self, *args, **kwargs) -> None:
+            super().__init__(*args, **kwargs)
+            elements.extend(weakref.ref(element) for element in self.root.iter())
+
+    def alive() -> int:
+        gc.collect()
+        return sum(ref() is not None for ref in elements)
+
+    monkeypatch.setattr(xmlschema, 'XMLResource', TrackedResource)
+    lazy = ParseH2K(validating_obj.file, validating_obj.h2k_schema, lazy=True)
+    # The root is dropped, only the pending sections are kept
+    assert elements[0]() is None
+    pending = alive()
+    lazy.get_windows_spec()
+    assert alive() < pending
+    materialize(lazy.h2k_dict)
+    assert alive() == 0
+
+
+@pytest.mark.parametrize("options", [{'prune': True}, {'lazy': True}])
+def test_decoded_sections_match_to_dict(validating_obj, invalid_h2k, options):
+    # ERS-1032 declares the xsd and xsi namespaces below the root, to_dict() reports them on the root
+    for h2k_file, schema_file in [(validating_obj.file, validating_obj.schema_file),
+                                  (invalid_h2k, os.path.join(os.path.dirname(__file__), os.path.pardir,
+                                                             "schemas/h2k/H2k Schema.xsd"))]:
+        reference = ParseH2K(h2k_file, schema_file, validation='lax').h2k_dict
+        decoded = materialize(ParseH2K(h2k_file, schema_file, validation='lax', **options).h2k_dict)
+        assert list(decoded) == list(reference)
+        assert decoded == reference
+
+
+def test_trusted_backend_matches_xmlschema(validating_obj):
+    trusted = ParseH2K(validating_obj.file, backend="trusted")
+    assert trusted.h2k_schema is None
+    assert trusted.h2k_dict == validating_obj.h2k_dict
+    with pytest.raises(ValueError):
+        ParseH2K(validating_obj.file, backend="trusted", lazy=True)
+
+
+def typed(value):
+    # Decoded value with the type of every leaf, Decimal('1') == 1 but they are different results
+    if isinstance(value, dict):
+        return {key: typed(item) for key, item in value.items()}
+    if isinstance(value, list):
+        return [typed(item) for item in value]
+    return type(value), value
+
+
+ERS_SCHEMA = os.path.join(os.path.dirname(__file__), os.path.pardir, "schemas/h2k/H2k Schema.xsd")
+BACKEND_FILES = [(path, os.path.join(os.path.dirname(__file__), "schema/H2k Schema.xsd")) for path in sorted(
+    glob.glob(os.path.join(os.path.dirname(__file__), "ASHRAE_Standard_140/H2K/*.h2k")))]
+BACKEND_FILES.append((os.path.join(os.path.dirname(__file__), os.path.pardir, "exploration/data/h2k/ERS-1032.H2K"),
+                      ERS_SCHEMA))
+
+
+@pytest.mark.parametrize("h2k_file, schema_file", BACKEND_FILES, ids=[os.path.basename(path)
+                                                                      for path, _ in BACKEND_FILES])
+def test_trusted_backend_types_match_xmlschema(h2k_file, schema_file):
+    reference = ParseH2K(h2k_file, schema_file, validation='skip')
+    trusted = ParseH2K(h2k_file, backend="trusted")
+    assert typed(trusted.h2k_dict) == typed(reference.h2k_dict)
+
+
+def test_memoized_getters(validation_obj):
+    windows = validation_obj.get_windows_spec()
+    assert validation_obj.get_windows_spec() == windows
+    assert validation_obj.cache_info() == {'hits': 1, 'misses': 1, 'size': 1}
+    # Each call returns a copy, the cached result is not changed by the caller
+    windows.append(windows[0])
+    assert len(validation_obj.get_windows_spec()) == len(windows) - 1
+
+    validation_obj.h2k_dict['House']['Components']['Wall'][0]['Components']['Window'][0]['Measurements']['@height'] = 0
+    assert validation_obj.get_windows_spec()[0]['@height'] != 0
+    validation_obj.invalidate()
+    assert validation_obj.get_windows_spec()[0]['@height'] == 0
+    assert validation_obj.cache_misses == 2
+
+
+def test_getter_results_keep_their_types(validation_obj):
+    for _ in range(2):
+        rooms = validation_obj.get_n_rooms()
+        assert type(rooms) is dict
+        assert pickle.loads(pickle.dumps(rooms)) == rooms
+        assert json.loads(json.dumps(rooms)) == rooms
+        rooms['@bedrooms'] = 0
+    assert validation_obj.get_n_rooms()['@bedrooms'] != 0
+    doors, door_windows = validation_obj.get_doors_spec()
+    assert type(doors) is list and type(door_windows) is list
+    # Frozen values are thawed to the same types
+    assert type(thaw(freeze([{'a': [1]}]))[0]['a']) is list
+
+
+@pytest.mark.parametrize("numeric, decimal_type", [("decimal", Decimal), ("float", float)])
+@pytest.mark.parametrize("backend", ["xmlschema", "trusted"])
+def test_numeric_decoding(validating_obj, numeric, decimal_type, backend):
+    parser = ParseH2K(validating_obj.file, validating_obj.h2k_schema, backend=backend, numeric=numeric)
+    window = parser.get_windows_spec()[0]
+    assert type(window['@height']) is decimal_type
+    assert window['@height'] == decimal_type(validating_obj.get_windows_spec()[0]['@height'])
+    assert type(parser.get_version()['@major']) is int
+    assert type(parser.get_heating_system_spec()[0][1]['efficiency']) is decimal_type
+    with pytest.raises(ValueError):
+        ParseH2K(validating_obj.file, backend=backend, numeric="int")
+
+
+def test_parser_pickles_without_schema(validating_obj):
+    lazy = ParseH2K(validating_obj.file, validating_obj.h2k_schema, lazy=True)
+    restored = pickle.loads(pickle.dumps(lazy))
+    assert restored.h2k_schema is None
+    assert restored.h2k_dict == validating_obj.h2k_dict
+    assert restored.get_windows_spec() == validating_obj.get_windows_spec()
+
+
+@pytest.mark.parametrize("workers, ordered, lazy", [(1, True, False), (2, True, False), (2, False, False),
+                                                   (1, True, True), (2, True, True)])
+def test_parse_many(validating_obj, invalid_h2k, workers, ordered, lazy):
+    # With lazy=True the validation errors of invalid_h2k are only found when its sections are decoded
+    paths = [validating_obj.file, invalid_h2k, validating_obj.file]
+    results = list(ParseH2K.parse_many(paths, validating_obj.schema_file, workers=workers, ordered=ordered,
+                                       lazy=lazy))
+    if ordered:
+        assert [result.path for result in results] == paths
+    assert sorted(result.path for result in results) == sorted(paths)
+    for result in results:
+        if result.path == invalid_h2k:
+            assert result.parser is None
+            assert result.error.startswith("H2KValidationError")
+        else:
+            assert result.error is None
+            assert result.parser.get_version() == validating_obj.get_version()
+
+
+def test_parse_cache(validating_obj, tmp_path):
+    cache = ParseCache(str(tmp_path))
+    cold = ParseH2K(validating_obj.file, validating_obj.schema_file, cache=cache)
+    warm = ParseH2K(validating_obj.file, validating_obj.schema_file, cache=cache)
+    assert cache.stats()['hits'] == 1 and cache.stats()['misses'] == 1
+    assert warm.h2k_dict == cold.h2k_dict == validating_obj.h2k_dict
+    # The numeric type and the backend are part of the key
+    ParseH2K(validating_obj.file, validating_obj.schema_file, cache=cache, numeric='float')
+    ParseH2K(validating_obj.file, cache=cache, backend='trusted')
+    assert cache.stats()['misses'] == 3 and len(cache.store) == 3
+
+
+def test_parse_cache_keeps_validation_errors(invalid_h2k, validating_obj, tmp_path):
+    lax = ParseH2K(invalid_h2k, validating_obj.schema_file, validation='lax', cache=str(tmp_path))
+    cached = ParseH2K(invalid_h2k, validating_obj.schema_file, validation='lax', cache=str(tmp_path))
+    assert len(cached.validation_errors) == len(lax.validation_errors)
+    # Cold and warm parses report the same issues, with the same fields
+    for cold, warm in zip(lax.validation_errors, cached.validation_errors):
+        assert type(warm) is type(cold)
+        assert (warm.path, warm.reason) == (cold.path, cold.reason)
+    assert str(cached.validation_errors[0]) == f"{lax.validation_errors[0].path}: {lax.validation_errors[0].reason}"
+    assert pickle.loads(pickle.dumps(lax)).validation_errors == lax.validation_errors
+    assert not cached.is_valid
+    with pytest.raises(AssertionError):
+        ParseH2K(invalid_h2k, validating_obj.schema_file, cache=str(tmp_path))
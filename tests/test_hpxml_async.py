@@ -0,0 +1,115 @@
+import asyncio
+import json
+import os.path
+import threading
+import time
+import weakref
+
+import pytest
+
+from hpxml_async import AsyncHPXMLBuilder
+from hpxml_builder import BuildHPXML
+from schema_registry import SchemaRegistry
+
+TESTS_DIR = os.path.dirname(__file__)
+ASHRAE_H2K = os.path.join(TESTS_DIR, "ASHRAE_Standard_140/H2K/Standard140-Class2 L100 Cooling.h2k")
+ERS_H2K = os.path.join(TESTS_DIR, os.path.pardir, "exploration/data/h2k/ERS-1032.H2K")
+ERS_SCHEMA = os.path.join(TESTS_DIR, os.path.pardir, "schemas/h2k/H2k Schema.xsd")
+REGISTRY = SchemaRegistry(versions={(11, 3): os.path.join(TESTS_DIR, "schema/H2k Schema.xsd"),
+                                    (11, 4): ERS_SCHEMA})
+TEMPLATE = {'run_directory': 'run', 'steps': [{'measure_dir_name': 'BuildResidentialHPXML', 'arguments': {}}]}
+
+
+@pytest.mark.parametrize("workers", [1, 2])
+def test_convert(tmp_path, workers):
+    builder = AsyncHPXMLBuilder(TEMPLATE, REGISTRY, str(tmp_path / "out"), workers=workers,
+                                staging_dir=str(tmp_path))
+    entries = {os.path.basename(entry['h2k_file']): entry
+               for entry in builder.run([ERS_H2K, ASHRAE_H2K, str(tmp_path / "missing.h2k")])}
+
+    ers = entries['ERS-1032.H2K']
+    assert ers['status'] == 'done' and set(ers['seconds']) == {'read', 'build', 'write'}
+    expected = BuildHPXML(TEMPLATE, ERS_H2K, ERS_SCHEMA)
+    expected.update_steps()
+    with open(ers['output']) as json_file:
+        assert json.load(json_file) == json.loads(json.dumps(expected.template_dict,
+                                                              default=BuildHPXML._json_default))
+    # get_heated_area fails on the ASHRAE test files
+    assert entries[os.path.basename(ASHRAE_H2K)]['status'] == 'failed'
+    assert entries['missing.h2k']['error'].startswith('FileNotFoundError')
+    assert not os.path.exists(entries['missing.h2k']['output'])
+    # The staged copies are removed
+    assert sorted(os.listdir(tmp_path)) == ['out']
+
+
+def test_duplicate_outputs(tmp_path):
+    copy = tmp_path / "copy" / "ERS-1032.H2K"
+    copy.parent.mkdir()
+    copy.write_bytes(open(ERS_H2K, 'rb').read())
+    builder = AsyncHPXMLBuilder(TEMPLATE, REGISTRY, str(tmp_path / "out"), workers=1)
+    entries = builder.run([ERS_H2K, str(copy)])
+    assert [entry['status'] for entry in entries] == ['failed', 'done']
+    assert 'is also written to' in entries[0]['error']
+
+
+class SlowStorage(AsyncHPXMLBuilder):
+    # Storage with a latency of 0.2 s per read and write, counting the concurrent reads
+    def __init__(self, *args, **kwargs) -> None:
+        super().__init__(*args, **kwargs)
+        self.lock = threading.Lock()
+        self.reading = 0
+        self.max_reading = 0
+
+    def read_file(self, h2k_file: str, staged_path: str) -> None:
+        with self.lock:
+            self.reading += 1
+            self.max_reading = max(self.max_reading, self.reading)
+        time.sleep(0.2)
+        super().read_file(h2k_file, staged_path)
+        with self.lock:
+            self.reading -= 1
+
+    def write_file(self, output: str, text: str) -> None:
+        time.sleep(0.2)
+        super().write_file(output, text)
+
+
+def test_io_overlaps_and_respects_limits(tmp_path):
+    h2k_files = []
+    for index in range(8):
+        h2k_file = tmp_path / f"house-{index}.h2k"
+        h2k_file.write_bytes(open(ERS_H2K, 'rb').read())
+        h2k_files.append(str(h2k_file))
+    builder = SlowStorage(TEMPLATE, ERS_SCHEMA, str(tmp_path / "out"), workers=1, read_concurrency=4,
+                          write_concurrency=4, backend='trusted')
+
+    async def convert():
+        return [entry async for entry in builder.convert(h2k_files)]
+
+    start = time.perf_counter()
+    entries = asyncio.run(convert())
+    elapsed = time.perf_counter() - start
+    assert [entry['status'] for entry in entries] == ['done'] * 8
+    assert builder.max_reading == 4
+    # 8 reads and 8 writes of 0.2 s, run 4 at a time and overlapped with the builds
+    assert elapsed < 8 * 0.4 / 2
+
+
+def test_finished_houses_are_released(tmp_path, monkeypatch):
+    # Missing files fail right after the read, the finished house tasks must not pile up
+    tasks = []
+    finished = []
+    create_task = asyncio.create_task
+
+    def tracked_create_task(coro):
+        finished.append(sum(1 for ref in tasks if ref() is not None and ref().done()))
+        task = create_task(coro)
+        tasks.append(weakref.ref(task))
+        return task
+
+    monkeypatch.setattr(asyncio, 'create_task', tracked_create_task)
+    builder = AsyncHPXMLBuilder(TEMPLATE, ERS_SCHEMA, str(tmp_path / "out"), workers=1, read_concurrency=2,
+                                write_concurrency=1, write_queue_size=1, backend='trusted')
+    entries = builder.run(str(tmp_path / f"missing-{index}.h2k") for index in range(200))
+    assert [entry['status'] for entry in entries] == ['failed'] * 200
+    assert max(finished) < 10
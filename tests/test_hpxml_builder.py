@@ -0,0 +1,87 @@
+from decimal import Decimal
+import json
+import os.path
+import pickle
+import tracemalloc
+
+import pytest
+import xmlschema
+
+from hpxml_builder import BuildHPXML, HouseSpec
+
+TESTS_DIR = os.path.dirname(__file__)
+ERS_H2K = os.path.join(TESTS_DIR, os.path.pardir, "exploration/data/h2k/ERS-1032.H2K")
+ERS_SCHEMA = os.path.join(TESTS_DIR, os.path.pardir, "schemas/h2k/H2k Schema.xsd")
+
+
+@pytest.fixture
+def template(tmp_path):
+    path = tmp_path / "template.json"
+    path.write_text(json.dumps({'run_directory': 'run', 'steps': [
+        {'measure_dir_name': 'BuildResidentialHPXML', 'arguments': {}},
+        {'measure_dir_name': 'ReportSimulationOutput', 'arguments': {}}]}))
+    return str(path)
+
+
+@pytest.mark.parametrize("numeric", ["decimal", "float", "numpy"])
+def test_update_steps_numeric_types(template, numeric):
+    if numeric == "numpy":
+        pytest.importorskip("numpy")
+    builder = BuildHPXML(template, ERS_H2K, ERS_SCHEMA, numeric=numeric)
+    builder.update_steps()
+    arguments = builder.template_dict['steps'][0]['arguments']
+    assert float(arguments['ceiling_assembly_r']) == pytest.approx(10.6)
+    assert float(arguments['door_rvalue']) == pytest.approx(1.14)
+    assert float(arguments['window_area_front']) == pytest.approx(4.1)
+    assert arguments['heating_system_heating_efficiency'] == 1
+    assert arguments['water_heater_type'] == 'storage water heater'
+    # The areas keep the numeric type of the parse
+    area_type = {'decimal': Decimal, 'float': float, 'numpy': float}[numeric]
+    assert isinstance(arguments['door_area'], area_type)
+    assert isinstance(arguments['window_area_front'], area_type)
+
+
+def test_release_to_house_spec(template):
+    builder = BuildHPXML(template, ERS_H2K, ERS_SCHEMA)
+    builder.update_steps()
+    released = BuildHPXML(template, ERS_H2K, ERS_SCHEMA, release=True)
+    spec = released.h2k_parameters
+    assert isinstance(spec, HouseSpec)
+    assert spec.get_heated_area() == builder.h2k_parameters.get_heated_area()
+
+    # The spec is sent to other processes instead of the parser
+    payload = pickle.dumps(spec)
+    assert len(payload) < len(pickle.dumps(builder.h2k_parameters)) / 20
+    from_spec = BuildHPXML(template, pickle.loads(payload))
+    from_spec.update_steps()
+    assert from_spec.template_dict == builder.template_dict
+    spec.get_heated_area()['@aboveGrade'] = 0
+    assert spec.get_heated_area() == builder.h2k_parameters.get_heated_area()
+
+
+def test_release_frees_the_decoded_file(template):
+    schema = xmlschema.XMLSchema(ERS_SCHEMA)
+
+    def retained(release):
+        tracemalloc.start()
+        try:
+            start = tracemalloc.get_traced_memory()[0]
+            builder = BuildHPXML(template, ERS_H2K, schema, release=release)
+            size = tracemalloc.get_traced_memory()[0] - start
+        finally:
+            tracemalloc.stop()
+        assert builder.h2k_parameters is not None
+        return size
+
+    retained(False)
+    assert retained(True) < retained(False) / 10
+
+
+def test_windows_facing_unmapped_directions(template, monkeypatch):
+    builder = BuildHPXML(template, ERS_H2K, ERS_SCHEMA)
+    window = builder.h2k_parameters.get_windows_spec()[0]
+    # The ERS house faces North (code 5), code 2 is neither its front, back, left nor right
+    monkeypatch.setattr(builder.h2k_parameters, 'get_windows_spec',
+                        lambda: [window, {**window._asdict(), 'facingDirectionCode': '2'}])
+    with pytest.raises(ValueError, match=r"\['2'\]"):
+        builder.update_steps()
@@ -0,0 +1,128 @@
+import glob
+import io
+import os.path
+import xml.etree.ElementTree as ET
+
+import pytest
+import xmlschema
+
+from hpxml_emitter import HPXMLEmitter, UnsupportedComponentsWarning, XMLStreamWriter, azimuth, write_hpxml
+
+TESTS_DIR = os.path.dirname(__file__)
+ERS_H2K = os.path.join(TESTS_DIR, os.path.pardir, "exploration/data/h2k/ERS-1032.H2K")
+ERS_SCHEMA = os.path.join(TESTS_DIR, os.path.pardir, "schemas/h2k/H2k Schema.xsd")
+ASHRAE_HPXML = sorted(glob.glob(os.path.join(TESTS_DIR, "ASHRAE_Standard_140", "HPXML", "*.xml")))
+# Subset of HPXML 4.0 written by HPXMLEmitter, with the inputs required by OpenStudio-HPXML
+EMITTER_SCHEMA = os.path.join(TESTS_DIR, "schema", "HPXML-4.0-emitter.xsd")
+NS = {'h': HPXMLEmitter.NAMESPACE}
+# The basement of ERS-1032 is not written
+pytestmark = pytest.mark.filterwarnings("ignore::hpxml_emitter.UnsupportedComponentsWarning")
+
+
+def element_paths(root) -> list:
+    # Paths of the elements without the namespace, in document order and without repeats
+    paths = []
+
+    def walk(element, path):
+        path = f"{path}/{element.tag.split('}')[1]}"
+        if path not in paths:
+            paths.append(path)
+        for child in element:
+            walk(child, path)
+
+    walk(root, '')
+    return paths
+
+
+@pytest.fixture(scope='module')
+def document():
+    output = io.BytesIO()
+    HPXMLEmitter(ERS_H2K, ERS_SCHEMA, created='2000-01-01T00:00:00-07:00').write(output)
+    return ET.fromstring(output.getvalue())
+
+
+def test_shape_of_the_ashrae_files(document):
+    reference = ET.parse(ASHRAE_HPXML[0]).getroot()
+    assert document.tag == reference.tag and document.get('schemaVersion') == reference.get('schemaVersion')
+    # The elements shared with the test files are in the same order
+    order = element_paths(ET.parse(os.path.join(TESTS_DIR, "ASHRAE_Standard_140", "HPXML", "L322XC.xml")).getroot())
+    shared = [path for path in element_paths(document) if path in order]
+    assert shared == sorted(shared, key=order.index)
+    assert '/HPXML/Building/BuildingDetails/Enclosure/Walls/Wall' in shared
+
+
+def test_values(document):
+    details = document.find('h:Building/h:BuildingDetails', NS)
+    construction = details.find('h:BuildingSummary/h:BuildingConstruction', NS)
+    assert construction.findtext('h:ConditionedFloorArea', namespaces=NS) == '2974.1'
+    assert construction.findtext('h:NumberofBedrooms', namespaces=NS) == '2'
+    enclosure = details.find('h:Enclosure', NS)
+    walls = {wall.find('h:SystemIdentifier', NS).get('id') for wall in enclosure.iterfind('h:Walls/h:Wall', NS)}
+    assert len(walls) == 3
+    # Every window and door is attached to a wall of the document, the door window to the wall of its door
+    for component in ('Windows/h:Window', 'Doors/h:Door'):
+        for element in enclosure.iterfind(f"h:{component}", NS):
+            assert element.find('h:AttachedToWall', NS).get('idref') in walls
+    assert len(enclosure.findall('h:Windows/h:Window', NS)) == 4
+    # The ERS house faces North, HOT2000 code 5
+    assert enclosure.find("h:Windows/h:Window/h:Azimuth", NS).text == '0'
+    heating = details.find('h:Systems/h:HVAC/h:HVACPlant/h:HeatingSystem', NS)
+    assert heating.find('h:HeatingSystemType/h:ElectricResistance', NS) is not None
+
+
+@pytest.mark.parametrize("numeric", ["float", "numpy"])
+def test_numeric_types_give_the_same_document(numeric):
+    if numeric == "numpy":
+        pytest.importorskip("numpy")
+    outputs = []
+    for options in ({}, {'numeric': numeric}):
+        output = io.BytesIO()
+        HPXMLEmitter(ERS_H2K, ERS_SCHEMA, created='2000-01-01T00:00:00-07:00', **options).write(output)
+        outputs.append(output.getvalue())
+    assert outputs[0] == outputs[1]
+
+
+def test_azimuth():
+    assert [azimuth(code) for code in '12345678'] == [180, 135, 90, 45, 0, 315, 270, 225]
+
+
+def test_stream_writer():
+    output = io.StringIO()
+    writer = XMLStreamWriter(output)
+    writer.start_document()
+    with writer.tag('a', {'id': '1'}):
+        writer.element('b', 'x < y & z')
+        writer.element('c')
+        with writer.tag('d'):
+            writer.element('e', True)
+    writer.end_document()
+    assert output.getvalue() == ('<?xml version="1.0" encoding="UTF-8"?>\n'
+                                 '<a id="1">\n  <b>x &lt; y &amp; z</b>\n  <c/>\n  <d>\n    <e>true</e>\n  </d>\n</a>\n')
+
+
+def test_write_path(tmp_path):
+    output = tmp_path / "ERS-1032.xml"
+    write_hpxml(ERS_H2K, str(output), ERS_SCHEMA)
+    assert ET.parse(output).getroot().get('schemaVersion') == '4.0'
+    assert os.listdir(tmp_path) == ["ERS-1032.xml"]
+
+
+def test_output_schema(tmp_path):
+    output = tmp_path / "ERS-1032.xml"
+    write_hpxml(ERS_H2K, str(output), ERS_SCHEMA)
+    assert list(xmlschema.XMLSchema(EMITTER_SCHEMA).iter_errors(str(output))) == []
+
+
+def test_unsupported_foundations_warn():
+    with pytest.warns(UnsupportedComponentsWarning, match=r"Basement 5 \(1 FloorHeader\)"):
+        HPXMLEmitter(ERS_H2K, ERS_SCHEMA).write(io.BytesIO())
+
+
+def test_failed_write_leaves_no_file(tmp_path, monkeypatch):
+    def fail(self, writer):
+        raise KeyError('HeatedFloorArea')
+
+    monkeypatch.setattr(HPXMLEmitter, '_systems', fail)
+    with pytest.raises(KeyError):
+        write_hpxml(ERS_H2K, str(tmp_path / "ERS-1032.xml"), ERS_SCHEMA)
+    assert os.listdir(tmp_path) == []
@@ -0,0 +1,83 @@
+import json
+import os.path
+import shutil
+
+import pytest
+
+from hpxml_fleet import BuildHPXMLFleet
+
+TESTS_DIR = os.path.dirname(__file__)
+ERS_H2K = os.path.join(TESTS_DIR, os.path.pardir, "exploration/data/h2k/ERS-1032.H2K")
+ERS_SCHEMA = os.path.join(TESTS_DIR, os.path.pardir, "schemas/h2k/H2k Schema.xsd")
+TEST_SCHEMA = os.path.join(TESTS_DIR, "schema/H2k Schema.xsd")
+
+
+@pytest.fixture
+def template(tmp_path):
+    path = tmp_path / "template.json"
+    path.write_text(json.dumps({'run_directory': 'run', 'steps': [
+        {'measure_dir_name': 'BuildResidentialHPXML', 'arguments': {}}]}))
+    return str(path)
+
+
+@pytest.fixture
+def houses(tmp_path):
+    # Copies of the ERS house and a file that is not an H2K file
+    h2k_dir = tmp_path / "h2k"
+    h2k_dir.mkdir()
+    paths = []
+    for name in ("house-1.H2K", "house-2.H2K"):
+        shutil.copy(ERS_H2K, h2k_dir / name)
+        paths.append(str(h2k_dir / name))
+    (h2k_dir / "broken.H2K").write_text("<HouseFile>")
+    return paths + [str(h2k_dir / "broken.H2K")]
+
+
+@pytest.mark.parametrize("workers", [1, 2])
+def test_fleet_builds_and_resumes(tmp_path, template, houses, workers):
+    fleet = BuildHPXMLFleet(template, ERS_SCHEMA, str(tmp_path / "out"), workers=workers)
+    entries = {os.path.basename(entry['h2k_file']): entry for entry in fleet.run(houses)}
+    assert entries['house-1.H2K']['status'] == 'done'
+    assert entries['broken.H2K']['status'] == 'failed'
+    with open(entries['house-2.H2K']['output']) as workflow:
+        arguments = json.load(workflow)['steps'][0]['arguments']
+    assert arguments['ceiling_assembly_r'] == pytest.approx(10.6)
+
+    # Finished houses are skipped, failed and modified houses are built again
+    with open(houses[1], 'a') as h2k:
+        h2k.write("\n")
+    statuses = {os.path.basename(entry['h2k_file']): entry['status'] for entry in fleet.run(houses)}
+    assert statuses == {'house-1.H2K': 'skipped', 'house-2.H2K': 'done', 'broken.H2K': 'failed'}
+    assert len(fleet.read_manifest()) == 3
+
+
+def test_fleet_rejects_colliding_outputs(tmp_path, template, houses):
+    fleet = BuildHPXMLFleet(template, ERS_SCHEMA, str(tmp_path / "out"), workers=1)
+    other = tmp_path / "other"
+    other.mkdir()
+    shutil.copy(houses[0], other)
+    with pytest.raises(ValueError):
+        list(fleet.run([houses[0], str(other / "house-1.H2K")]))
+
+
+def test_fleet_rebuilds_on_schema_and_option_changes(tmp_path, template, houses):
+    output_dir = str(tmp_path / "out")
+    house = houses[:1]
+
+    def statuses(schema, **parse_options):
+        fleet = BuildHPXMLFleet(template, schema, output_dir, workers=1, **parse_options)
+        return [entry['status'] for entry in fleet.run(house)]
+
+    assert statuses(ERS_SCHEMA) == ['done']
+    assert statuses(ERS_SCHEMA) == ['skipped']
+    # Same schema, other location
+    schema_copy = tmp_path / "copy.xsd"
+    shutil.copy(ERS_SCHEMA, schema_copy)
+    assert statuses(str(schema_copy)) == ['skipped']
+    # ERS-1032 is not valid against the older test schema, the house is built again and fails
+    assert statuses(TEST_SCHEMA, validation='lax') == ['failed']
+    assert statuses(ERS_SCHEMA, validation='lax') == ['done']
+    assert statuses(ERS_SCHEMA, validation='lax') == ['skipped']
+    assert statuses(ERS_SCHEMA, validation='lax', numeric='float') == ['done']
+    assert statuses(ERS_SCHEMA, backend='trusted', numeric='float') == ['done']
+    assert statuses(TEST_SCHEMA, backend='trusted', numeric='float') == ['skipped']
@@ -0,0 +1,111 @@
+import glob
+import os.path
+
+import pytest
+
+from hpxml_emitter import HPXMLEmitter
+from hpxml_validation import HPXML_4_NAMESPACE, HPXMLValidator, default_schemas, summarize
+
+TESTS_DIR = os.path.dirname(__file__)
+ASHRAE_HPXML = sorted(glob.glob(os.path.join(TESTS_DIR, "ASHRAE_Standard_140", "HPXML", "*.xml")))
+ERS_H2K = os.path.join(TESTS_DIR, os.path.pardir, "exploration/data/h2k/ERS-1032.H2K")
+ERS_SCHEMA = os.path.join(TESTS_DIR, os.path.pardir, "schemas/h2k/H2k Schema.xsd")
+# Subset of HPXML 4.0 written by HPXMLEmitter, with the inputs required by OpenStudio-HPXML
+EMITTER_SCHEMA = os.path.join(TESTS_DIR, "schema", "HPXML-4.0-emitter.xsd")
+# The basement of ERS-1032 is not written
+pytestmark = pytest.mark.filterwarnings("ignore::hpxml_emitter.UnsupportedComponentsWarning")
+# Smallest document of the HPXML 2.3 schema of schemas/hpxml
+VALID_HPXML = """<?xml version="1.0" encoding="UTF-8"?>
+<HPXML xmlns="http://hpxmlonline.com/2014/6" schemaVersion="2.3">
+  <XMLTransactionHeaderInformation>
+    <XMLType>HPXML</XMLType>
+    <XMLGeneratedBy>h2k_to_hpxml</XMLGeneratedBy>
+    <CreatedDateAndTime>2000-01-01T00:00:00-07:00</CreatedDateAndTime>
+    <Transaction>create</Transaction>
+  </XMLTransactionHeaderInformation>
+  <SoftwareInfo/>
+  <Building>
+    <BuildingID id="MyBuilding"/>
+    <ProjectStatus>
+      <EventType>proposed workscope</EventType>
+    </ProjectStatus>
+    <BuildingDetails>
+      <BuildingSummary>
+        <BuildingConstruction>
+          <NumberofBedrooms>3</NumberofBedrooms>
+        </BuildingConstruction>
+      </BuildingSummary>
+    </BuildingDetails>
+  </Building>
+</HPXML>
+"""
+
+
+@pytest.fixture(autouse=True)
+def no_hpxml_4_schema(monkeypatch):
+    monkeypatch.delenv('HPXML_4_SCHEMA', raising=False)
+
+
+@pytest.fixture
+def emitted(tmp_path):
+    path = tmp_path / "ERS-1032.xml"
+    HPXMLEmitter(ERS_H2K, ERS_SCHEMA, created='2000-01-01T00:00:00-07:00').write(str(path))
+    return str(path)
+
+
+@pytest.fixture
+def documents(tmp_path):
+    valid = tmp_path / "valid.xml"
+    valid.write_text(VALID_HPXML)
+    invalid = tmp_path / "invalid.xml"
+    invalid.write_text(VALID_HPXML.replace(">create<", ">delete<").replace(">3<", ">three<"))
+    broken = tmp_path / "broken.xml"
+    broken.write_text(VALID_HPXML[:200])
+    return [str(valid), str(invalid), str(broken), ASHRAE_HPXML[0]]
+
+
+@pytest.mark.parametrize("workers", [1, 2])
+def test_validate(documents, workers):
+    reports = list(HPXMLValidator(workers=workers).validate(documents, ordered=True))
+    assert [report.hpxml_file for report in reports] == documents
+    assert [report.status for report in reports] == ['valid', 'invalid', 'failed', 'unsupported']
+    assert [issue.path for issue in reports[1].issues] == [
+        '/HPXML/XMLTransactionHeaderInformation/Transaction',
+        '/HPXML/Building/BuildingDetails/BuildingSummary/BuildingConstruction/NumberofBedrooms']
+    assert reports[2].issues[0].reason.startswith('ParseError')
+    # There is no HPXML 4.0 schema unless HPXML_4_SCHEMA is set
+    assert 'http://hpxmlonline.com/2019/10' in reports[3].issues[0].reason
+
+
+@pytest.mark.parametrize("workers", [1, 2])
+def test_schema_by_namespace(documents, emitted, workers):
+    validator = HPXMLValidator({**default_schemas(), HPXML_4_NAMESPACE: EMITTER_SCHEMA}, workers=workers)
+    reports = list(validator.validate([documents[0], emitted], ordered=True))
+    assert [report.status for report in reports] == ['valid', 'valid']
+    assert reports[1].issues == ()
+    # A single schema only validates the documents of its namespace
+    assert HPXMLValidator(EMITTER_SCHEMA).validate_one(documents[0]).status == 'unsupported'
+
+
+def test_emitter_output_against_hpxml_4_schema(emitted, monkeypatch):
+    monkeypatch.setenv('HPXML_4_SCHEMA', EMITTER_SCHEMA)
+    assert HPXMLValidator().validate_one(emitted).status == 'valid'
+
+
+@pytest.mark.parametrize("workers", [1, 2])
+def test_sampling(documents, workers):
+    validator = HPXMLValidator(workers=workers, sample_every=2, max_errors=1)
+    # The files are consumed lazily and the skipped files keep their place in ordered mode
+    reports = list(validator.validate((path for path in documents * 2), ordered=True))
+    assert [report.hpxml_file for report in reports] == documents * 2
+    assert [report.status for report in reports] == ['valid', 'skipped', 'failed', 'skipped'] * 2
+    summary = summarize(reports)
+    assert summary['files'] == 8 and summary['skipped'] == 4 and summary['valid'] == 2 and summary['invalid'] == 0
+    assert list(summary['issues']) == [documents[2]]
+    with pytest.raises(ValueError):
+        HPXMLValidator(sample_every=0)
+
+
+def test_max_errors(documents):
+    report = HPXMLValidator(max_errors=1).validate_one(documents[1])
+    assert report.status == 'invalid' and len(report.issues) == 1
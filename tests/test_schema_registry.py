@@ -0,0 +1,85 @@
+import os.path
+import shutil
+
+import pytest
+import xmlschema
+
+from h2kparser import ParseH2K
+from schema_registry import SchemaRegistry, resolve_schema
+
+TESTS_DIR = os.path.dirname(__file__)
+SCHEMA = os.path.join(TESTS_DIR, "schema/H2k Schema.xsd")
+H2K = os.path.join(
+    TESTS_DIR, "ASHRAE_Standard_140/H2K/Standard140-Class2 L100 Cooling.h2k")
+
+
+def test_schema_compiled_once_per_content(tmp_path):
+    registry = SchemaRegistry()
+    copy = tmp_path / "copy.xsd"
+    shutil.copy(SCHEMA, copy)
+
+    schema = registry.get(SCHEMA)
+    assert registry.get(SCHEMA) is schema
+    assert registry.get(str(copy)) is schema
+    assert len(registry) == 1
+
+
+def test_schema_persisted_to_disk_cache(tmp_path, monkeypatch):
+    SchemaRegistry(cache_dir=str(tmp_path)).get(SCHEMA)
+    assert len(list(tmp_path.glob("*.pickle"))) == 1
+
+    def no_compile(*args, **kwargs):
+        raise AssertionError("schema should be loaded from the disk cache")
+
+    monkeypatch.setattr(xmlschema, "XMLSchema", no_compile)
+    warm = SchemaRegistry(cache_dir=str(tmp_path))
+    assert warm.get(SCHEMA).is_valid(H2K)
+
+
+def test_parser_accepts_registry_and_schema_object():
+    registry = SchemaRegistry(default_schema=SCHEMA)
+    schema = resolve_schema(registry)
+
+    assert ParseH2K(H2K, registry).h2k_schema is schema
+    assert ParseH2K(H2K, schema).h2k_schema is schema
+    with pytest.raises(ValueError):
+        SchemaRegistry().get()
+
+
+def test_schema_selected_from_file_version():
+    ers_h2k = os.path.join(TESTS_DIR, os.path.pardir, "exploration/data/h2k/ERS-1032.H2K")
+    ers_schema = os.path.join(TESTS_DIR, os.path.pardir, "schemas/h2k/H2k Schema.xsd")
+    registry = SchemaRegistry(versions={(11, 3): SCHEMA, (11, 4): ers_schema})
+
+    assert registry.file_version(ers_h2k) == (11, 4)
+    assert registry.schema_for(H2K) is registry.get(SCHEMA)
+    assert registry.digest_for(ers_h2k) == registry.file_hash(ers_schema)
+    # Both files are valid against the schema of their own version, without trial validation
+    assert ParseH2K(ers_h2k, registry).is_valid
+    assert ParseH2K(H2K, registry).is_valid
+    assert len(registry) == 2
+
+
+def test_unknown_version_uses_default_schema():
+    registry = SchemaRegistry(versions={(10, 51): SCHEMA})
+    with pytest.raises(ValueError):
+        registry.schema_for(H2K)
+    registry.default_schema = SCHEMA
+    assert registry.schema_file_for(H2K) == SCHEMA
+
+
+def test_bundled_schemas_selected_by_default():
+    ers_h2k = os.path.join(TESTS_DIR, os.path.pardir, "exploration/data/h2k/ERS-1032.H2K")
+    ers_schema = os.path.join(TESTS_DIR, os.path.pardir, "schemas/h2k/H2k Schema.xsd")
+    registry = SchemaRegistry(default_schema=SCHEMA)
+
+    # ERS-1032 (11.4) uses the bundled schema, the ASHRAE files (11.3) fall back to the default schema
+    assert registry.digest_for(ers_h2k) == registry.file_hash(ers_schema)
+    assert registry.schema_file_for(H2K) == SCHEMA
+    assert ParseH2K(ers_h2k, registry).is_valid
+    assert ParseH2K(H2K, registry).is_valid
+    assert SchemaRegistry(default_schema=SCHEMA, versions={}).schema_file_for(ers_h2k) == SCHEMA
+    # Without a schema, the parser selects the bundled schema of the file version
+    assert ParseH2K(ers_h2k).is_valid
+    with pytest.raises(ValueError):
+        ParseH2K(H2K)
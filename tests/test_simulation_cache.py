@@ -0,0 +1,80 @@
+import json
+import os.path
+
+from simulation_cache import SimulationCache
+from simulation_runner import SimulationRunner
+from .test_simulation_runner import FAKE_SIMULATOR, write_workflow
+
+
+def read_counter(path):
+    with open(path) as counter:
+        return int(counter.read())
+
+
+def test_cached_run_is_restored(tmp_path):
+    counter = str(tmp_path / "counter")
+    workflow = write_workflow(tmp_path / "house.json", {'counter': counter})
+    cache = SimulationCache(str(tmp_path / "cache"))
+    runner = SimulationRunner(str(tmp_path / "runs"), FAKE_SIMULATOR, workers=1, cache=cache)
+    first, = runner.run([workflow])
+    assert first.status == 'success' and not first.cached and first.attempts == 1
+
+    second, = runner.run([workflow])
+    # The simulator did not run again and the same outputs are back in the run directory
+    assert read_counter(counter) == 1
+    assert second.status == 'success' and second.cached and second.attempts == 0
+    assert second.outputs == first.outputs
+    with open(os.path.join(second.run_dir, 'run', 'results_annual.csv')) as results_file:
+        assert results_file.read() == "Energy Use: Total (MBtu),50.0\n"
+    assert cache.stats()['hits'] == 1 and cache.stats()['misses'] == 1
+
+    # The run root does not matter, the arguments and the measures found next to the workflow do
+    runner_2 = SimulationRunner(str(tmp_path / "runs_2"), FAKE_SIMULATOR, workers=1, cache=str(tmp_path / "cache"))
+    assert next(runner_2.run([workflow])).cached
+    result, = runner.run([write_workflow(tmp_path / "house.json", {'counter': counter}, cfa=2000.0)])
+    assert not result.cached
+    (tmp_path / "other").mkdir()
+    result, = runner.run([write_workflow(tmp_path / "other" / "house.json", {'counter': counter})])
+    assert not result.cached and read_counter(counter) == 3
+
+
+def test_failed_runs_are_not_cached(tmp_path):
+    counter = str(tmp_path / "counter")
+    workflow = write_workflow(tmp_path / "house.json", {'fail_times': 1, 'counter': counter})
+    runner = SimulationRunner(str(tmp_path / "runs"), FAKE_SIMULATOR, workers=1, retries=0,
+                              cache=str(tmp_path / "cache"))
+    assert next(runner.run([workflow])).status == 'failed'
+    result, = runner.run([workflow])
+    assert result.status == 'success' and not result.cached
+
+
+def test_key(tmp_path):
+    cache = SimulationCache(str(tmp_path / "cache"))
+    weather_dir = tmp_path / "weather"
+    weather_dir.mkdir()
+    (weather_dir / "station.epw").write_text("LOCATION,Ottawa\n")
+    workflow = {'run_directory': 'run', 'file_paths': ['weather'],
+                'steps': [{'measure_dir_name': 'BuildResidentialHPXML',
+                           'arguments': {SimulationCache.WEATHER_ARGUMENT: 'station.epw'}}]}
+    assert cache.weather_file(workflow, str(tmp_path)) == str(weather_dir / "station.epw")
+    key = cache.key(workflow, str(tmp_path))
+    # The run directory does not change the outputs, the command and the weather data do
+    assert cache.key({**workflow, 'run_directory': 'elsewhere'}, str(tmp_path)) == key
+    assert cache.key(workflow, str(tmp_path), ['openstudio', 'run']) != key
+    (weather_dir / "station.epw").write_text("LOCATION,Montreal\n")
+    assert cache.key(workflow, str(tmp_path)) != key
+    assert cache.key(json.loads(json.dumps(workflow)), str(tmp_path)) == cache.key(workflow, str(tmp_path))
+
+
+def test_eviction(tmp_path):
+    run_dir = tmp_path / "run"
+    run_dir.mkdir()
+    (run_dir / "results.csv").write_bytes(os.urandom(4000))
+    cache = SimulationCache(str(tmp_path / "cache"), max_bytes=10000)
+    keys = [f"{index:064x}" for index in range(4)]
+    for key in keys:
+        cache.put(key, str(tmp_path), ['run/results.csv'])
+    # The oldest runs were evicted to keep the cache under max_bytes
+    assert cache.stats()['bytes'] <= 10000
+    assert cache.restore(keys[0], str(tmp_path / "restored")) is None
+    assert cache.restore(keys[-1], str(tmp_path / "restored")) == ('run/results.csv',)
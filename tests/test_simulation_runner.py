@@ -0,0 +1,89 @@
+import json
+import os.path
+import sys
+
+import pytest
+
+from simulation_runner import SimulationRunner
+
+TESTS_DIR = os.path.dirname(__file__)
+FAKE_SIMULATOR = (sys.executable, os.path.join(TESTS_DIR, "fake_simulator.py"), '--workflow', '{workflow}')
+
+
+def write_workflow(path, fake_simulator=None, cfa=1000.0):
+    workflow = {'run_directory': 'run', 'measure_paths': ['../measures'],
+                'steps': [{'measure_dir_name': 'BuildResidentialHPXML', 'arguments': {'geometry_unit_cfa': cfa}}]}
+    if fake_simulator is not None:
+        workflow['fake_simulator'] = fake_simulator
+    path.write_text(json.dumps(workflow))
+    return str(path)
+
+
+@pytest.mark.parametrize("workers", [1, 3])
+def test_run_isolated_jobs(tmp_path, workers):
+    workflows = [write_workflow(tmp_path / f"house-{index}.json", cfa=1000.0 * (index + 1)) for index in range(3)]
+    runner = SimulationRunner(str(tmp_path / "runs"), FAKE_SIMULATOR, workers=workers)
+    results = sorted(runner.run(workflows))
+    assert [result.status for result in results] == ['success'] * 3
+    for index, result in enumerate(results):
+        assert result.run_dir == str(tmp_path / "runs" / f"house-{index}")
+        assert result.attempts == 1 and result.returncode == 0 and result.error is None
+        assert os.path.join('run', 'results_annual.csv') in result.outputs
+        with open(os.path.join(result.run_dir, 'run', 'results_annual.csv')) as results_file:
+            assert results_file.read() == f"Energy Use: Total (MBtu),{50.0 * (index + 1):.1f}\n"
+        with open(os.path.join(result.run_dir, f"house-{index}.json")) as json_file:
+            job_workflow = json.load(json_file)
+        # The copy runs in its own directory and still finds the measures next to the original workflow
+        assert job_workflow['run_directory'] == os.path.join(result.run_dir, 'run')
+        assert job_workflow['measure_paths'] == [str(tmp_path.parent / "measures")]
+
+
+def test_retries(tmp_path):
+    counter = str(tmp_path / "counter")
+    workflow = write_workflow(tmp_path / "house.json", {'fail_times': 1, 'counter': counter})
+    result, = SimulationRunner(str(tmp_path / "runs"), FAKE_SIMULATOR, workers=1, retries=1).run([workflow])
+    assert result.status == 'success' and result.attempts == 2
+    # The failed attempt left nothing behind
+    assert os.path.join('run', 'failed.job') not in result.outputs
+
+    workflow = write_workflow(tmp_path / "broken.json", {'fail_times': 5, 'counter': counter + '2', 'exit_code': 3})
+    result, = SimulationRunner(str(tmp_path / "runs"), FAKE_SIMULATOR, workers=1, retries=2).run([workflow])
+    assert result.status == 'failed' and result.attempts == 3 and result.returncode == 3
+    with open(os.path.join(result.run_dir, SimulationRunner.LOG_FILE)) as log:
+        assert 'Simulation failed' in log.read()
+
+
+def test_timeout_and_failed_job(tmp_path):
+    workflow = write_workflow(tmp_path / "slow.json", {'sleep': 30})
+    result, = SimulationRunner(str(tmp_path / "runs"), FAKE_SIMULATOR, workers=1, timeout=0.5,
+                               retries=0).run([workflow])
+    assert result.status == 'timeout' and result.seconds < 10
+
+    # A failed.job file marks a failed workflow even when the command exits with 0
+    workflow = write_workflow(tmp_path / "failed.json", {'fail_times': 1, 'counter': str(tmp_path / "c"),
+                                                         'exit_code': 0})
+    result, = SimulationRunner(str(tmp_path / "runs"), FAKE_SIMULATOR, workers=1, retries=0).run([workflow])
+    assert result.status == 'failed' and result.returncode == 0
+
+    result, = SimulationRunner(str(tmp_path / "runs"), "no-such-simulator {workflow}", workers=1,
+                               retries=0).run([workflow])
+    assert result.status == 'failed' and result.error.startswith('FileNotFoundError')
+
+
+def test_duplicate_job_dirs(tmp_path):
+    (tmp_path / "a").mkdir()
+    workflows = [write_workflow(tmp_path / "house.json"), write_workflow(tmp_path / "a" / "house.json")]
+    with pytest.raises(ValueError):
+        SimulationRunner(str(tmp_path / "runs"), FAKE_SIMULATOR).run(workflows)
+
+
+def test_timeout_race(tmp_path, monkeypatch):
+    # The job exits between the timeout and the kill: the result is a timeout, not an exception in the pool
+    def killpg(pid, sig):
+        raise ProcessLookupError(pid)
+
+    monkeypatch.setattr(os, 'killpg', killpg, raising=False)
+    workflow = write_workflow(tmp_path / "slow.json", {'sleep': 1})
+    result, = SimulationRunner(str(tmp_path / "runs"), FAKE_SIMULATOR, workers=2, timeout=0.2,
+                               retries=0).run([workflow])
+    assert result.status == 'timeout'
@@ -0,0 +1,55 @@
+import json
+
+from simulation_runner import SimulationRunner
+from workflow_dedup import WorkflowDeduplicator, collapse_report, run_groups
+from .test_simulation_runner import FAKE_SIMULATOR, write_workflow
+
+
+def test_group(tmp_path):
+    workflows = [write_workflow(tmp_path / f"house-{index}.json", cfa=cfa)
+                 for index, cfa in enumerate([1000.0, 1000.4, 1200.0, 1000.0, 1005.0])]
+    # Another measure is never grouped, even with the same arguments
+    workflow = json.loads((tmp_path / "house-0.json").read_text())
+    workflow['steps'][0]['measure_dir_name'] = 'Other'
+    (tmp_path / "other.json").write_text(json.dumps(workflow))
+    workflows.append(str(tmp_path / "other.json"))
+
+    groups = WorkflowDeduplicator().group(workflows)
+    assert [group.members for group in groups] == [
+        (workflows[0], workflows[3]), (workflows[1],), (workflows[2],), (workflows[4],), (workflows[5],)]
+
+    groups = WorkflowDeduplicator(abs_tol=0.5).group(workflows)
+    assert [group.members for group in groups] == [
+        (workflows[0], workflows[1], workflows[3]), (workflows[2],), (workflows[4],), (workflows[5],)]
+    groups = WorkflowDeduplicator(rel_tol=0.01).group(workflows)
+    assert groups[0] == (workflows[0], (workflows[0], workflows[1], workflows[3], workflows[4]))
+    assert collapse_report(groups) == {'workflows': 6, 'simulations': 3, 'collapse_ratio': 2.0,
+                                       'largest_group': 4}
+
+
+def test_numeric_strings(tmp_path):
+    workflows = []
+    for index, setpoint in enumerate(['68.0', '68.04', 'auto']):
+        workflow = {'steps': [{'measure_dir_name': 'BuildResidentialHPXML',
+                               'arguments': {'hvac_control_heating_weekday_setpoint': setpoint,
+                                             'geometry_unit_cfa': 1000}}]}
+        (tmp_path / f"house-{index}.json").write_text(json.dumps(workflow))
+        workflows.append(str(tmp_path / f"house-{index}.json"))
+    groups = WorkflowDeduplicator(abs_tol=0.05).group(workflows)
+    assert [len(group.members) for group in groups] == [2, 1]
+
+
+def test_run_groups(tmp_path):
+    counter = str(tmp_path / "counter")
+    workflows = [write_workflow(tmp_path / f"house-{index}.json", {'counter': counter}, cfa=1000.0 + index * 0.1)
+                 for index in range(4)]
+    groups = WorkflowDeduplicator(abs_tol=0.25).group(workflows)
+    assert len(groups) == 2
+    results = list(run_groups(SimulationRunner(str(tmp_path / "runs"), FAKE_SIMULATOR, workers=1), groups))
+    # One simulation per group and one result per house, pointing at the run of its representative
+    with open(counter) as counter_file:
+        assert counter_file.read() == '2'
+    assert sorted(result.workflow for result in results) == workflows
+    run_dirs = {result.workflow: result.run_dir for result in results}
+    assert run_dirs[workflows[1]] == run_dirs[workflows[0]] == str(tmp_path / "runs" / "house-0")
+    assert run_dirs[workflows[3]] == str(tmp_path / "runs" / "house-3")